@@ -0,0 +1,158 @@
+import io
+import random
+from collections import namedtuple
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from categories.models import Category
+from chat.models import Conversation, Message
+from orders.models import Order, OrderItem
+from products.models import Product, ProductImage, ProductTrending, Review
+from store import stats
+from store.models import StoreProfile
+from users.models import Buyer, Seller, SellerToken
+
+ADJECTIVES = ['handloom', 'organic', 'spiced', 'coir', 'brass', 'teak', 'banana', 'coconut', 'jasmine', 'kasavu']
+NOUNS = ['saree', 'tea', 'pepper', 'mat', 'lamp', 'chips', 'oil', 'soap', 'halwa', 'basket', 'mundu', 'cardamom']
+
+# Sizes used when the command is run without overrides; the stored baseline
+# was recorded with these.
+DEFAULT_SIZES = {
+    'sellers': 20,
+    'products_per_store': 50,
+    'images_per_product': 2,
+    'buyers': 50,
+    'reviews_per_product': 3,
+    'orders': 500,
+    'conversations': 40,
+    'messages_per_conversation': 30,
+}
+
+Dataset = namedtuple('Dataset', [
+    'seller_ids', 'seller_phones', 'seller_tokens', 'buyer_ids', 'buyer_tokens',
+    'product_ids', 'products_by_seller', 'conversations', 'search_terms',
+])
+
+
+def _image_files(count):
+    """A few small JPEGs shared by every product, saved once to MEDIA_ROOT."""
+    names = []
+    for i in range(count):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (40 * i % 255, 120, 200)).save(buffer, 'JPEG')
+        names.append(default_storage.save(f'product_images/bench/sample-{i}.jpg', ContentFile(buffer.getvalue())))
+    return names
+
+
+def _categories():
+    roots = [Category.objects.create(name=f"Bench {noun.title()}") for noun in NOUNS[:4]]
+    children = [Category.objects.create(name=f"{root.name} {i}", parent=root) for root in roots for i in range(3)]
+    return roots + children
+
+
+def generate(seed=42, **sizes):
+    """
+    Build a deterministic marketplace: sellers with stores, products with
+    images and reviews, delivered orders and buyer-seller chats. Rows are
+    bulk-inserted (signals are bypassed), then the store counters are
+    reconciled. Returns the ids and auth tokens the scenarios need.
+    """
+    sizes = {**DEFAULT_SIZES, **{key: value for key, value in sizes.items() if value is not None}}
+    rng = random.Random(seed)
+    password = make_password(None)
+
+    sellers = Seller.objects.bulk_create([
+        Seller(phone=f"9{i:09d}", name=f"Seller {i}", shop_name=f"Shop {i}", password=password)
+        for i in range(sizes['sellers'])
+    ])
+    stores = StoreProfile.objects.bulk_create([
+        StoreProfile(
+            seller=seller, name=seller.shop_name, tagline=f"Fresh from {seller.shop_name}",
+            description=' '.join(rng.choices(NOUNS, k=20)),
+        )
+        for seller in sellers
+    ])
+    tokens = {seller.pk: SellerToken.objects.create(user=seller).key for seller in sellers}
+    buyers = Buyer.objects.bulk_create([
+        Buyer(
+            email=f"buyer{i}@bench.test", full_name=f"Buyer {i}", password=password,
+            phone_number=f"8{i:09d}", city='Kochi', pincode='682001',
+        )
+        for i in range(sizes['buyers'])
+    ])
+
+    categories = _categories()
+    images = _image_files(4)
+    products = Product.objects.bulk_create([
+        Product(
+            store=store, category=rng.choice(categories),
+            name=f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS)} {i}",
+            description=' '.join(rng.choices(ADJECTIVES + NOUNS, k=30)),
+            price=Decimal(rng.randint(50, 5000)), mrp=Decimal(5000),
+            total_stock=100000, online_stock=100000,
+            main_image=rng.choice(images), attributes={'size': rng.choice('SML')},
+        )
+        for store in stores for i in range(sizes['products_per_store'])
+    ], batch_size=1000)
+    ProductTrending.objects.bulk_create([ProductTrending(product=product) for product in products], batch_size=1000)
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image=rng.choice(images))
+        for product in products for _ in range(sizes['images_per_product'])
+    ], batch_size=1000)
+    Review.objects.bulk_create([
+        Review(product=product, buyer=buyer, rating=rng.randint(1, 5), comment='Good')
+        for product in products
+        for buyer in rng.sample(buyers, min(len(buyers), sizes['reviews_per_product']))
+    ], batch_size=1000)
+
+    by_store = {}
+    for product in products:
+        by_store.setdefault(product.store_id, []).append(product)
+    orders = Order.objects.bulk_create([
+        Order(
+            store=rng.choice(stores), buyer=rng.choice(buyers), customer_name='Bench Buyer',
+            customer_phone='8000000000', shipping_address='Kochi', total_amount=0,
+            status=Order.OrderStatus.DELIVERED,
+        )
+        for _ in range(sizes['orders'])
+    ], batch_size=1000)
+    items = []
+    for order in orders:
+        for product in rng.sample(by_store[order.store_id], min(3, len(by_store[order.store_id]))):
+            items.append(OrderItem(order=order, product=product, quantity=rng.randint(1, 3), price=product.price))
+            order.total_amount += product.price * items[-1].quantity
+    OrderItem.objects.bulk_create(items, batch_size=1000)
+    Order.objects.bulk_update(orders, ['total_amount'], batch_size=1000)
+
+    conversations = Conversation.objects.bulk_create([
+        Conversation(seller=rng.choice(sellers), buyer=rng.choice(buyers))
+        for _ in range(sizes['conversations'])
+    ])
+    messages = []
+    for conversation in conversations:
+        for i in range(sizes['messages_per_conversation']):
+            sender = rng.choice(['buyer', 'seller'])
+            messages.append(Message(
+                conversation=conversation, sender_type=sender,
+                sender_id=conversation.buyer_id if sender == 'buyer' else conversation.seller_id,
+                text=f"Message {i} about {rng.choice(NOUNS)}",
+            ))
+    Message.objects.bulk_create(messages, batch_size=1000)
+
+    stats.reconcile([store.pk for store in stores])
+    return Dataset(
+        seller_ids=[seller.pk for seller in sellers],
+        seller_phones=[seller.phone for seller in sellers],
+        seller_tokens=tokens,
+        buyer_ids=[buyer.pk for buyer in buyers],
+        buyer_tokens={buyer.pk: str(RefreshToken.for_user(buyer).access_token) for buyer in buyers},
+        product_ids=[product.pk for product in products],
+        products_by_seller={store.seller_id: [p.pk for p in by_store.get(store.pk, [])] for store in stores},
+        conversations=[(c.pk, c.buyer_id, c.seller_id) for c in conversations],
+        search_terms=sorted(set(NOUNS)),
+    )
@@ -0,0 +1,68 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from benchmarks.payloads import order_page, product_page
+from keralasellers import compression
+from keralasellers.renderers import FastJSONRenderer
+
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def _cpu_ms(func, repeat):
+    start = time.thread_time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.thread_time() - start) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure response compression on rendered API pages: bytes saved and CPU "
+        "cost per encoding and level, and the cost of serving a cached variant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=500, help='Products (and orders) per page.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = options['repeat']
+        levels = [('gzip', 'GZIP_LEVEL', level) for level in (1, 6, 9)]
+        if compression.brotli is not None:
+            levels += [('br', 'BROTLI_QUALITY', quality) for quality in (1, 5, 11)]
+        else:
+            self.stdout.write(self.style.WARNING("brotli is not installed; measuring gzip only."))
+
+        for label, page in (
+            (f"{options['size']}-product catalog page", product_page(rng, options['size'])),
+            (f"{options['size']}-order history page", order_page(rng, options['size'])),
+        ):
+            body = FastJSONRenderer().render(page)
+            self.stdout.write(f"\n{label}: {len(body) / 1024:.0f} KiB uncompressed")
+            for encoding, setting, level in levels:
+                with override_settings(COMPRESSION={**settings.COMPRESSION, setting: level}):
+                    compressed, ms = _cpu_ms(lambda: compression.compress(encoding, body), repeat)
+                self.stdout.write(
+                    f"  {encoding:<4} level {level:<2}  {len(compressed) / 1024:7.1f} KiB  "
+                    f"saved {100 - len(compressed) * 100 / len(body):5.1f}%  {ms:7.2f} ms CPU"
+                )
+
+            with override_settings(CACHES=BENCH_CACHES):
+                request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+                def cached():
+                    response = HttpResponse(body, content_type='application/json')
+                    compression.cache_variants(response, 'bench')
+                    return compression.compress_response(request, response)
+
+                cached()
+                _, hit_ms = _cpu_ms(cached, repeat)
+            self.stdout.write(f"  cached gzip variant              {hit_ms:7.2f} ms CPU per response")
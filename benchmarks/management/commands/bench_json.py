@@ -0,0 +1,54 @@
+import io
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.payloads import order_page, product_page
+from keralasellers import parsers, renderers
+from keralasellers.parsers import FastJSONParser
+from keralasellers.renderers import FastJSONRenderer
+
+
+def _timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark JSON encoding and decoding of API pages: DRF's stdlib "
+        "JSONRenderer/JSONParser versus keralasellers.renderers/parsers. Checks "
+        "that both render identical bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=500, help='Products (and orders) per page.')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None or parsers.orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; the fast classes use the stdlib path."))
+        rng = random.Random(options['seed'])
+        repeat = options['repeat']
+        for label, page in (
+            (f"{options['size']}-product catalog page", product_page(rng, options['size'])),
+            (f"{options['size']}-order history page", order_page(rng, options['size'])),
+        ):
+            stdlib_bytes, stdlib_ms = _timed(lambda: JSONRenderer().render(page), repeat)
+            fast_bytes, fast_ms = _timed(lambda: FastJSONRenderer().render(page), repeat)
+            assert fast_bytes == stdlib_bytes, 'rendered output differs'
+            _, stdlib_parse_ms = _timed(lambda: JSONParser().parse(io.BytesIO(stdlib_bytes)), repeat)
+            _, fast_parse_ms = _timed(lambda: FastJSONParser().parse(io.BytesIO(stdlib_bytes)), repeat)
+
+            self.stdout.write(f"\n{label} ({len(stdlib_bytes) / 1024:.0f} KiB)")
+            self.stdout.write(f"  render  stdlib {stdlib_ms:8.2f} ms   fast {fast_ms:8.2f} ms   {stdlib_ms / fast_ms:5.1f}x")
+            self.stdout.write(
+                f"  parse   stdlib {stdlib_parse_ms:8.2f} ms   fast {fast_parse_ms:8.2f} ms   "
+                f"{stdlib_parse_ms / fast_parse_ms:5.1f}x"
+            )
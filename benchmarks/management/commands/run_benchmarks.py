@@ -0,0 +1,120 @@
+import json
+import platform
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks import data, runner
+from benchmarks.scenarios import SCENARIOS
+
+BASELINE = Path(__file__).resolve().parents[2] / 'baseline.json'
+
+BENCH_SETTINGS = {
+    'DEBUG': False,
+    'ALLOWED_HOSTS': ['testserver'],
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'PAYMENT_GATEWAY': {'BACKEND': 'payments.gateway.FakeGateway'},
+    'SMS': {'BACKEND': 'users.sms.MemorySender'},
+    'BACKGROUND_TASKS': {'MAX_WORKERS': 1, 'ALWAYS_EAGER': True},
+    # Trending events stay buffered, so a flush that falls due after some
+    # wall-clock time never lands in the measured requests.
+    'TRENDING': {**settings.TRENDING, 'FLUSH_INTERVAL': 24 * 3600, 'FLUSH_SIZE': 10 ** 6},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the critical-flow benchmark scenarios against a generated dataset "
+        "in a throwaway test database and compare them with the stored baseline. "
+        "Exits non-zero on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help='Comma-separated subset of: ' + ', '.join(SCENARIOS))
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=1, help='Client threads per scenario.')
+        parser.add_argument('--seed', type=int, default=42)
+        for size in data.DEFAULT_SIZES:
+            parser.add_argument(f"--{size.replace('_', '-')}", type=int, dest=size)
+        parser.add_argument('--baseline', default=str(BASELINE))
+        parser.add_argument('--save-baseline', action='store_true', help='Overwrite the baseline with this run.')
+        parser.add_argument('--no-compare', action='store_true')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file.')
+        parser.add_argument('--latency-tolerance', type=float, default=0.5,
+                            help='Allowed p95 growth over baseline, as a fraction (default 0.5).')
+        parser.add_argument('--query-tolerance', type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        sizes = {**data.DEFAULT_SIZES, **{size: options[size] for size in data.DEFAULT_SIZES if options[size] is not None}}
+
+        media_root = tempfile.mkdtemp(prefix='bench-media-')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(MEDIA_ROOT=media_root, **BENCH_SETTINGS):
+                started = time.perf_counter()
+                dataset = data.generate(seed=options['seed'], **sizes)
+                self.stdout.write(f"Generated dataset in {time.perf_counter() - started:.1f}s: {sizes}")
+                results = {}
+                for name in names:
+                    results[name] = runner.run_scenario(
+                        name, dataset, requests=options['requests'], warmup=options['warmup'],
+                        concurrency=options['concurrency'], seed=options['seed'],
+                    )
+                    self.report(name, results[name])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        run = {
+            'sizes': sizes,
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'seed': options['seed'],
+            'concurrency': options['concurrency'],
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'scenarios': results,
+        }
+        if options['json_path']:
+            Path(options['json_path']).write_text(json.dumps(run, indent=2) + '\n')
+        if options['save_baseline']:
+            Path(options['baseline']).write_text(json.dumps(run, indent=2) + '\n')
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+        if not options['no_compare']:
+            self.compare(run, options)
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<18} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+            f"p99 {result['p99_ms']:8.2f} ms  {result['queries_per_request']:6.2f} q/req  "
+            f"{result['throughput_rps']:8.1f} req/s  errors {result['errors']}"
+        )
+
+    def compare(self, run, options):
+        path = Path(options['baseline'])
+        if not path.exists():
+            self.stdout.write(f"No baseline at {path}; run with --save-baseline to record one.")
+            return
+        baseline = json.loads(path.read_text())
+        if baseline.get('sizes') != run['sizes'] or baseline.get('concurrency') != run['concurrency']:
+            self.stdout.write("Dataset size or concurrency differs from the baseline; not comparing.")
+            return
+        regressions = runner.compare(
+            run['scenarios'], baseline, options['latency_tolerance'], options['query_tolerance'],
+        )
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
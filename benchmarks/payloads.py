@@ -0,0 +1,45 @@
+"""In-memory API response bodies for the encoding benchmarks (no database needed)."""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+
+def product_page(rng, size):
+    """A catalog page shaped like ProductCardSerializer output."""
+    return {
+        'count': size * 10, 'next': 'http://testserver/api/products/?page=2', 'previous': None,
+        'results': [
+            {
+                'id': i, 'name': f"Kerala spice pack {i}", 'model_name': f"KS-{i:04d}",
+                'description': "Hand-picked pepper, cardamom and clove from Idukki. " * 3,
+                'price': f"{rng.randint(50, 5000)}.{rng.randint(0, 99):02d}", 'mrp': '5000.00',
+                'total_stock': rng.randint(0, 100), 'online_stock': rng.randint(0, 50), 'sale_type': 'BOTH',
+                'main_image_url': f"http://testserver/media/product_images/main/{i}.jpg",
+                'sub_images': [
+                    {'id': i * 3 + n, 'image': f"http://testserver/media/product_images/sub/{i}-{n}.jpg",
+                     'image_url': f"http://testserver/media/product_images/sub/{i}-{n}.jpg"}
+                    for n in range(2)
+                ],
+                'is_active': True,
+                'store': {'name': 'Malabar Stores', 'seller_phone': '9000000000', 'whatsapp_number': None},
+                'category': rng.randint(1, 40), 'attributes': {'weight': '250g', 'organic': True},
+                'average_rating': rng.choice([0.0, 3.5, 4.25, 5.0]), 'review_count': rng.randint(0, 40),
+            }
+            for i in range(size)
+        ],
+    }
+
+
+def order_page(rng, size):
+    """An order history page with raw Decimal and datetime values, which go through the encoder."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            'id': i, 'status': 'DELIVERED', 'total_amount': Decimal(rng.randint(100, 99999)) / 100,
+            'created_at': start + timedelta(minutes=i * 37),
+            'items': [
+                {'product': f"Item {n}", 'quantity': rng.randint(1, 5), 'price': Decimal(rng.randint(100, 9999)) / 100}
+                for n in range(3)
+            ],
+        }
+        for i in range(size)
+    ]
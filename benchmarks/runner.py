@@ -0,0 +1,115 @@
+import contextlib
+import io
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APIClient
+
+from .scenarios import PRIMERS, SCENARIOS
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'queries_per_request', 'throughput_rps')
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _send(client, call):
+    extra = {'HTTP_AUTHORIZATION': call.auth} if call.auth else {}
+    kwargs = {'format': call.format} if call.format else {}
+    return getattr(client, call.method)(call.path, call.data, **kwargs, **extra)
+
+
+def _worker(scenario, dataset, calls, seed):
+    """Send `calls` requests on this thread; returns [(seconds, queries, ok)]."""
+    rng = random.Random(seed)
+    client = APIClient()
+    samples = []
+    for _ in range(calls):
+        call = scenario(dataset, rng)
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            response = _send(client, call)
+            elapsed = time.perf_counter() - start
+        samples.append((elapsed, counter.count, response.status_code == call.expected))
+    return samples
+
+
+def _pool_worker(*args):
+    try:
+        return _worker(*args)
+    finally:
+        # Each pool thread opened its own connection.
+        connection.close()
+
+
+def run_scenario(name, dataset, requests=200, warmup=20, concurrency=1, seed=42):
+    scenario = SCENARIOS[name]
+    cache.clear()
+    # Views print debug output; keep it out of the report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        client = APIClient()
+        for call in PRIMERS[name](dataset) if name in PRIMERS else []:
+            _send(client, call)
+        _worker(scenario, dataset, warmup, seed - 1)
+        shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+        start = time.perf_counter()
+        if concurrency == 1:
+            samples = _worker(scenario, dataset, requests, seed)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                futures = [pool.submit(_pool_worker, scenario, dataset, share, seed + i) for i, share in enumerate(shares)]
+                samples = [sample for future in futures for sample in future.result()]
+        wall = time.perf_counter() - start
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'queries_per_request': round(sum(queries for _, queries, _ in samples) / max(1, len(samples)), 2),
+        'throughput_rps': round(len(samples) / wall, 1) if wall else 0.0,
+    }
+
+
+def compare(results, baseline, latency_tolerance=0.5, query_tolerance=0.0):
+    """
+    Return human-readable regressions of `results` against `baseline`.
+    Query counts are deterministic, so by default any increase is reported;
+    latency (p95) gets a tolerance because it depends on the machine.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get('scenarios', {}).get(name)
+        if current['errors']:
+            regressions.append(f"{name}: {current['errors']} of {current['requests']} requests failed")
+        if base is None:
+            continue
+        if current['queries_per_request'] > base['queries_per_request'] * (1 + query_tolerance) + 0.005:
+            regressions.append(
+                f"{name}: {current['queries_per_request']} queries/request (baseline {base['queries_per_request']})"
+            )
+        if current['p95_ms'] > base['p95_ms'] * (1 + latency_tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms (baseline {base['p95_ms']} ms)")
+    return regressions
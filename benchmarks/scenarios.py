@@ -0,0 +1,94 @@
+"""
+Scripted request mixes for the marketplace's critical flows. Each scenario
+turns (dataset, rng) into one request; the runner repeats it and measures.
+"""
+from collections import namedtuple
+
+# method, path, data, auth header, request format, expected status
+Call = namedtuple('Call', ['method', 'path', 'data', 'auth', 'format', 'expected'])
+
+
+def _buyer(dataset, rng):
+    buyer_id = rng.choice(dataset.buyer_ids)
+    return buyer_id, f"Bearer {dataset.buyer_tokens[buyer_id]}"
+
+
+def _seller(dataset, rng):
+    seller_id = rng.choice(dataset.seller_ids)
+    return seller_id, f"Token {dataset.seller_tokens[seller_id]}"
+
+
+def catalog_list(dataset, rng):
+    return Call('get', f"/api/products/?page={rng.randint(1, 5)}", None, None, None, 200)
+
+
+def catalog_search(dataset, rng):
+    term = rng.choice(dataset.search_terms)
+    return Call('get', f"/api/products/?search={term}", None, None, None, 200)
+
+
+def storefront(dataset, rng):
+    return Call('get', f"/shop/{rng.choice(dataset.seller_phones)}/", None, None, None, 200)
+
+
+def checkout(dataset, rng):
+    _, auth = _buyer(dataset, rng)
+    product_id = rng.choice(dataset.product_ids)
+    data = {'items': [{'id': product_id, 'quantity': 1}], 'shipping_address': 'MG Road, Kochi'}
+    return Call('post', '/user/orders/create-order/', data, auth, 'json', 201)
+
+
+def seller_dashboard(dataset, rng):
+    _, auth = _seller(dataset, rng)
+    return Call('get', '/user/dashboard/', None, auth, None, 200)
+
+
+def stock_update(dataset, rng):
+    seller_id, auth = _seller(dataset, rng)
+    store_products = dataset.products_by_seller[seller_id]
+    data = {'total_stock': rng.randint(1000, 2000), 'online_stock': rng.randint(0, 1000), 'note': 'Bench restock'}
+    return Call('patch', f"/api/products/{rng.choice(store_products)}/update-stock/", data, auth, 'json', 200)
+
+
+def chat_send(dataset, rng):
+    conversation_id, buyer_id, _ = rng.choice(dataset.conversations)
+    auth = f"Bearer {dataset.buyer_tokens[buyer_id]}"
+    return Call('post', f"/api/chat/conversations/{conversation_id}/send/", {'text': 'Is this available?'}, auth, 'multipart', 201)
+
+
+def chat_fetch(dataset, rng):
+    conversation_id, buyer_id, _ = rng.choice(dataset.conversations)
+    auth = f"Bearer {dataset.buyer_tokens[buyer_id]}"
+    return Call('get', f"/api/chat/conversations/{conversation_id}/messages/", None, auth, None, 200)
+
+
+SCENARIOS = {
+    'catalog_list': catalog_list,
+    'catalog_search': catalog_search,
+    'storefront': storefront,
+    'checkout': checkout,
+    'seller_dashboard': seller_dashboard,
+    'stock_update': stock_update,
+    'chat_send': chat_send,
+    'chat_fetch': chat_fetch,
+}
+
+
+def prime_storefronts(dataset):
+    return [Call('get', f"/shop/{phone}/", None, None, None, 200) for phone in dataset.seller_phones]
+
+
+def prime_dashboards(dataset):
+    return [
+        Call('get', '/user/dashboard/', None, f"Token {dataset.seller_tokens[seller_id]}", None, 200)
+        for seller_id in dataset.seller_ids
+    ]
+
+
+# Requests sent once before the warmup of cached scenarios, so every
+# measured request finds a warm cache and queries per request do not
+# depend on how many requests were sent.
+PRIMERS = {
+    'storefront': prime_storefronts,
+    'seller_dashboard': prime_dashboards,
+}
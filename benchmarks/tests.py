@@ -0,0 +1,36 @@
+import json
+import shutil
+import tempfile
+
+from django.test import TransactionTestCase, override_settings
+
+from . import data, runner
+from .management.commands.run_benchmarks import BASELINE, BENCH_SETTINGS
+
+
+class BaselineQueryCountTests(TransactionTestCase):
+    """
+    Query counts are deterministic for a given dataset, seed and request
+    count, so they must match benchmarks/baseline.json exactly. A change that
+    adds or saves queries refreshes the baseline in the same commit with
+    `manage.py run_benchmarks --save-baseline`. A TransactionTestCase, so
+    on_commit work is counted as it is in a real run.
+    """
+
+    def test_queries_per_request_match_baseline(self):
+        baseline = json.loads(BASELINE.read_text())
+        media_root = tempfile.mkdtemp(prefix='bench-media-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        seed = baseline.get('seed', 42)
+        with override_settings(MEDIA_ROOT=media_root, **BENCH_SETTINGS):
+            dataset = data.generate(seed=seed, **baseline['sizes'])
+            for name, expected in baseline['scenarios'].items():
+                result = runner.run_scenario(
+                    name, dataset, requests=baseline['requests'], warmup=baseline.get('warmup', 20), seed=seed,
+                )
+                with self.subTest(scenario=name):
+                    self.assertEqual(result['errors'], 0)
+                    self.assertAlmostEqual(
+                        result['queries_per_request'], expected['queries_per_request'], delta=0.005,
+                        msg=f"{name} query count changed; refresh benchmarks/baseline.json",
+                    )
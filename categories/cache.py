@@ -0,0 +1,104 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from keralasellers.cache import Namespace
+
+VERSION_KEY = 'version'
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+schema_cache = Namespace('categories')
+
+# Per-process copy of the last schema seen: {'version', 'data', 'etag', 'index'}.
+_local = {'version': None, 'data': None, 'etag': None, 'index': {}}
+_lock = threading.Lock()
+
+
+def current_version():
+    """
+    The global schema version shared by all workers. It starts from a
+    timestamp so an evicted counter never reuses an old version number.
+    """
+    version = schema_cache.get(VERSION_KEY)
+    if version is None:
+        schema_cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = schema_cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        schema_cache.incr(VERSION_KEY)
+    except ValueError:
+        current_version()
+    with _lock:
+        _local['version'] = None
+
+
+def _build():
+    from .models import Category
+    from .serializers import CategorySerializer
+    queryset = Category.objects.prefetch_related('attributes').order_by('path')
+    data = json.loads(json.dumps(CategorySerializer(queryset, many=True).data, cls=DjangoJSONEncoder))
+    names = {item['id']: item['name'] for item in data}
+    for item in data:
+        ancestor_ids = [int(part) for part in item['path'].split('/') if part]
+        item['breadcrumbs'] = [{'id': pk, 'name': names.get(pk)} for pk in ancestor_ids]
+    body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+    return data, hashlib.sha1(body).hexdigest()
+
+
+def get_schema():
+    """
+    Return (data, etag) for the category/attribute schema. Normally this is a
+    single cache read for the version number; the database is only queried
+    when an admin edit bumped the version and no worker has rebuilt it yet.
+    """
+    version = current_version()
+    if _local['version'] == version:
+        return _local['data'], _local['etag']
+    return _load(version)
+
+
+def _load(version):
+    # After an edit every worker misses at once; single flight means only
+    # one of them rebuilds the schema.
+    def build():
+        data, digest = _build()
+        return data, f'"categories-v{version}-{digest[:20]}"'
+
+    payload = schema_cache.get_or_compute(f'schema:{version}', build, PAYLOAD_TIMEOUT)
+    with _lock:
+        _local.update(
+            version=version, data=payload[0], etag=payload[1],
+            index={item['id']: item for item in payload[0]},
+        )
+    return payload
+
+
+def get_category(category_id):
+    """Return the cached schema entry (with path and breadcrumbs) for one category."""
+    get_schema()
+    try:
+        return _local['index'].get(int(category_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def breadcrumbs(category_id):
+    """Ancestors of a category from the root down, including itself."""
+    entry = get_category(category_id)
+    return entry['breadcrumbs'] if entry else []
+
+
+def warm_schema_cache():
+    """Load the schema into this process (and the shared cache) at startup."""
+    from django.db import DatabaseError
+    try:
+        get_schema()
+    except DatabaseError:
+        # Tables may not exist yet (e.g. before the first migrate).
+        pass
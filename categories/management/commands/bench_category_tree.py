@@ -0,0 +1,101 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from categories.models import Category, subtree_bounds
+from products.models import Product
+from users.models import Seller
+
+
+def _timed(func, repeat):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        elapsed = time.perf_counter() - start
+    return result, elapsed / repeat * 1000, len(queries.captured_queries) // repeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark subtree product queries on a synthetic category tree: the "
+        "materialized-path range scan versus walking the tree level by level. "
+        "Runs in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depth', type=int, default=6)
+        parser.add_argument('--branching', type=int, default=5)
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def build_tree(self, depth, branching):
+        levels = [[]]
+        roots = Category.objects.bulk_create(
+            [Category(name=f"root-{i}") for i in range(branching)]
+        )
+        for root in roots:
+            root.path = f"{root.pk}/"
+        Category.objects.bulk_update(roots, ['path'])
+        levels[0] = roots
+        for level in range(1, depth):
+            children = [
+                Category(name=f"c-{level}-{parent.pk}-{i}", parent=parent, depth=level)
+                for parent in levels[-1] for i in range(branching)
+            ]
+            Category.objects.bulk_create(children, batch_size=1000)
+            for child in children:
+                child.path = f"{child.parent.path}{child.pk}/"
+            Category.objects.bulk_update(children, ['path'], batch_size=1000)
+            levels.append(children)
+        return levels
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        levels = self.build_tree(options['depth'], options['branching'])
+        categories = [category for level in levels for category in level]
+        store = Seller.objects.create_user(phone='9000000000', password='bench').store_profile
+        Product.objects.bulk_create(
+            [
+                Product(store=store, name=f"product-{i}", price=100, mrp=100,
+                        total_stock=10, online_stock=5, category=rng.choice(categories))
+                for i in range(options['products'])
+            ],
+            batch_size=1000,
+        )
+        self.stdout.write(
+            f"Tree: {len(categories)} categories, depth {options['depth']}, "
+            f"branching {options['branching']}; {options['products']} products"
+        )
+
+        for label, node in [('root', levels[0][0]), ('mid-level', levels[len(levels) // 2][0])]:
+            def by_path():
+                lower, upper = subtree_bounds(node.path)
+                return list(Product.objects.filter(
+                    category__path__gte=lower, category__path__lt=upper,
+                ).values_list('id', flat=True))
+
+            def by_walk():
+                ids, frontier = [node.pk], [node.pk]
+                while frontier:
+                    frontier = list(Category.objects.filter(parent_id__in=frontier).values_list('id', flat=True))
+                    ids.extend(frontier)
+                return list(Product.objects.filter(category_id__in=ids).values_list('id', flat=True))
+
+            path_rows, path_ms, path_queries = _timed(by_path, options['repeat'])
+            walk_rows, walk_ms, walk_queries = _timed(by_walk, options['repeat'])
+            assert sorted(path_rows) == sorted(walk_rows)
+            self.stdout.write(f"\n{label} subtree ({len(path_rows)} products)")
+            self.stdout.write(f"  materialized path: {path_ms:8.2f} ms  {path_queries} query")
+            self.stdout.write(f"  level-by-level:    {walk_ms:8.2f} ms  {walk_queries} queries")
@@ -1,13 +1,30 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 
 # Create your models here.
-from django.db import models
+PATH_SEPARATOR = '/'
 
-from django.db import models
+
+def subtree_bounds(path):
+    """
+    Return (lower, upper) so that `lower <= p < upper` matches every path that
+    starts with `path`. A plain range works with any B-tree index, unlike
+    LIKE 'prefix%' on some backends.
+    """
+    return path, path[:-1] + chr(ord(PATH_SEPARATOR) + 1)
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+
+    # Materialized path of ancestor ids including this one, e.g. "3/17/42/".
+    # Every descendant's path starts with its ancestor's path, so a subtree
+    # is one index range scan.
+    path = models.CharField(max_length=255, editable=False, default='', db_index=True)
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
     
     # ✅ Add this field to store default attributes
     default_attributes = models.JSONField(
@@ -22,6 +39,48 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def _current_paths(self):
+        """Stored paths of this category and its parent; in-memory copies may be stale after a move."""
+        ids = [pk for pk in (self.pk, self.parent_id) if pk]
+        paths = dict(Category.objects.filter(pk__in=ids).values_list('pk', 'path'))
+        return paths.get(self.pk, ''), paths.get(self.parent_id, '')
+
+    def clean(self):
+        old_path, parent_path = self._current_paths()
+        if old_path and self.parent_id and parent_path.startswith(old_path):
+            raise ValidationError({'parent': "A category cannot be moved under itself or its descendants."})
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old_path, parent_path = self._current_paths()
+            if old_path and self.parent_id and parent_path.startswith(old_path):
+                raise ValidationError("A category cannot be moved under itself or its descendants.")
+            super().save(*args, **kwargs)
+            new_path = f"{parent_path}{self.pk}{PATH_SEPARATOR}"
+            if new_path == old_path:
+                self.path = new_path
+                return
+            old_depth = old_path.count(PATH_SEPARATOR) - 1
+            new_depth = new_path.count(PATH_SEPARATOR) - 1
+            Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+            if old_path:
+                # Moved: rewrite the prefix of every descendant in one UPDATE.
+                lower, upper = subtree_bounds(old_path)
+                Category.objects.filter(path__gte=lower, path__lt=upper).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (new_depth - old_depth),
+                )
+            self.path, self.depth = new_path, new_depth
+
+    @property
+    def ancestor_ids(self):
+        return [int(part) for part in self.path.split(PATH_SEPARATOR) if part][:-1]
+
+    def get_descendants(self, include_self=True):
+        lower, upper = subtree_bounds(self.path)
+        queryset = Category.objects.filter(path__gte=lower, path__lt=upper)
+        return queryset if include_self else queryset.exclude(pk=self.pk)
+
 
 class Attribute(models.Model):
     """ e.g., 'Size', 'Color', 'Weight', 'Material' """
@@ -11,4 +11,4 @@ class CategorySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'attributes', 'default_attributes'] # ✅ Add the new field
\ No newline at end of file
+        fields = ['id', 'name', 'parent', 'depth', 'path', 'attributes', 'default_attributes'] # ✅ Add the new field
\ No newline at end of file
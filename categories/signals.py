@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Category, Attribute
+from .cache import bump_version
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Attribute)
+@receiver(post_delete, sender=Attribute)
+def invalidate_category_schema(sender, **kwargs):
+    # Wait for the commit so no worker rebuilds the schema from half-written rows.
+    transaction.on_commit(bump_version)
+
+
+@receiver(m2m_changed, sender=Attribute.categories.through)
+def invalidate_on_attribute_links(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(bump_version)
@@ -1,3 +1,107 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from products.models import Product
+from users.models import Seller, SellerToken
+from .models import Attribute, Category
+
+
+class CategorySchemaETagTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        seller = Seller.objects.create_user(phone='9000000060', password='pass', name='Seller')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=seller).key}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name='Spices')
+
+    def fetch(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/api/categories/', **headers)
+
+    def test_matching_etag_gets_304(self):
+        response = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        revalidated = self.fetch(etag)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], etag)
+        self.assertFalse(revalidated.content)
+        self.assertEqual(self.fetch(f'"stale", {etag}').status_code, 304)
+        self.assertEqual(self.fetch('*').status_code, 304)
+        self.assertEqual(self.fetch('"stale"').status_code, 200)
+
+    def test_category_changes_change_the_etag(self):
+        etag = self.fetch()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Whole spices'
+            self.category.save()
+        response = self.fetch(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Whole spices', [category['name'] for category in response.data])
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Attribute.objects.create(name='Grade').categories.add(self.category)
+        self.assertEqual(self.fetch(etag).status_code, 200)
+
+        etag = self.fetch()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(self.fetch(etag).status_code, 200)
+
+
+class CategoryTreeTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food = Category.objects.create(name='Food')
+            self.spices = Category.objects.create(name='Spices', parent=self.food)
+            self.pepper = Category.objects.create(name='Pepper', parent=self.spices)
+            self.gifts = Category.objects.create(name='Gifts')
+        self.store = Seller.objects.create_user(phone='9000000061', password='pass', name='Seller').store_profile
+
+    def path(self, *categories):
+        return ''.join(f"{category.pk}/" for category in categories)
+
+    def move(self, category, parent):
+        with self.captureOnCommitCallbacks(execute=True):
+            category.parent = parent
+            category.save()
+
+    def listed(self, category):
+        response = self.client.get('/api/products/', {'category_tree': category.pk})
+        self.assertEqual(response.status_code, 200)
+        return sorted(product['name'] for product in response.data['results'])
+
+    def test_move_rewrites_descendant_paths(self):
+        self.assertEqual(self.pepper.path, self.path(self.food, self.spices, self.pepper))
+        self.move(self.spices, self.gifts)
+        self.pepper.refresh_from_db()
+        self.assertEqual(self.pepper.path, self.path(self.gifts, self.spices, self.pepper))
+        self.assertEqual(self.pepper.depth, 2)
+        self.move(self.spices, None)
+        self.pepper.refresh_from_db()
+        self.assertEqual(self.pepper.path, self.path(self.spices, self.pepper))
+        self.assertEqual(self.pepper.depth, 1)
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.path, self.path(self.food))
+
+    def test_cannot_move_under_own_descendant(self):
+        self.food.parent = self.pepper
+        with self.assertRaises(ValidationError):
+            self.food.save()
+        self.food.refresh_from_db()
+        self.assertIsNone(self.food.parent_id)
+
+    def test_filter_returns_whole_subtree(self):
+        for name, category in (('Rice', self.food), ('Turmeric', self.spices), ('Malabar', self.pepper), ('Basket', self.gifts)):
+            Product.objects.create(store=self.store, name=name, category=category, price=10, total_stock=5, online_stock=5)
+        self.assertEqual(self.listed(self.food), ['Malabar', 'Rice', 'Turmeric'])
+        self.assertEqual(self.listed(self.spices), ['Malabar', 'Turmeric'])
+        self.move(self.spices, self.gifts)
+        self.assertEqual(self.listed(self.food), ['Rice'])
+        self.assertEqual(self.listed(self.gifts), ['Basket', 'Malabar', 'Turmeric'])
+        response = self.client.get('/api/products/', {'category_tree': 999999})
+        self.assertEqual(response.data['results'], [])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import CategoryListView
+from .views import CategoryListView, CategoryBreadcrumbsView
 
 urlpatterns = [
     path('', CategoryListView.as_view(), name='category-list'),
+    path('<int:pk>/breadcrumbs/', CategoryBreadcrumbsView.as_view(), name='category-breadcrumbs'),
 ]
\ No newline at end of file
@@ -1,14 +1,41 @@
 from django.shortcuts import render
 
 # Create your views here.
-from rest_framework import generics, permissions
+from django.utils.http import parse_etags
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
 from .models import Category
 from .serializers import CategorySerializer
+from .cache import get_schema, get_category
 
 class CategoryListView(generics.ListAPIView):
     """
     Provides a list of all product categories and their specific attributes.
+
+    The schema is served from categories.cache and carries a strong ETag, so
+    dashboards can revalidate with If-None-Match and get a 304.
     """
     queryset = Category.objects.prefetch_related('attributes').all()
     serializer_class = CategorySerializer
-    permission_classes = [permissions.IsAuthenticated] # For sellers in the dashboard
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated] # For sellers in the dashboard
+
+    def list(self, request, *args, **kwargs):
+        data, etag = get_schema()
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+
+class CategoryBreadcrumbsView(generics.GenericAPIView):
+    """
+    Returns the ancestors of a category (root first) from the cached schema.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, pk=None):
+        entry = get_category(pk)
+        if entry is None:
+            return Response({'error': 'Category not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(entry['breadcrumbs'])
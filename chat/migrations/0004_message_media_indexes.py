@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_conversation_seller_fk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='audio',
+            field=models.FileField(blank=True, db_index=True, null=True, upload_to='chat_audio/'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='chat_images/'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='video',
+            field=models.FileField(blank=True, db_index=True, null=True, upload_to='chat_videos/'),
+        ),
+    ]
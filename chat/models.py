@@ -1,9 +1,8 @@
 # models.py
 from django.db import models
-from django.conf import settings
 
 class Conversation(models.Model):
-    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='seller_conversations')
+    seller = models.ForeignKey('users.Seller', on_delete=models.CASCADE, related_name='seller_conversations')
     buyer = models.ForeignKey('users.Buyer', on_delete=models.CASCADE, related_name='buyer_conversations')
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -25,9 +24,10 @@ class Message(models.Model):
     # Message content
     message_type = models.CharField(max_length=10, choices=MESSAGE_TYPES, default='text')
     text = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='chat_images/', blank=True, null=True)
-    video = models.FileField(upload_to='chat_videos/', blank=True, null=True)
-    audio = models.FileField(upload_to='chat_audio/', blank=True, null=True)
+    # Indexed for access checks on protected media, which look files up by name.
+    image = models.ImageField(upload_to='chat_images/', blank=True, null=True, db_index=True)
+    video = models.FileField(upload_to='chat_videos/', blank=True, null=True, db_index=True)
+    audio = models.FileField(upload_to='chat_audio/', blank=True, null=True, db_index=True)
     
     # File metadata
     file_name = models.CharField(max_length=255, blank=True, null=True)
@@ -0,0 +1,15 @@
+from django.db.models import Q
+
+from users.models import Buyer, Seller
+from .models import Message
+
+
+def can_access_media(user, name):
+    """True if `name` is attached to a message in one of `user`'s conversations."""
+    if isinstance(user, Buyer):
+        participant = Q(conversation__buyer=user)
+    elif isinstance(user, Seller):
+        participant = Q(conversation__seller=user)
+    else:
+        return False
+    return Message.objects.filter(Q(image=name) | Q(video=name) | Q(audio=name), participant).exists()
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Conversation, Message
 from users.models import Buyer, Seller
+from keralasellers.media import MediaURLField
 
 class BuyerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,9 +26,8 @@ class MessageSerializer(serializers.ModelSerializer):
     # Use the new SenderSerializer to represent the generic sender
     sender = SenderSerializer(read_only=True)
     
-    # These methods are a great way to provide full URLs
-    image_url = serializers.SerializerMethodField()
-    video_url = serializers.SerializerMethodField()
+    image_url = MediaURLField(source='image')
+    video_url = MediaURLField(source='video')
 
     class Meta:
         model = Message
@@ -42,18 +42,6 @@ class MessageSerializer(serializers.ModelSerializer):
             'video': {'write_only': True, 'required': False},
         }
 
-    def get_image_url(self, obj):
-        request = self.context.get('request')
-        if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url)
-        return None
-
-    def get_video_url(self, obj):
-        request = self.context.get('request')
-        if obj.video and hasattr(obj.video, 'url'):
-            return request.build_absolute_uri(obj.video.url)
-        return None
-
 class ConversationSerializer(serializers.ModelSerializer):
     buyer = BuyerSerializer(read_only=True)
     # You could also add 'last_message' here if needed
@@ -1,3 +1,50 @@
-from django.test import TestCase
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from users.models import Buyer, Seller, SellerToken
+from .models import Conversation, Message
+from .permissions import can_access_media
+
+
+class ChatMediaAccessTests(APITestCase):
+    def setUp(self):
+        self.seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        self.buyer = Buyer.objects.create(email='buyer@example.com')
+        conversation = Conversation.objects.create(seller=self.seller, buyer=self.buyer)
+        message = Message.objects.create(conversation=conversation, sender_id=self.buyer.id, sender_type='buyer', text='hi')
+        # Set the name directly; save() would read the file for its size.
+        Message.objects.filter(pk=message.pk).update(video='chat_videos/clip.mp4')
+
+    def test_only_participants_can_access(self):
+        other_seller = Seller.objects.create_user(phone='9000000002', password='pass', name='Other')
+        other_buyer = Buyer.objects.create(email='other@example.com')
+        self.assertTrue(can_access_media(self.seller, 'chat_videos/clip.mp4'))
+        self.assertTrue(can_access_media(self.buyer, 'chat_videos/clip.mp4'))
+        self.assertFalse(can_access_media(other_seller, 'chat_videos/clip.mp4'))
+        self.assertFalse(can_access_media(other_buyer, 'chat_videos/clip.mp4'))
+        self.assertFalse(can_access_media(self.seller, 'chat_videos/other.mp4'))
+        self.assertFalse(can_access_media(User(username='admin'), 'chat_videos/clip.mp4'))
+
+    def test_protected_media_view(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(MEDIA_ROOT=root):
+            (Path(root) / 'chat_videos').mkdir()
+            (Path(root) / 'chat_videos' / 'clip.mp4').write_bytes(b'0123456789')
+            self.assertEqual(self.client.get('/media/chat_videos/clip.mp4').status_code, 401)
+
+            self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=self.seller).key}")
+            response = self.client.get('/media/chat_videos/clip.mp4', HTTP_RANGE='bytes=2-5')
+            self.assertEqual((response.status_code, b''.join(response.streaming_content)), (206, b'2345'))
+
+            other = Seller.objects.create_user(phone='9000000002', password='pass', name='Other')
+            self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=other).key}")
+            self.assertEqual(self.client.get('/media/chat_videos/clip.mp4').status_code, 404)
+
+            # Staff accounts are plain auth Users, which no rule should choke on.
+            self.client.credentials()
+            self.client.force_authenticate(User.objects.create_user(username='admin', is_staff=True))
+            self.assertEqual(self.client.get('/media/chat_videos/clip.mp4').status_code, 404)
+            self.assertEqual(self.client.get('/media/product_transfers/products.csv').status_code, 404)
@@ -4,7 +4,6 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q
 from .models import Conversation, Message
 from .serializers import ConversationSerializer, MessageSerializer
 from users.models import Seller, Buyer
@@ -16,15 +15,11 @@ class ConversationListView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         
-        # Get conversations where user is the seller
-        seller_conversations = Conversation.objects.filter(seller=user)
-        
-        # Check if the current user is a Buyer instance
+        # Buyers and sellers are separate models, so each side only
+        # ever matches its own foreign key.
         if isinstance(user, Buyer):
-            buyer_conversations = Conversation.objects.filter(buyer=user)
-            return seller_conversations.union(buyer_conversations).order_by('-created_at')
-        else:
-            return seller_conversations.order_by('-created_at')
+            return Conversation.objects.filter(buyer=user).order_by('-created_at')
+        return Conversation.objects.filter(seller=user).order_by('-created_at')
 
 class MessageListView(generics.ListAPIView):
     serializer_class = MessageSerializer
@@ -39,8 +34,8 @@ class MessageListView(generics.ListAPIView):
         try:
             if isinstance(user, Buyer):
                 conversation = Conversation.objects.get(
-                    Q(id=conversation_id),
-                    Q(seller=user) | Q(buyer=user)
+                    id=conversation_id, 
+                    buyer=user
                 )
             else:
                 conversation = Conversation.objects.get(
@@ -70,15 +65,11 @@ class SendMessageView(APIView):
         try:
             if isinstance(user, Buyer):
                 conversation = Conversation.objects.get(
-                    Q(id=conversation_id),
-                    Q(seller=user) | Q(buyer=user)
+                    id=conversation_id, 
+                    buyer=user
                 )
-                if conversation.seller == user:
-                    sender_type = 'seller'
-                    sender_id = user.id
-                else:
-                    sender_type = 'buyer'
-                    sender_id = user.id
+                sender_type = 'buyer'
+                sender_id = user.id
             else:
                 conversation = Conversation.objects.get(
                     id=conversation_id, 
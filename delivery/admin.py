@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import StoreDeliverySLA
+
+
+@admin.register(StoreDeliverySLA)
+class StoreDeliverySLAAdmin(admin.ModelAdmin):
+    list_display = ('store', 'zone', 'min_days', 'max_days', 'available')
+    list_filter = ('zone', 'available')
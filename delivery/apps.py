@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class DeliveryConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'delivery'
+
+    def ready(self):
+        import delivery.signals
+        from .pincodes import get_index
+
+        # Load the pincode index with the app rather than on a buyer's first estimate.
+        get_index()
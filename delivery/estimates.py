@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import date, timedelta
+
+from django.conf import settings
+
+from . import pincodes
+from .geo import haversine_km
+from .models import StoreDeliverySLA, Zone
+
+Estimate = namedtuple('Estimate', ['zone', 'distance_km', 'min_days', 'max_days', 'deliverable'])
+
+
+def _config(name):
+    return settings.DELIVERY[name]
+
+
+def classify(origin, destination):
+    """
+    (zone, distance_km) between two pincodes: the first DELIVERY['ZONES']
+    entry whose radius covers the distance. Pincodes missing from the
+    dataset are NATIONAL with no distance.
+    """
+    origin, destination = pincodes.normalize(origin), pincodes.normalize(destination)
+    if origin is not None and origin == destination:
+        return Zone.LOCAL, 0.0
+    a, b = pincodes.lookup(origin), pincodes.lookup(destination)
+    if a is None or b is None:
+        return Zone.NATIONAL, None
+    distance = haversine_km(a.latitude, a.longitude, b.latitude, b.longitude)
+    for zone, radius, _, _ in _config('ZONES'):
+        if radius is None or distance <= radius:
+            return zone, distance
+    return Zone.NATIONAL, distance
+
+
+class EstimateCache:
+    """
+    Bounded LRU of estimates keyed by (store id, store pincode, buyer
+    pincode), so product and cart pages classify a pair and read its SLA
+    once. Entries expire after DELIVERY['CACHE_TTL'] so SLA edits made in
+    other workers show up; in this worker the signals drop a store's
+    entries straight away.
+    """
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, estimate):
+        maxsize = self.maxsize or _config('CACHE_SIZE')
+        expires = time.monotonic() + (self.ttl or _config('CACHE_TTL'))
+        with self._lock:
+            self._entries[key] = (expires, estimate)
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, store_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == store_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = EstimateCache()
+
+
+def _slas(store_ids):
+    slas = {}
+    for sla in StoreDeliverySLA.objects.filter(store_id__in=store_ids):
+        slas[sla.store_id, sla.zone] = sla
+    return slas
+
+
+def estimate_many(stores, pincode):
+    """
+    {store id: Estimate} for delivering from each store to `pincode`, with
+    one SLA query for all the stores not already cached. Stores without a
+    pincode are left out.
+    """
+    pincode = pincodes.normalize(pincode)
+    results, missing = {}, []
+    for store in stores:
+        if not store.pincode or store.pk in results:
+            continue
+        cached = cache.get((store.pk, store.pincode, pincode))
+        if cached is not None:
+            results[store.pk] = cached
+        else:
+            missing.append(store)
+    if missing:
+        defaults = {zone: (min_days, max_days) for zone, _, min_days, max_days in _config('ZONES')}
+        slas = _slas([store.pk for store in missing])
+        for store in missing:
+            zone, distance = classify(store.pincode, pincode)
+            sla = slas.get((store.pk, zone))
+            if sla is not None:
+                estimate = Estimate(zone, distance, sla.min_days, sla.max_days, sla.available)
+            else:
+                estimate = Estimate(zone, distance, *defaults[zone], True)
+            cache.set((store.pk, store.pincode, pincode), estimate)
+            results[store.pk] = estimate
+    return results
+
+
+def estimate(store, pincode):
+    """The Estimate for one store, or None when it has no pincode."""
+    return estimate_many([store], pincode).get(store.pk)
+
+
+def describe(store, estimate, today=None):
+    """
+    The response fields for an estimate. A store's free-text delivery time
+    (local for LOCAL/REGIONAL zones, national otherwise) still wins for the
+    `estimate` text, as it always has.
+    """
+    today = today or date.today()
+    is_local = estimate.zone != Zone.NATIONAL
+    earliest = today + timedelta(days=estimate.min_days)
+    latest = today + timedelta(days=estimate.max_days)
+    custom = store.delivery_time_local if is_local else store.delivery_time_national
+    if not estimate.deliverable:
+        text = 'This store does not deliver to your pincode.'
+    elif custom:
+        text = f"Around {custom}"
+    else:
+        text = f"By {latest.strftime('%A, %b %d')}"
+    return {
+        'estimate': text,
+        'is_local_delivery': is_local,
+        'store_location': store.pincode,
+        'deliverable': estimate.deliverable,
+        'zone': estimate.zone,
+        'distance_km': round(estimate.distance_km, 1) if estimate.distance_km is not None else None,
+        'min_days': estimate.min_days,
+        'max_days': estimate.max_days,
+        'earliest_date': earliest if estimate.deliverable else None,
+        'latest_date': latest if estimate.deliverable else None,
+    }
@@ -0,0 +1,73 @@
+import math
+from operator import itemgetter
+
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Stores are bucketed into a fixed grid of CELL_DEGREES squares (about
+# 11 km at this size) numbered row by row from the south-west corner, so a
+# radius search is a handful of integer range scans on an ordinary index.
+# Changing it means recomputing every StoreProfile.geo_cell.
+CELL_DEGREES = 0.1
+COLUMNS = round(360 / CELL_DEGREES)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _row(latitude):
+    return math.floor((min(max(latitude, -90), 90) + 90) / CELL_DEGREES)
+
+
+def _column(longitude):
+    return min(math.floor((min(max(longitude, -180), 180) + 180) / CELL_DEGREES), COLUMNS - 1)
+
+
+def cell_for(latitude, longitude):
+    """The grid cell holding a point, or None without coordinates."""
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * COLUMNS + _column(longitude)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(south, north, west, east) of the square around a circle."""
+    dlat = radius_km / KM_PER_DEGREE
+    dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, latitude + dlat, longitude - dlng, longitude + dlng
+
+
+def cell_ranges(latitude, longitude, radius_km):
+    """Inclusive (first, last) cell ranges covering the circle, one per grid row."""
+    south, north, west, east = bounding_box(latitude, longitude, radius_km)
+    first, last = _column(west), _column(east)
+    return [(row * COLUMNS + first, row * COLUMNS + last) for row in range(_row(south), _row(north) + 1)]
+
+
+def nearby(queryset, latitude, longitude, radius_km):
+    """
+    [(pk, distance_km)] for rows of `queryset` within `radius_km`, nearest
+    first. Only rows in the grid cells around the point (and inside its
+    bounding box) are read, as bare (pk, latitude, longitude) tuples, so
+    distances are computed for a few candidates rather than every store.
+    """
+    south, north, west, east = bounding_box(latitude, longitude, radius_km)
+    cells = Q()
+    for first, last in cell_ranges(latitude, longitude, radius_km):
+        cells |= Q(geo_cell__range=(first, last))
+    candidates = queryset.order_by().filter(
+        cells, latitude__range=(south, north), longitude__range=(west, east),
+    ).values_list('pk', 'latitude', 'longitude')
+    matches = []
+    for pk, lat, lng in candidates:
+        distance = haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius_km:
+            matches.append((pk, distance))
+    matches.sort(key=itemgetter(1, 0))
+    return matches
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('store', '0003_storeprofile_pincode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreDeliverySLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone', models.CharField(choices=[('LOCAL', 'Local'), ('REGIONAL', 'Regional'), ('NATIONAL', 'National')], max_length=10)),
+                ('min_days', models.PositiveSmallIntegerField()),
+                ('max_days', models.PositiveSmallIntegerField()),
+                ('available', models.BooleanField(default=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_slas', to='store.storeprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('store', 'zone'), name='unique_store_delivery_zone'), models.CheckConstraint(condition=models.Q(('min_days__lte', models.F('max_days'))), name='sla_min_days_lte_max_days')],
+            },
+        ),
+    ]
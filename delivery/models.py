@@ -0,0 +1,31 @@
+from django.db import models
+
+from store.models import StoreProfile
+
+
+class Zone(models.TextChoices):
+    LOCAL = 'LOCAL', 'Local'
+    REGIONAL = 'REGIONAL', 'Regional'
+    NATIONAL = 'NATIONAL', 'National'
+
+
+class StoreDeliverySLA(models.Model):
+    """
+    A store's own delivery promise for one zone, replacing the default
+    days from DELIVERY['ZONES']. A store that does not ship to a zone turns
+    `available` off.
+    """
+    store = models.ForeignKey(StoreProfile, on_delete=models.CASCADE, related_name='delivery_slas')
+    zone = models.CharField(max_length=10, choices=Zone.choices)
+    min_days = models.PositiveSmallIntegerField()
+    max_days = models.PositiveSmallIntegerField()
+    available = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['store', 'zone'], name='unique_store_delivery_zone'),
+            models.CheckConstraint(condition=models.Q(min_days__lte=models.F('max_days')), name='sla_min_days_lte_max_days'),
+        ]
+
+    def __str__(self):
+        return f"{self.store} {self.get_zone_display()}: {self.min_days}-{self.max_days} days"
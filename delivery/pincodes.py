@@ -0,0 +1,106 @@
+import csv
+import threading
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+from django.conf import settings
+
+Place = namedtuple('Place', ['pincode', 'district', 'state', 'latitude', 'longitude'])
+
+
+def normalize(pincode):
+    """The pincode as a 6-digit string, or None if it is not a valid Indian pincode."""
+    pincode = str(pincode or '').replace(' ', '')
+    if len(pincode) != 6 or not pincode.isdecimal() or not pincode.isascii() or pincode[0] == '0':
+        return None
+    return pincode
+
+
+class PincodeIndex:
+    """
+    Pincode -> place lookups over the bundled dataset, held in flat arrays
+    rather than one object per row.
+
+    Rows are keyed by pincode prefix: 2 digits (a postal circle), 3 (a
+    sorting district) and up to the full 6 digits for exact entries, with
+    the longest matching prefix winning. Prefixes of up to 3 digits fill a
+    1000-slot table, so most lookups are one array read; longer prefixes
+    live in a sorted array searched with bisect.
+    """
+
+    def __init__(self, rows):
+        self.districts = []
+        self.states = []
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.slots = array('l', [-1]) * 1000
+        long_rows = []
+        # Shorter prefixes first, so more specific rows overwrite them.
+        for prefix, district, state, latitude, longitude in sorted(rows, key=lambda row: len(row[0])):
+            row = len(self.districts)
+            self.districts.append(district)
+            self.states.append(state)
+            self.latitudes.append(float(latitude))
+            self.longitudes.append(float(longitude))
+            if len(prefix) <= 3:
+                width = 10 ** (3 - len(prefix))
+                start = int(prefix) * width
+                for slot in range(start, start + width):
+                    self.slots[slot] = row
+            else:
+                width = 10 ** (6 - len(prefix))
+                long_rows.append((int(prefix) * width, width, row))
+        long_rows.sort()
+        self.long_starts = array('l', (start for start, _, _ in long_rows))
+        self.long_widths = array('l', (width for _, width, _ in long_rows))
+        self.long_rows = array('l', (row for _, _, row in long_rows))
+        self.max_width = max(self.long_widths, default=0)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='', encoding='utf-8') as fileobj:
+            reader = csv.reader(fileobj)
+            next(reader)  # header
+            return cls([row for row in reader if row])
+
+    def __len__(self):
+        return len(self.districts)
+
+    def _row(self, code):
+        # Nested ranges start later than the ones containing them, so the
+        # first hit walking back from the bisect point is the most specific.
+        position = bisect_right(self.long_starts, code) - 1
+        while position >= 0 and code - self.long_starts[position] < self.max_width:
+            if code < self.long_starts[position] + self.long_widths[position]:
+                return self.long_rows[position]
+            position -= 1
+        return self.slots[code // 1000]
+
+    def lookup(self, pincode):
+        """The Place for `pincode`, or None if it is invalid or not covered."""
+        pincode = normalize(pincode)
+        if pincode is None:
+            return None
+        row = self._row(int(pincode))
+        if row < 0:
+            return None
+        return Place(pincode, self.districts[row], self.states[row], self.latitudes[row], self.longitudes[row])
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The process-wide index, loaded from DELIVERY['PINCODE_DATA'] on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PincodeIndex.from_csv(settings.DELIVERY['PINCODE_DATA'])
+    return _index
+
+
+def lookup(pincode):
+    return get_index().lookup(pincode)
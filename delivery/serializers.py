@@ -0,0 +1,32 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import StoreDeliverySLA
+from . import pincodes
+
+
+class StoreDeliverySLASerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StoreDeliverySLA
+        fields = ['zone', 'min_days', 'max_days', 'available']
+
+    def validate(self, attrs):
+        if attrs['min_days'] > attrs['max_days']:
+            raise serializers.ValidationError({'max_days': "Must be at least min_days."})
+        return attrs
+
+
+class PincodeField(serializers.CharField):
+    def to_internal_value(self, data):
+        pincode = pincodes.normalize(super().to_internal_value(data))
+        if pincode is None:
+            raise serializers.ValidationError("Please enter a valid 6-digit pincode.")
+        return pincode
+
+
+class BatchDeliveryEstimateSerializer(serializers.Serializer):
+    pincode = PincodeField()
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        max_length=settings.DELIVERY['BATCH_MAX_ITEMS'],
+    )
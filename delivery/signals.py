@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from store.models import StoreProfile
+from .estimates import cache
+from .models import StoreDeliverySLA
+
+
+@receiver(post_save, sender=StoreProfile)
+@receiver(post_delete, sender=StoreProfile)
+def evict_store_estimates(sender, instance, **kwargs):
+    cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=StoreDeliverySLA)
+@receiver(post_delete, sender=StoreDeliverySLA)
+def evict_sla_estimates(sender, instance, **kwargs):
+    cache.invalidate(instance.store_id)
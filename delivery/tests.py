@@ -0,0 +1,74 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from products.models import Product
+from store.models import StoreProfile
+from users.models import Seller, SellerToken
+from . import estimates, pincodes
+from .models import StoreDeliverySLA, Zone
+
+
+class PincodeIndexTests(SimpleTestCase):
+    def test_longest_prefix_wins(self):
+        index = pincodes.PincodeIndex([
+            ('67', 'Circle', 'Kerala', '10', '76'),
+            ('673', 'Kozhikode', 'Kerala', '11.25', '75.78'),
+            ('6731', 'Wayanad', 'Kerala', '11.68', '76.13'),
+            ('673121', 'Kalpetta', 'Kerala', '11.61', '76.08'),
+        ])
+        self.assertEqual(index.lookup('673121').district, 'Kalpetta')
+        self.assertEqual(index.lookup('673122').district, 'Wayanad')
+        self.assertEqual(index.lookup(' 673 001').district, 'Kozhikode')
+        self.assertEqual(index.lookup('679101').district, 'Circle')
+        for pincode in ('560001', '67300', '012345', 'abcdef', None):
+            self.assertIsNone(index.lookup(pincode))
+
+    def test_bundled_dataset_zones(self):
+        self.assertEqual(estimates.classify('682001', '682001'), (Zone.LOCAL, 0.0))
+        self.assertEqual(estimates.classify('682001', '683101')[0], Zone.LOCAL)        # Kochi -> Aluva
+        self.assertEqual(estimates.classify('682001', '695001')[0], Zone.REGIONAL)     # Kochi -> Thiruvananthapuram
+        self.assertEqual(estimates.classify('682001', '110001')[0], Zone.NATIONAL)     # Kochi -> Delhi
+        self.assertEqual(estimates.classify('682001', '999999'), (Zone.NATIONAL, None))
+
+
+class DeliveryEstimateTests(APITestCase):
+    def setUp(self):
+        estimates.cache.clear()
+        self.seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        self.store = self.seller.store_profile
+        StoreProfile.objects.filter(pk=self.store.pk).update(pincode='682001')
+        self.product = Product.objects.create(store=self.store, name='Pepper', price=10, total_stock=5, online_stock=5)
+
+    def test_store_sla_overrides_defaults(self):
+        response = self.client.get(f'/api/products/{self.product.pk}/estimate-delivery/', {'pincode': '683101'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['zone'], response.data['min_days'], response.data['max_days']), ('LOCAL', 1, 2))
+        self.assertTrue(response.data['is_local_delivery'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=self.seller).key}")
+        response = self.client.put('/api/store/delivery-sla/', [
+            {'zone': 'LOCAL', 'min_days': 0, 'max_days': 1},
+            {'zone': 'NATIONAL', 'min_days': 5, 'max_days': 9, 'available': False},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StoreDeliverySLA.objects.filter(store=self.store).count(), 2)
+
+        response = self.client.get(f'/api/products/{self.product.pk}/estimate-delivery/', {'pincode': '683101'})
+        self.assertEqual((response.data['min_days'], response.data['max_days']), (0, 1))
+        response = self.client.get(f'/api/products/{self.product.pk}/estimate-delivery/', {'pincode': '110001'})
+        self.assertFalse(response.data['deliverable'])
+        self.assertEqual(self.client.get(f'/api/products/{self.product.pk}/estimate-delivery/', {'pincode': '6830'}).status_code, 400)
+
+    def test_batch_estimate(self):
+        other = Product.objects.create(store=self.store, name='Tea', price=10, total_stock=5, online_stock=5)
+        payload = {'pincode': '695001', 'product_ids': [self.product.pk, other.pk, self.product.pk, 999999]}
+        with self.assertNumQueries(2):  # products, SLAs
+            response = self.client.post('/api/products/estimate-delivery/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['district'], response.data['state']), ('Thiruvananthapuram', 'Kerala'))
+        results = response.data['results']
+        self.assertEqual([result['product_id'] for result in results], [self.product.pk, other.pk, 999999])
+        self.assertEqual({results[0]['zone'], results[1]['zone']}, {'REGIONAL'})
+        self.assertEqual(results[2]['error'], 'Product not found.')
+        with self.assertNumQueries(1):  # cached estimates: products only
+            self.client.post('/api/products/estimate-delivery/', payload, format='json')
@@ -0,0 +1,37 @@
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.views import IsSeller
+from .estimates import cache
+from .models import StoreDeliverySLA
+from .serializers import StoreDeliverySLASerializer
+
+
+class StoreDeliverySLAView(APIView):
+    """
+    A seller's per-zone delivery promises. PUT replaces the whole set;
+    zones left out fall back to the DELIVERY['ZONES'] defaults.
+    """
+    permission_classes = [IsSeller]
+
+    def get(self, request):
+        slas = StoreDeliverySLA.objects.filter(store__seller=request.user).order_by('zone')
+        return Response(StoreDeliverySLASerializer(slas, many=True).data)
+
+    def put(self, request):
+        serializer = StoreDeliverySLASerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        zones = [item['zone'] for item in serializer.validated_data]
+        if len(zones) != len(set(zones)):
+            return Response({'error': 'Each zone can only be listed once.'}, status=status.HTTP_400_BAD_REQUEST)
+        store = request.user.store_profile
+        with transaction.atomic():
+            StoreDeliverySLA.objects.filter(store=store).delete()
+            StoreDeliverySLA.objects.bulk_create(
+                StoreDeliverySLA(store=store, **item) for item in serializer.validated_data
+            )
+        # bulk_create sends no post_save.
+        cache.invalidate(store.pk)
+        return self.get(request)
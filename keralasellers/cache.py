@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.exceptions import ImproperlyConfigured
+
+MISSING = object()
+COUNTERS = ('hits', 'misses', 'computes', 'waits')
+
+# Backends whose add() is a single atomic operation. FileBasedCache and
+# DatabaseCache check and then write, so two workers can both "add" a key.
+# LocMemCache is atomic, but only within one process.
+ATOMIC_ADD_BACKENDS = {
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class LockTimeout(Exception):
+    pass
+
+
+def _config(name):
+    return settings.CACHE_FRAMEWORK[name]
+
+
+def _count(namespace, counter, amount=1):
+    with _stats_lock:
+        _stats.setdefault(namespace, Counter())[counter] += amount
+
+
+def stats():
+    """Per-namespace hit/miss/compute/wait counts for this process."""
+    with _stats_lock:
+        return {name: {counter: counts[counter] for counter in COUNTERS} for name, counts in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class Namespace:
+    """
+    A slice of the shared cache owned by one feature. Keys are prefixed with
+    the namespace name, and `version` is passed to Django's cache so bumping
+    it in code orphans every entry written in an older format.
+    """
+
+    def __init__(self, name, version=1, timeout=None, alias='default'):
+        self.name = name
+        self.version = version
+        self.timeout = timeout
+        self.alias = alias
+
+    def __repr__(self):
+        return f"<Namespace {self.name} v{self.version}>"
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def atomic_add(self):
+        backend = type(self.cache)
+        return f"{backend.__module__}.{backend.__qualname__}" in ATOMIC_ADD_BACKENDS
+
+    def key(self, *parts):
+        return ':'.join([self.name, *map(str, parts)])
+
+    def _timeout(self, timeout):
+        return self.timeout if timeout is None else timeout
+
+    def get(self, key, default=None):
+        return self.cache.get(self.key(key), default, version=self.version)
+
+    def get_many(self, keys):
+        found = self.cache.get_many([self.key(key) for key in keys], version=self.version)
+        return {key: found[self.key(key)] for key in keys if self.key(key) in found}
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(self.key(key), value, self._timeout(timeout), version=self.version)
+
+    def add(self, key, value, timeout=None):
+        return self.cache.add(self.key(key), value, self._timeout(timeout), version=self.version)
+
+    def incr(self, key, delta=1):
+        return self.cache.incr(self.key(key), delta, version=self.version)
+
+    def delete(self, key):
+        self.cache.delete(self.key(key), version=self.version)
+
+    def delete_many(self, keys):
+        self.cache.delete_many([self.key(key) for key in keys], version=self.version)
+
+    @contextmanager
+    def lock(self, key, timeout=None, wait=None):
+        """
+        A cross-worker mutex on `key`, built on cache.add. Only backends in
+        ATOMIC_ADD_BACKENDS can hold one; others raise ImproperlyConfigured.
+        Raises LockTimeout if it cannot be taken within `wait` seconds.
+        `timeout` bounds how long a crashed holder can block others.
+        """
+        if not self.atomic_add:
+            raise ImproperlyConfigured(f"The '{self.alias}' cache has no atomic add(); use Redis for locks.")
+        timeout = timeout or _config('LOCK_TIMEOUT')
+        wait = _config('LOCK_TIMEOUT') if wait is None else wait
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + wait
+        while not self.add(lock_key, 1, timeout):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(self.key(key))
+            time.sleep(_config('LOCK_POLL_INTERVAL'))
+        try:
+            yield
+        finally:
+            self.delete(lock_key)
+
+    def get_or_compute(self, key, compute, timeout=None):
+        """
+        Return the cached value for `key`, calling `compute()` on a miss.
+
+        Only one caller across all workers computes a missing key; the others
+        poll for its result (single flight), so a hot key expiring does not
+        send every request to the database at once. If the computing worker
+        takes longer than LOCK_TIMEOUT, waiters compute for themselves.
+        `timeout` may be a callable that receives the value.
+
+        On a backend without an atomic add (see ATOMIC_ADD_BACKENDS) two
+        workers may occasionally both compute; values must be safe to
+        compute twice.
+        """
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            _count(self.name, 'hits')
+            return value
+        _count(self.name, 'misses')
+
+        lock_key = f"{key}:lock"
+        lock_timeout = _config('LOCK_TIMEOUT')
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            if self.add(lock_key, 1, lock_timeout):
+                try:
+                    value = self.get(key, MISSING)
+                    if value is MISSING:
+                        value = self._compute(key, compute, timeout)
+                    return value
+                finally:
+                    self.delete(lock_key)
+            _count(self.name, 'waits')
+            time.sleep(_config('LOCK_POLL_INTERVAL'))
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                return value
+        return self._compute(key, compute, timeout)
+
+    def _compute(self, key, compute, timeout):
+        value = compute()
+        _count(self.name, 'computes')
+        if callable(timeout):
+            timeout = timeout(value)
+        self.set(key, value, timeout)
+        return value
+
+
+class FileCache(FileBasedCache):
+    """
+    FileBasedCache without random culling. Django's version lists the whole
+    cache directory on every set() and, past MAX_ENTRIES, deletes randomly
+    chosen live entries. This one only removes expired files, at most once
+    every OPTIONS['CULL_INTERVAL'] seconds per process.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_interval = params.get('OPTIONS', {}).get('CULL_INTERVAL', 300)
+        self._next_cull = 0.0
+        self._cull_lock = threading.Lock()
+
+    def _cull(self):
+        now = time.monotonic()
+        with self._cull_lock:
+            if now < self._next_cull:
+                return
+            self._next_cull = now + self._cull_interval
+        for fname in self._list_cache_files():
+            try:
+                with open(fname, 'rb') as f:
+                    self._is_expired(f)  # deletes the file if it has expired
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,222 @@
+import gzip
+import threading
+import time
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from .cache import Namespace
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip always works.
+    brotli = None
+
+COUNTERS = ('responses', 'cache_hits', 'bytes_in', 'bytes_out', 'cpu_seconds')
+
+compressed_cache = Namespace('compressed')
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _config(name):
+    return settings.COMPRESSION[name]
+
+
+def _count(encoding, **amounts):
+    with _stats_lock:
+        _stats.setdefault(encoding, Counter()).update(amounts)
+
+
+def stats():
+    """Per-encoding totals for this process: responses, bytes in/out and CPU seconds spent."""
+    with _stats_lock:
+        return {encoding: {name: counts[name] for name in COUNTERS} for encoding, counts in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ==============================================================================
+# ENCODINGS
+# ==============================================================================
+def available():
+    """Supported content codings, most preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """The best coding we support from an Accept-Encoding header, or None."""
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip().lower()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    best, best_weight = None, 0.0
+    for coding in available():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(encoding, body):
+    if encoding == 'br':
+        return brotli.compress(body, quality=_config('BROTLI_QUALITY'))
+    # mtime=0 keeps the output identical for identical input, so cached
+    # variants and ETags stay stable.
+    return gzip.compress(body, compresslevel=_config('GZIP_LEVEL'), mtime=0)
+
+
+class _StreamCompressor:
+    """Compresses a stream chunk by chunk, flushing each so clients see data as it is produced."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=_config('BROTLI_QUALITY'))
+        else:
+            self.compressor = zlib.compressobj(_config('GZIP_LEVEL'), zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        start = time.thread_time()
+        if self.encoding == 'br':
+            out = self.compressor.process(data) + self.compressor.flush()
+        else:
+            out = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        _count(self.encoding, bytes_in=len(data), bytes_out=len(out), cpu_seconds=time.thread_time() - start)
+        return out
+
+    def finish(self):
+        out = self.compressor.finish() if self.encoding == 'br' else self.compressor.flush()
+        _count(self.encoding, responses=1, bytes_out=len(out))
+        return out
+
+    def sync(self, chunks):
+        for data in chunks:
+            out = self.chunk(data)
+            if out:
+                yield out
+        yield self.finish()
+
+    async def async_(self, chunks):
+        async for data in chunks:
+            out = self.chunk(data)
+            if out:
+                yield out
+        yield self.finish()
+
+
+# ==============================================================================
+# RESPONSES
+# ==============================================================================
+def cache_variants(response, key, timeout=None):
+    """
+    Let the middleware keep this response's compressed bodies in the cache
+    under `key`, so a hot cached page is compressed once rather than per
+    request. `key` should identify the cached content (e.g. include its
+    generation); the body checksum is added, so a stale key can never
+    serve a different body.
+    """
+    response.compression_cache_key = key
+    response.compression_cache_timeout = timeout
+    return response
+
+
+def _eligible(response):
+    if response.has_header('Content-Encoding') or response.status_code == 206:
+        return False
+    # Ranged and offloaded (X-Accel-Redirect/X-Sendfile) file responses
+    # address the raw bytes.
+    if response.get('Accept-Ranges') == 'bytes' or response.has_header('X-Accel-Redirect') or response.has_header('X-Sendfile'):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return any(content_type.startswith(prefix) for prefix in _config('CONTENT_TYPES'))
+
+
+def _weaken_etag(response):
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+
+
+def _compressed_body(response, encoding, body):
+    key = getattr(response, 'compression_cache_key', None)
+    if key is not None:
+        variant = f"{key}:{encoding}:{zlib.crc32(body):08x}:{len(body)}"
+        cached = compressed_cache.get(variant)
+        if cached is not None:
+            _count(encoding, responses=1, cache_hits=1, bytes_in=len(body), bytes_out=len(cached))
+            return cached
+    start = time.thread_time()
+    compressed = compress(encoding, body)
+    _count(encoding, responses=1, bytes_in=len(body), bytes_out=len(compressed),
+           cpu_seconds=time.thread_time() - start)
+    if key is not None:
+        timeout = getattr(response, 'compression_cache_timeout', None)
+        compressed_cache.set(variant, compressed, timeout or _config('CACHE_TIMEOUT'))
+    return compressed
+
+
+def compress_response(request, response):
+    if not _eligible(response):
+        return response
+    if response.streaming:
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressor = _StreamCompressor(encoding)
+        if response.is_async:
+            response.streaming_content = compressor.async_(response.streaming_content)
+        else:
+            response.streaming_content = compressor.sync(response.streaming_content)
+        del response.headers['Content-Length']
+    else:
+        body = response.content
+        if len(body) < _config('MIN_SIZE'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = _compressed_body(response, encoding, body)
+        if len(compressed) >= len(body):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+    _weaken_etag(response)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli response compression negotiated from Accept-Encoding.
+    Bodies under COMPRESSION['MIN_SIZE'] are left alone, streaming
+    responses are compressed chunk by chunk, and responses marked with
+    cache_variants() reuse cached compressed bodies.
+    """
+
+    def __init__(self, get_response):
+        if not _config('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compress_response(request, self.get_response(request))
@@ -0,0 +1,279 @@
+import mimetypes
+import os
+import posixpath
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.encoding import filepath_to_uri
+from django.utils.http import content_disposition_header, http_date
+from django.utils.module_loading import import_string
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.views import APIView
+
+SIGNATURE_SALT = 'keralasellers.media'
+
+
+def _config(name):
+    return settings.MEDIA_DELIVERY[name]
+
+
+# ==============================================================================
+# SIGNED URLS
+# ==============================================================================
+def signature(name, expires):
+    return salted_hmac(SIGNATURE_SALT, f"{name}:{expires}").hexdigest()[:32]
+
+
+def is_protected(name):
+    return name.startswith(tuple(_config('PROTECTED')))
+
+
+def needs_signature(name):
+    return _config('SIGNED') and name.startswith(tuple(_config('SIGNED_PREFIXES')))
+
+
+def verify(name, expires, sig):
+    """True if `sig` was issued for `name` and `expires` has not passed."""
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    return expires > time.time() and constant_time_compare(signature(name, expires), sig or '')
+
+
+def _expiry():
+    # Rounded up to a whole TTL window so a URL stays the same for a while
+    # and responses that embed it (cached storefront pages) stay cacheable.
+    ttl = _config('SIGNATURE_TTL')
+    return (int(time.time()) // ttl + 2) * ttl
+
+
+# ==============================================================================
+# RESOLVER
+# ==============================================================================
+class MediaURLs:
+    """
+    Builds absolute media URLs with the prefix worked out once: the CDN
+    base URL from MEDIA_DELIVERY['BASE_URL'] when set, otherwise the
+    request's scheme and host in front of MEDIA_URL. Without either, URLs
+    are site-relative.
+    """
+
+    def __init__(self, request=None, storage=None):
+        self.storage = storage or default_storage
+        host = request.build_absolute_uri('/')[:-1] if request is not None else ''
+        # Protected files are only ever fetched through ProtectedMediaView on
+        # this site, never from the CDN.
+        self.protected_base = host + settings.MEDIA_URL
+        base = _config('BASE_URL')
+        if base:
+            self.base = base.rstrip('/') + '/'
+        elif isinstance(self.storage, FileSystemStorage):
+            self.base = host + self.storage.base_url
+        else:
+            # Remote storages build their own absolute URLs.
+            self.base = None
+        self.expires = None
+
+    def __call__(self, name):
+        name = getattr(name, 'name', name)
+        if not name:
+            return None
+        base = self.protected_base if is_protected(name) else self.base
+        if base is not None and '..' not in name:
+            url = base + filepath_to_uri(name).lstrip('/')
+        else:
+            url = self.storage.url(name)
+        if needs_signature(name):
+            if self.expires is None:
+                self.expires = _expiry()
+            url += '?' + urlencode({'expires': self.expires, 'signature': signature(name, self.expires)})
+        return url
+
+
+def for_request(request, storage=None):
+    """The resolver for `request`, created on first use and kept on the request."""
+    if request is None:
+        return MediaURLs(None, storage)
+    if storage is not None and storage is not default_storage:
+        return MediaURLs(request, storage)
+    resolver = getattr(request, '_media_urls', None)
+    if resolver is None:
+        resolver = request._media_urls = MediaURLs(request)
+    return resolver
+
+
+class MediaURLField(serializers.ReadOnlyField):
+    """Read-only absolute URL for a FileField, e.g. `MediaURLField(source='image')`."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return for_request(self.context.get('request'), value.storage)(value.name)
+
+
+# ==============================================================================
+# PROTECTED FILES
+# ==============================================================================
+class _FileRange:
+    """The `length` bytes of an open file from its current position."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # With Content-Length set, gunicorn's sendfile() sends exactly the
+        # range from the file's current offset.
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _byte_range(header, size):
+    """
+    (start, end), inclusive, for a single `bytes=` range; None to send the
+    whole file (no header, a malformed one, or several ranges). Raises
+    ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash or not (first or last) or not (first or '0').isdecimal() or not (last or '0').isdecimal():
+        return None
+    if not first:
+        # "bytes=-500": the last 500 bytes.
+        if not int(last) or not size:
+            raise ValueError
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def _stat(file, name, storage):
+    try:
+        stat = os.fstat(file.fileno())
+        return stat.st_size, int(stat.st_mtime)
+    except (AttributeError, OSError, ValueError):
+        # Remote storages have no file descriptor.
+        return storage.size(name), int(storage.get_modified_time(name).timestamp())
+
+
+def _offload(name, storage, as_attachment):
+    # nginx keeps the Content-Type and Content-Disposition given here.
+    response = HttpResponse(content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+    if _config('OFFLOAD') == 'x-accel-redirect':
+        response.headers['X-Accel-Redirect'] = _config('ACCEL_PREFIX').rstrip('/') + '/' + filepath_to_uri(name)
+    else:
+        response.headers['X-Sendfile'] = storage.path(name)
+    if as_attachment:
+        response.headers['Content-Disposition'] = content_disposition_header(True, posixpath.basename(name))
+    return response
+
+
+def _file_headers(response, etag, modified):
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(modified)
+    patch_cache_control(response, private=True)
+    return response
+
+
+def serve(request, name, storage=None, as_attachment=False):
+    """
+    Send the stored file `name` once access has been checked.
+
+    With MEDIA_DELIVERY['OFFLOAD'] set and files on local disk, the front
+    server does the transfer (nginx X-Accel-Redirect, Apache/lighttpd
+    X-Sendfile) and handles ranges and caching itself. Otherwise the file is
+    streamed from here with single byte-range (206) and conditional (304)
+    support, so players can seek without downloading the whole file; WSGI
+    servers that provide wsgi.file_wrapper send it with sendfile().
+    """
+    storage = storage or default_storage
+    if _config('OFFLOAD') and isinstance(storage, FileSystemStorage):
+        return _offload(name, storage, as_attachment)
+    try:
+        file = storage.open(name, 'rb')
+    except FileNotFoundError:
+        raise Http404
+    size, modified = _stat(file, name, storage)
+    etag = f'"{size:x}-{modified:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is not None:
+        file.close()
+        return _file_headers(response, etag, modified)
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if 'Range' in request.headers and (not if_range or if_range in (etag, http_date(modified))):
+        try:
+            byte_range = _byte_range(request.headers['Range'], size)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return _file_headers(response, etag, modified)
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=as_attachment)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(_FileRange(file, end - start + 1), status=206, as_attachment=as_attachment)
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response.headers['Content-Length'] = str(end - start + 1)
+    return _file_headers(response, etag, modified)
+
+
+def _access_rule(name):
+    for prefix, rule in _config('PROTECTED').items():
+        if name.startswith(prefix):
+            return import_string(rule)
+    return None
+
+
+class ProtectedMediaView(APIView):
+    """
+    Serves files under MEDIA_DELIVERY['PROTECTED'] prefixes. A request is
+    allowed with a valid signed URL (see MediaURLs), which is how <video>
+    and <img> tags fetch them, or when the prefix's rule, called as
+    rule(user, name), passes for the authenticated user. The user can be a
+    Seller, a Buyer or a Django admin User, so rules check its type before
+    filtering on it. Anything else gets a 404 so file names do not leak.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def perform_authentication(self, request):
+        # Deferred: a signed URL is enough on its own, even alongside a
+        # stale token.
+        pass
+
+    def get(self, request, name):
+        rule = _access_rule(name)
+        if rule is None or posixpath.normpath(name) != name or name.startswith('/'):
+            raise Http404
+        if not verify(name, request.query_params.get('expires'), request.query_params.get('signature')):
+            if not request.user or not request.user.is_authenticated:
+                raise NotAuthenticated
+            if not rule(request.user, name):
+                raise Http404
+        return serve(request, name)
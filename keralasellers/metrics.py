@@ -0,0 +1,276 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from .cache import stats as cache_stats
+from .compression import stats as compression_stats
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Each thread records into its own shard, so the request path never takes a
+# lock; shards are only merged when /metrics is scraped or flushed to disk.
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+_worker_file = None
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _config(name):
+    return settings.METRICS[name]
+
+
+class _Series:
+    __slots__ = ('buckets', 'duration', 'count', 'queries', 'bytes', 'statuses')
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.duration = 0.0
+        self.count = 0
+        self.queries = 0
+        self.bytes = 0
+        self.statuses = {}
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = {}
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def observe(method, route, status_code, duration, queries, size):
+    """Record one finished request for (method, route)."""
+    buckets = _config('BUCKETS')
+    shard = _shard()
+    series = shard.get((method, route))
+    if series is None:
+        series = shard[(method, route)] = _Series(len(buckets) + 1)
+    series.buckets[bisect_left(buckets, duration)] += 1
+    series.duration += duration
+    series.count += 1
+    series.queries += queries
+    series.bytes += size
+    series.statuses[status_code] = series.statuses.get(status_code, 0) + 1
+
+
+def snapshot():
+    """This process's totals as a JSON-friendly dict keyed by 'METHOD route'."""
+    merged = {}
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        for (method, route), series in list(shard.items()):
+            entry = merged.setdefault(f"{method} {route}", {
+                'buckets': [0] * len(series.buckets), 'duration': 0.0, 'count': 0,
+                'queries': 0, 'bytes': 0, 'statuses': {},
+            })
+            _add(entry, {
+                'buckets': series.buckets, 'duration': series.duration, 'count': series.count,
+                'queries': series.queries, 'bytes': series.bytes, 'statuses': dict(series.statuses),
+            })
+    return {'requests': merged, 'cache': cache_stats(), 'compression': compression_stats()}
+
+
+def _add(entry, other):
+    entry['buckets'] = [a + b for a, b in zip(entry['buckets'], other['buckets'])]
+    for name in ('duration', 'count', 'queries', 'bytes'):
+        entry[name] += other[name]
+    for status, count in other['statuses'].items():
+        entry['statuses'][str(status)] = entry['statuses'].get(str(status), 0) + count
+
+
+def reset():
+    with _shards_lock:
+        for shard in _shards:
+            shard.clear()
+
+
+# ==============================================================================
+# CROSS-WORKER AGGREGATION
+# ==============================================================================
+def flush():
+    """
+    Write this process's totals to METRICS['DIR'] so any worker can serve
+    the sum for all of them. Each process owns one file, replaced atomically.
+    """
+    global _worker_file, _last_flush
+    directory = _config('DIR')
+    if not directory:
+        return
+    with _flush_lock:
+        if _worker_file is None:
+            _worker_file = Path(directory) / f"worker-{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+            _worker_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _worker_file.with_suffix('.tmp')
+        tmp.write_text(json.dumps(snapshot()))
+        os.replace(tmp, _worker_file)
+        _last_flush = time.monotonic()
+
+
+def _maybe_flush():
+    if _config('DIR') and time.monotonic() - _last_flush >= _config('FLUSH_INTERVAL'):
+        flush()
+
+
+def collect():
+    """Totals across every worker that has flushed, plus this one live."""
+    local = snapshot()
+    directory = _config('DIR')
+    if not directory:
+        return local
+    totals = {'requests': {}, 'cache': {}, 'compression': {}}
+    snapshots = [local]
+    for path in Path(directory).glob('worker-*.json'):
+        if path == _worker_file:
+            continue
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    for data in snapshots:
+        for key, entry in data['requests'].items():
+            target = totals['requests'].setdefault(key, {
+                'buckets': [0] * len(entry['buckets']), 'duration': 0.0, 'count': 0,
+                'queries': 0, 'bytes': 0, 'statuses': {},
+            })
+            _add(target, entry)
+        for section in ('cache', 'compression'):
+            for label, counts in data.get(section, {}).items():
+                target = totals[section].setdefault(label, {})
+                for name, count in counts.items():
+                    target[name] = target.get(name, 0) + count
+    return totals
+
+
+# ==============================================================================
+# PROMETHEUS EXPOSITION
+# ==============================================================================
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render(data):
+    buckets = _config('BUCKETS')
+    lines = [
+        '# HELP http_request_duration_seconds Request latency by route.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    requests = sorted(data['requests'].items())
+    for key, entry in requests:
+        method, route = key.split(' ', 1)
+        cumulative = 0
+        for bound, count in zip([*buckets, '+Inf'], entry['buckets']):
+            cumulative += count
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}")
+        lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {entry['duration']}")
+        lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {entry['count']}")
+    for name, field, help_text in (
+        ('http_db_queries_total', 'queries', 'Database queries run by requests to the route.'),
+        ('http_response_bytes_total', 'bytes', 'Response body bytes sent by the route.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for key, entry in requests:
+            method, route = key.split(' ', 1)
+            lines.append(f"{name}{_labels(method=method, route=route)} {entry[field]}")
+    lines += ['# HELP http_responses_total Responses by route and status.', '# TYPE http_responses_total counter']
+    for key, entry in requests:
+        method, route = key.split(' ', 1)
+        for status, count in sorted(entry['statuses'].items()):
+            lines.append(f"http_responses_total{_labels(method=method, route=route, status=status)} {count}")
+    lines += ['# HELP cache_operations_total Cache lookups by namespace and outcome.', '# TYPE cache_operations_total counter']
+    for namespace, counts in sorted(data['cache'].items()):
+        for result, count in sorted(counts.items()):
+            lines.append(f"cache_operations_total{_labels(namespace=namespace, result=result)} {count}")
+    compression = sorted(data.get('compression', {}).items())
+    lines += [
+        '# HELP http_compression_bytes_total Response bytes before (in) and after (out) compression.',
+        '# TYPE http_compression_bytes_total counter',
+    ]
+    for encoding, counts in compression:
+        for stage in ('in', 'out'):
+            lines.append(f"http_compression_bytes_total{_labels(encoding=encoding, stage=stage)} {counts[f'bytes_{stage}']}")
+    for name, field, help_text in (
+        ('http_compression_cpu_seconds_total', 'cpu_seconds', 'CPU time spent compressing responses.'),
+        ('http_compressed_responses_total', 'responses', 'Responses sent compressed.'),
+        ('http_compression_cache_hits_total', 'cache_hits', 'Compressed bodies served from the cache.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for encoding, counts in compression:
+            lines.append(f"{name}{_labels(encoding=encoding)} {counts[field]}")
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint. Guarded by METRICS['TOKEN'] when set."""
+    if not _config('ENABLED'):
+        raise Http404
+    token = _config('TOKEN')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
+
+
+# ==============================================================================
+# MIDDLEWARE
+# ==============================================================================
+class _QueryCounter:
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, query count and response size per URL route.
+    Removed from the stack entirely unless METRICS['ENABLED'] is set.
+    """
+
+    def __init__(self, get_response):
+        if not _config('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        atexit.register(flush)
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        route = '/' + match.route if match is not None else '<unmatched>'
+        if response.streaming:
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+        observe(request.method, route, response.status_code, duration, counter.count, size)
+        _maybe_flush()
+        return response
@@ -0,0 +1,36 @@
+import io
+
+from rest_framework import parsers
+
+try:
+    import orjson
+except ImportError:  # Falls back to DRF's stdlib parser.
+    orjson = None
+
+# orjson turns integers wider than 64 bits into floats where the stdlib
+# keeps them exact, so bodies with 19+ digit runs take the stdlib path.
+# Mapping digits to '0' and everything else to ' ' makes that one
+# substring search instead of a much slower regex scan.
+_DIGIT_TABLE = bytes(ord('0') if chr(byte).isdigit() and byte < 128 else ord(' ') for byte in range(256))
+_LONG_RUN = b'0' * 19
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    DRF's JSONParser, decoded with orjson when it is installed and the body
+    is UTF-8. Anything orjson rejects (NaN, BOMs, lone surrogates, invalid
+    JSON) is handed to the stdlib parser, so accepted input and error
+    messages are unchanged.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        if orjson is None or parsers.get_encoding(parser_context).lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if _LONG_RUN not in body.translate(_DIGIT_TABLE):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
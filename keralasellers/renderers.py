@@ -0,0 +1,50 @@
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:  # Falls back to DRF's stdlib encoder.
+    orjson = None
+
+# orjson and the stdlib agree on everything DRF emits except the spelling of
+# floats that print in exponent form (1e16 vs 1e+16, 0.000025 vs 2.5e-05).
+# Output containing anything that could be such a float is re-rendered with
+# the stdlib; a false positive only costs that second pass. Mapping digits
+# and '-' to '0' lets one substring search find "<digit>e<digit or ->",
+# which is several times faster than a regex over the whole body.
+_EXPONENT_TABLE = bytes(ord('0') if chr(byte) in '0123456789-' else byte for byte in range(256))
+
+
+def _may_differ(ret):
+    return b'0e0' in ret.translate(_EXPONENT_TABLE) or b'0.0000' in ret
+
+if orjson is not None:
+    _OPTIONS = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    DRF's JSONRenderer, encoded with orjson when it is installed. Output is
+    byte-for-byte what JSONRenderer produces: dates, Decimals and anything
+    else orjson does not handle natively go through DRF's encoder, and
+    pretty-printed or non-default (UNICODE/COMPACT/STRICT_JSON) rendering
+    uses the stdlib path. The one difference: NaN/Infinity floats render as
+    null instead of raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits, non-str keys orjson rejects, etc.
+            return super().render(data, accepted_media_type, renderer_context)
+        if _may_differ(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same strict-JavaScript-subset escaping as JSONRenderer.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
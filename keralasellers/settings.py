@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,10 +38,15 @@ INSTALLED_APPS = [
     'payments',
     'subscriptions',
     'chat',
-    'categories'
+    'categories',
+    'delivery',
+    'recommendations',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'keralasellers.metrics.MetricsMiddleware',  # outermost so it times the whole stack
+    'keralasellers.compression.CompressionMiddleware',  # before anything that reads the body
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # ✅ Should be high up, but only listed ONCE
@@ -93,8 +99,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # orjson-backed when it is installed; output matches DRF's JSONRenderer.
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'keralasellers.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'keralasellers.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -138,10 +150,69 @@ DATABASES = {
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# How API responses link to media (see keralasellers.media). BASE_URL points
+# at a CDN serving MEDIA_ROOT; when empty, URLs use the request's host and
+# MEDIA_URL. With SIGNED on, files under SIGNED_PREFIXES get expiring
+# signed URLs.
+#
+# Files under PROTECTED prefixes are only served by ProtectedMediaView at
+# MEDIA_URL, after a signed URL or the prefix's access rule(user, name)
+# allows it; the front server must pass those paths to Django rather than
+# serve MEDIA_ROOT directly. OFFLOAD hands the transfer back to it:
+# 'x-accel-redirect' (nginx, with an `internal` location at ACCEL_PREFIX
+# aliased to MEDIA_ROOT) or 'x-sendfile' (Apache mod_xsendfile, lighttpd).
+MEDIA_DELIVERY = {
+    'BASE_URL': os.environ.get('MEDIA_BASE_URL', ''),
+    'SIGNED': os.environ.get('MEDIA_SIGNED_URLS', '1') == '1',
+    'SIGNED_PREFIXES': ['chat_images/', 'chat_videos/', 'chat_audio/'],
+    'SIGNATURE_TTL': 3600,               # seconds; URLs last one to two windows
+    'PROTECTED': {
+        'chat_images/': 'chat.permissions.can_access_media',
+        'chat_videos/': 'chat.permissions.can_access_media',
+        'chat_audio/': 'chat.permissions.can_access_media',
+        'product_transfers/': 'products.transfer.can_access_media',
+    },
+    'OFFLOAD': os.environ.get('MEDIA_OFFLOAD', ''),  # '', 'x-accel-redirect' or 'x-sendfile'
+    'ACCEL_PREFIX': '/protected-media/',
+}
 STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-CORS_ALLOW_CREDENTIALS = True
+
+# ==============================================================================
+# CACHING
+# ==============================================================================
+# Everything cached (entitlements, storefronts, dashboards, the category
+# schema) must be visible to every worker, so the default cache is
+# shared: Redis when REDIS_URL is set, otherwise a file cache that all
+# workers on this host can read. CACHE_BACKEND=locmem gives a per-process
+# stand-in, which test runs always use. Features reach the cache through
+# keralasellers.cache namespaces rather than raw keys.
+if os.environ.get('REDIS_URL'):
+    _default_cache = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+elif sys.argv[1:2] == ['test'] or os.environ.get('CACHE_BACKEND') == 'locmem':
+    _default_cache = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+else:
+    # Never evicts live entries; only expired files are swept. Its add() is
+    # not atomic, so Namespace.lock() needs REDIS_URL.
+    _default_cache = {
+        'BACKEND': 'keralasellers.cache.FileCache',
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache'),
+        'OPTIONS': {'CULL_INTERVAL': 300},  # seconds between sweeps of expired files
+    }
+CACHES = {'default': {**_default_cache, 'KEY_PREFIX': 'keralasellers'}}
+
+CACHE_FRAMEWORK = {
+    'LOCK_TIMEOUT': 10,          # seconds a single-flight compute may hold its lock
+    'LOCK_POLL_INTERVAL': 0.05,  # seconds between checks while another worker computes
+    'STOREFRONT_TIMEOUT': 300,   # public shop pages (also invalidated on product/store saves)
+    'DASHBOARD_TIMEOUT': 60,     # seller dashboard analytics
+}
+
 # ==============================================================================
 # THIRD-PARTY CONFIGURATIONS (CORS, RAZORPAY, ETC.)
 # ==============================================================================
@@ -157,6 +228,184 @@ CORS_ALLOWED_ORIGINS = [
 RAZORPAY_KEY_ID = 'YOUR_KEY_ID'
 RAZORPAY_KEY_SECRET = 'YOUR_KEY_SECRET'
 
+# Outbound Razorpay calls go through payments.gateway. Set BACKEND to
+# 'payments.gateway.FakeGateway' to run tests and benchmarks offline.
+PAYMENT_GATEWAY = {
+    'BACKEND': os.environ.get('PAYMENT_GATEWAY_BACKEND', 'payments.gateway.RazorpayGateway'),
+    'CONNECT_TIMEOUT': 3.05,   # seconds
+    'READ_TIMEOUT': 10,        # seconds
+    'MAX_RETRIES': 2,          # orders and refunds only retry failed connects
+    'BACKOFF_FACTOR': 0.5,     # first retry delay; doubles each attempt
+    'POOL_MAXSIZE': 20,        # keep-alive connections per host
+    'BREAKER_THRESHOLD': 5,    # consecutive failures before failing fast
+    'BREAKER_COOLDOWN': 30,    # seconds the breaker stays open
+    'REGISTRY_SIZE': 256,      # per-store gateways kept per worker
+}
+
+# Razorpay webhooks are stored by the web process and applied by the
+# `process_payment_events` worker. SECRET verifies the platform account's
+# webhooks; stores on their own account set StoreProfile.razorpay_webhook_secret.
+PAYMENT_WEBHOOKS = {
+    'SECRET': os.environ.get('RAZORPAY_WEBHOOK_SECRET', ''),
+    'BATCH_SIZE': 200,
+    'POLL_INTERVAL': 1.0,      # seconds between polls when the queue is empty
+}
+
+# Escrow deadlines enforced by the `run_escrow_scheduler` worker.
+ESCROW = {
+    'PAYMENT_WINDOW': timedelta(minutes=30),            # unpaid buyer orders are cancelled
+    'ACCEPTANCE_WINDOW': timedelta(hours=48),           # held payments are refunded
+    'SHIPPING_WINDOW': timedelta(days=5),               # accepted but unshipped orders are refunded
+    'DELIVERY_CONFIRMATION_WINDOW': timedelta(days=10), # shipped orders auto-complete
+    'REFUND_RETRY_DELAY': timedelta(minutes=10),
+    'MAX_REFUND_ATTEMPTS': 6,                           # then the order waits for a person
+    'BATCH_SIZE': 200,
+    'POLL_INTERVAL': 30,                                # seconds
+}
+
+# Plan enforcement (see subscriptions.entitlements).
+SUBSCRIPTIONS = {
+    'FREE_PRODUCT_LIMIT': 10,   # products allowed without an active plan
+    'CACHE_TIMEOUT': 3600,      # seconds an entitlement snapshot is cached
+}
+
+# Active products with total_stock at or below this count as low stock.
+LOW_STOCK_THRESHOLD = 5
+
+# Most items accepted by one bulk stock update request.
+BULK_STOCK_MAX_ITEMS = 1000
+
+# StockHistory retention (see products.history and the archive_stock_history
+# command). Older rows are summed into StockHistoryDaily and, when ARCHIVE_DIR
+# is set, written to one gzipped JSON-lines file per day as they are deleted.
+STOCK_HISTORY = {
+    'RETENTION_DAYS': 90,                # raw rows kept this many whole days
+    'ROLLUP_RETENTION_DAYS': None,       # daily rollups kept forever when None
+    'ARCHIVE_DIR': os.environ.get('STOCK_HISTORY_ARCHIVE_DIR', str(BASE_DIR / 'archive' / 'stock_history')),
+}
+
+# Seller bulk product import/export (see products.transfer). XLSX needs
+# openpyxl installed; CSV always works.
+PRODUCT_TRANSFER = {
+    'CHUNK_SIZE': 500,                   # rows validated and written per transaction
+    'BATCH_SIZE': 500,                   # rows per bulk_create/bulk_update statement
+    'MAX_ERRORS': 1000,                  # per-row errors kept on the job
+    'MAX_UPLOAD_SIZE': 20 * 1024 * 1024, # bytes
+    # Jobs with no progress for this long are requeued or failed by
+    # `manage.py recover_transfer_jobs` (the worker pool is in-process, so a
+    # restart drops whatever it was running).
+    'STALE_AFTER': timedelta(minutes=30),
+}
+
+# Delivery estimates (see delivery.estimates). PINCODE_DATA is a CSV of
+# prefix,district,state,latitude,longitude; the bundled one covers postal
+# circles across India and sorting districts in and around Kerala, and the
+# full all-India pincode directory can be dropped in with 6-digit rows. A
+# store-to-buyer distance falls in the first zone whose radius covers it;
+# stores can override the days per zone with StoreDeliverySLA.
+DELIVERY = {
+    'PINCODE_DATA': os.environ.get('DELIVERY_PINCODE_DATA', str(BASE_DIR / 'delivery' / 'data' / 'pincodes.csv')),
+    'ZONES': [                           # (zone, radius km or None, min days, max days)
+        ('LOCAL', 40, 1, 2),
+        ('REGIONAL', 300, 2, 4),
+        ('NATIONAL', None, 4, 8),
+    ],
+    'CACHE_SIZE': 20000,                 # (store, pincode) estimates kept per worker
+    'CACHE_TTL': 300,                    # seconds
+    'BATCH_MAX_ITEMS': 100,              # products per batch estimate request
+}
+
+# Public store list `?near=` search (see store.views.NearFilter).
+STORE_SEARCH = {
+    'DEFAULT_RADIUS_KM': 25,
+    'MAX_RADIUS_KM': 100,
+}
+
+# Product recommendations (see recommendations.bought_together and
+# recommendations.similar). Lists are rebuilt offline by
+# `manage.py build_bought_together` and `manage.py build_similar_products`;
+# both use numpy when it is installed. Similar lists are refreshed
+# incrementally; run `build_similar_products --full` now and then (e.g.
+# nightly) to re-weigh the whole catalogue.
+RECOMMENDATIONS = {
+    'TOP_K': 20,                         # neighbors kept per product
+    'MIN_SUPPORT': 2,                    # orders a pair needs before it is recommended
+    'BATCH_ORDERS': 5000,                # delivered orders counted per transaction
+    'MAX_BASKET': 50,                    # larger orders are skipped as bulk purchases
+    'CACHE_TIMEOUT': 3600,               # seconds a product's list stays cached
+    'SIMILAR_FEATURES': 2 ** 20,         # hashed text feature buckets
+    'SIMILAR_MAX_DF': 0.1,               # terms in more of the catalogue than this are ignored
+    'SIMILAR_MIN_SCORE': 0.1,            # cosine below this is not "similar"
+}
+
+# `?ordering=trending` on the product list (see products.trending). Events
+# are buffered per worker and added to ProductTrending scores in batches;
+# `manage.py decay_trending_scores` moves the decay landmark forward.
+TRENDING = {
+    'WEIGHTS': {'view': 1, 'order': 5, 'sale': 10},    # per event, times quantity for orders and sales
+    'HALF_LIFE': timedelta(days=3),                     # an event counts half as much after this long
+    'FLUSH_INTERVAL': 30,                               # seconds events wait in a worker's buffer
+    'FLUSH_SIZE': 1000,                                 # buffered products that force an early flush
+    'RESCALE_AFTER': timedelta(days=7),                 # landmark age before scores are rescaled
+    'MIN_SCORE': 0.01,                                  # rescaled scores below this drop to 0
+    'POLL_INTERVAL': 3600,                              # seconds between decay job checks
+}
+
+# One-time passwords (see users.otp). Send rates are token buckets: CAPACITY
+# messages in a burst, then one more every REFILL seconds.
+OTP = {
+    'LENGTH': 4,
+    'TTL': 300,                 # seconds a code stays valid
+    'MAX_ATTEMPTS': 5,          # wrong guesses before the code is discarded
+    'PHONE_RATE': {'CAPACITY': 3, 'REFILL': 60},
+    'IP_RATE': {'CAPACITY': 10, 'REFILL': 30},
+    # Reverse proxies in front of the app that append to X-Forwarded-For;
+    # 0 uses REMOTE_ADDR as the client address.
+    'TRUSTED_PROXIES': int(os.environ.get('TRUSTED_PROXIES', 0)),
+}
+
+# Outbound SMS. users.sms.FileSender (OPTIONS: {'PATH': ...}) and
+# users.sms.MemorySender are available for local runs and tests.
+SMS = {
+    'BACKEND': os.environ.get('SMS_BACKEND', 'users.sms.ConsoleSender'),
+    'OPTIONS': {},
+}
+
+# Per-process thread pool for work that must not block a request
+# (see keralasellers.tasks). ALWAYS_EAGER runs tasks inline.
+BACKGROUND_TASKS = {
+    'MAX_WORKERS': 4,
+    'ALWAYS_EAGER': False,
+}
+
+# ==============================================================================
+# METRICS
+# ==============================================================================
+# Per-route request metrics served at /metrics in Prometheus text format.
+# Disabled, the middleware removes itself and costs nothing. Point DIR at a
+# directory shared by the gunicorn workers to scrape totals for all of them.
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', '') == '1',
+    'DIR': os.environ.get('METRICS_DIR', ''),
+    'FLUSH_INTERVAL': 5,        # seconds between per-worker snapshots
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),  # bearer token required to scrape, if set
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),  # seconds
+}
+
+# ==============================================================================
+# COMPRESSION
+# ==============================================================================
+# gzip/brotli for API responses (see keralasellers.compression). Brotli is
+# offered when the brotli package is installed.
+COMPRESSION = {
+    'ENABLED': os.environ.get('COMPRESSION_ENABLED', '1') == '1',
+    'MIN_SIZE': 1024,                    # bytes; smaller bodies are sent as is
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'CONTENT_TYPES': ['application/json', 'text/', 'application/javascript', 'application/xml', 'image/svg+xml'],
+    'CACHE_TIMEOUT': 300,                # seconds, for cached compressed variants
+}
+
 # ==============================================================================
 # PASSWORD VALIDATION & INTERNATIONALIZATION
 # ==============================================================================
@@ -0,0 +1,71 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_TASKS['MAX_WORKERS'],
+                    thread_name_prefix='background-task',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, '__qualname__', func))
+        raise
+
+
+def _run_in_pool(func, args, kwargs):
+    try:
+        return _run(func, args, kwargs)
+    finally:
+        # Pool threads outlive the task; don't leave its connections open.
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """
+    Run `func` on the per-process worker pool and return its Future, so the
+    request that queued it never waits on slow I/O. With ALWAYS_EAGER the
+    task runs inline (tests, management commands).
+    """
+    if settings.BACKGROUND_TASKS['ALWAYS_EAGER']:
+        future = Future()
+        try:
+            future.set_result(_run(func, args, kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return _get_executor().submit(_run_in_pool, func, args, kwargs)
+
+
+def shutdown(wait=True):
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+        _executor = None
+
+
+@receiver(setting_changed)
+def _reset_executor(setting, **kwargs):
+    if setting == 'BACKGROUND_TASKS':
+        shutdown()
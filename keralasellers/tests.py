@@ -0,0 +1,309 @@
+import gzip
+import io
+import json
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from . import compression, media, metrics
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .cache import FileCache, LockTimeout, Namespace, reset_stats, stats
+
+
+class NamespaceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        reset_stats()
+
+    def test_versions_do_not_share_entries(self):
+        Namespace('things', version=1).set('a', 'old')
+        self.assertIsNone(Namespace('things', version=2).get('a'))
+        self.assertIsNone(Namespace('other', version=1).get('a'))
+        self.assertEqual(Namespace('things', version=1).get('a'), 'old')
+
+    def test_get_or_compute_counts_hits_and_misses(self):
+        ns = Namespace('things')
+        self.assertEqual(ns.get_or_compute('a', lambda: None), None)
+        self.assertEqual(ns.get_or_compute('a', lambda: 'recomputed'), None)
+        self.assertEqual(stats()['things'], {'hits': 1, 'misses': 1, 'computes': 1, 'waits': 0})
+
+    def test_concurrent_misses_compute_once(self):
+        ns = Namespace('things')
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(ns.get_or_compute('hot', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_timeout_can_depend_on_value(self):
+        ns = Namespace('things')
+        ns.get_or_compute('short', lambda: 1, timeout=lambda value: -1)
+        self.assertIsNone(ns.get('short'))
+
+    def test_lock_times_out(self):
+        ns = Namespace('things')
+        with ns.lock('job'):
+            with self.assertRaises(LockTimeout):
+                with ns.lock('job', wait=0):
+                    pass
+        with ns.lock('job', wait=0):
+            pass
+
+    def test_lock_needs_atomic_add(self):
+        with tempfile.TemporaryDirectory() as directory:
+            caches = {'default': {'BACKEND': 'keralasellers.cache.FileCache', 'LOCATION': directory}}
+            with override_settings(CACHES=caches):
+                ns = Namespace('things')
+                self.assertFalse(ns.atomic_add)
+                with self.assertRaises(ImproperlyConfigured):
+                    with ns.lock('job'):
+                        pass
+                self.assertEqual(ns.get_or_compute('a', lambda: 'value'), 'value')
+
+
+class FileCacheTests(SimpleTestCase):
+    def test_only_expired_entries_are_swept(self):
+        with tempfile.TemporaryDirectory() as directory:
+            files = FileCache(directory, {'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_INTERVAL': 0}})
+            for key in 'abcde':
+                files.set(key, key, 60)
+            files.set('old', 'old', -1)
+            files.set('new', 'new', 60)
+            self.assertEqual(files.get_many(list('abcde')), {key: key for key in 'abcde'})
+            self.assertEqual(len(list(Path(directory).iterdir())), 6)
+
+
+METRICS_ON = {
+    'ENABLED': True, 'DIR': '', 'FLUSH_INTERVAL': 5, 'TOKEN': '',
+    'BUCKETS': (0.1, 1),
+}
+
+
+@override_settings(METRICS=METRICS_ON)
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_render_histogram_and_counters(self):
+        metrics.observe('GET', '/shop/<str:seller_phone>/', 200, 0.05, 3, 100)
+        metrics.observe('GET', '/shop/<str:seller_phone>/', 404, 2.0, 1, 20)
+        text = metrics.render(metrics.collect())
+        labels = 'method="GET",route="/shop/<str:seller_phone>/"'
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'http_db_queries_total{{{labels}}} 4', text)
+        self.assertIn(f'http_responses_total{{{labels},status="404"}} 1', text)
+
+    def test_workers_are_summed_through_the_shared_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(METRICS={**METRICS_ON, 'DIR': directory}):
+                other = {'requests': {'GET /shops/': {
+                    'buckets': [1, 0, 0], 'duration': 0.01, 'count': 1,
+                    'queries': 2, 'bytes': 10, 'statuses': {'200': 1},
+                }}, 'cache': {}}
+                (Path(directory) / 'worker-1-other.json').write_text(json.dumps(other))
+                metrics.observe('GET', '/shops/', 200, 0.02, 1, 5)
+                totals = metrics.collect()['requests']['GET /shops/']
+        self.assertEqual(totals['count'], 2)
+        self.assertEqual(totals['queries'], 3)
+        self.assertEqual(totals['statuses'], {'200': 2})
+
+
+MEDIA_DELIVERY = {
+    'BASE_URL': '', 'SIGNED': False, 'SIGNED_PREFIXES': ['chat_images/'], 'SIGNATURE_TTL': 60,
+    'PROTECTED': {'chat_images/': 'keralasellers.tests.deny_all'}, 'OFFLOAD': '', 'ACCEL_PREFIX': '/protected-media/',
+}
+
+
+def deny_all(user, name):
+    return False
+
+
+@override_settings(MEDIA_DELIVERY=MEDIA_DELIVERY, MEDIA_URL='/media/')
+class MediaURLTests(SimpleTestCase):
+    def test_matches_build_absolute_uri(self):
+        request = RequestFactory().get('/', secure=True)
+        resolver = media.for_request(request)
+        self.assertIs(media.for_request(request), resolver)
+        name = 'product_images/main/ragi püttu 1.jpg'
+        self.assertEqual(resolver(name), request.build_absolute_uri(media.default_storage.url(name)))
+        self.assertIsNone(resolver(''))
+
+    def test_without_request_urls_are_site_relative(self):
+        self.assertEqual(media.for_request(None)('store_logos/a.png'), '/media/store_logos/a.png')
+
+    @override_settings(MEDIA_DELIVERY={**MEDIA_DELIVERY, 'BASE_URL': 'https://cdn.example.com/m'})
+    def test_cdn_base_url(self):
+        request = RequestFactory().get('/')
+        self.assertEqual(media.for_request(request)('store_logos/a.png'), 'https://cdn.example.com/m/store_logos/a.png')
+        self.assertEqual(media.for_request(request)('chat_images/a.png'), 'http://testserver/media/chat_images/a.png')
+
+    @override_settings(MEDIA_DELIVERY={**MEDIA_DELIVERY, 'SIGNED': True})
+    def test_signed_urls_for_private_prefixes(self):
+        resolver = media.MediaURLs()
+        self.assertEqual(resolver('store_logos/a.png'), '/media/store_logos/a.png')
+        url = resolver('chat_images/a.png')
+        query = dict(part.split('=') for part in url.split('?')[1].split('&'))
+        self.assertTrue(media.verify('chat_images/a.png', query['expires'], query['signature']))
+        self.assertFalse(media.verify('chat_images/b.png', query['expires'], query['signature']))
+        self.assertFalse(media.verify('chat_images/a.png', int(time.time()) - 1, media.signature('chat_images/a.png', int(time.time()) - 1)))
+
+
+PROTECTED_DELIVERY = {**MEDIA_DELIVERY, 'SIGNED': True}
+
+
+@override_settings(MEDIA_DELIVERY=PROTECTED_DELIVERY, MEDIA_URL='/media/')
+class ProtectedMediaTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(MEDIA_ROOT=root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.body = bytes(range(256)) * 40
+        (Path(root.name) / 'chat_images').mkdir()
+        (Path(root.name) / 'chat_images' / 'a.png').write_bytes(self.body)
+        self.url = media.MediaURLs()('chat_images/a.png')
+
+    def get(self, url=None, **headers):
+        response = self.client.get(url or self.url, headers=headers)
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_signed_url_or_access_rule_required(self):
+        self.assertIn('signature=', self.url)
+        response, body = self.get()
+        self.assertEqual((response.status_code, body), (200, self.body))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.get(self.url.split('?')[0])[0].status_code, 401)
+        self.assertEqual(self.get(self.url.replace('a.png', 'b.png'))[0].status_code, 401)
+        self.assertEqual(self.get('/media/chat_images/../chat_images/a.png')[0].status_code, 404)
+
+    def test_ranges_and_conditional_requests(self):
+        response, body = self.get(Range='bytes=100-199')
+        self.assertEqual((response.status_code, body), (206, self.body[100:200]))
+        self.assertEqual((response['Content-Range'], response['Content-Length']), (f'bytes 100-199/{len(self.body)}', '100'))
+        self.assertEqual(self.get(Range='bytes=-10')[1], self.body[-10:])
+        self.assertEqual(self.get(Range='bytes=10000-')[1], self.body[10000:])
+        self.assertEqual(self.get(Range='bytes=0-1,5-6')[0].status_code, 200)
+        unsatisfiable = self.get(Range=f'bytes={len(self.body)}-')[0]
+        self.assertEqual((unsatisfiable.status_code, unsatisfiable['Content-Range']), (416, f'bytes */{len(self.body)}'))
+
+        etag = response['ETag']
+        self.assertEqual(self.get(If_None_Match=etag)[0].status_code, 304)
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range=etag)[0].status_code, 206)
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range='"stale"')[0].status_code, 200)
+
+    @override_settings(MEDIA_DELIVERY={**PROTECTED_DELIVERY, 'OFFLOAD': 'x-accel-redirect'})
+    def test_offload_to_front_server(self):
+        response, body = self.get(Range='bytes=0-9')
+        self.assertEqual((response.status_code, body), (200, b''))
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/chat_images/a.png')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        with override_settings(MEDIA_DELIVERY={**PROTECTED_DELIVERY, 'OFFLOAD': 'x-sendfile'}):
+            self.assertEqual(self.get()[0]['X-Sendfile'], media.default_storage.path('chat_images/a.png'))
+
+
+class FastJSONTests(SimpleTestCase):
+    def assertRendersLikeDRF(self, data, accepted_media_type=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_matches_drf_renderer(self):
+        self.assertRendersLikeDRF({
+            'price': '120.50', 'raw': Decimal('19.90'), 'tiny': Decimal('0.00001'),
+            'created': datetime(2026, 1, 2, 3, 4, 5, 678, tzinfo=dt_timezone.utc), 'day': date(2026, 1, 2),
+            'naive': datetime(2026, 1, 2), 'took': timedelta(seconds=90), 'id': uuid.UUID(int=7),
+            'floats': [0.1, 4.25, 1e16, 2.5e-05, 1e-07, -0.0], 'big': 2 ** 70, 'keys': {1: 'a', None: 'b'},
+            'text': 'caf\u00e9 \u2028 \u2029 "q" \\ \x00', 'lazy': gettext_lazy('Hello'), 'tags': {'x'},
+            'nested': [[{'a': (1, 2)}]],
+        })
+        self.assertRendersLikeDRF([{'a': 1}], 'application/json; indent=4')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parser_matches_drf_parser(self):
+        for body in [b'{"a": [1, 2.5, "\\u2028", null, true]}', b'{"id": 123456789012345678901234567890}']:
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"id": 123456789012345678901234567890}'))['id'],
+                         123456789012345678901234567890)
+        for body in [b'{"a": NaN}', b'\xef\xbb\xbf[1]', b'{"a": }']:
+            with self.assertRaises(ParseError) as fast:
+                FastJSONParser().parse(io.BytesIO(body))
+            with self.assertRaises(ParseError) as stdlib:
+                JSONParser().parse(io.BytesIO(body))
+            self.assertEqual(str(fast.exception), str(stdlib.exception))
+
+
+class CompressionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        compression.reset_stats()
+        self.body = json.dumps([{'name': f'Product {i}', 'price': '10.00'} for i in range(200)]).encode()
+
+    def respond(self, response, accept='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return compression.CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate('gzip, deflate, br'), compression.available()[0])
+        self.assertEqual(compression.negotiate('gzip;q=0.5, identity'), 'gzip')
+        self.assertIsNone(compression.negotiate('gzip;q=0'))
+        self.assertEqual(compression.negotiate('*'), compression.available()[0])
+        self.assertIsNone(compression.negotiate(''))
+
+    def test_compresses_large_json_only(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+        self.assertFalse(self.respond(HttpResponse(b'{}', content_type='application/json')).has_header('Content-Encoding'))
+        self.assertFalse(self.respond(HttpResponse(self.body, content_type='image/png')).has_header('Content-Encoding'))
+        uncompressed = self.respond(HttpResponse(self.body, content_type='application/json'), accept='identity')
+        self.assertEqual((uncompressed.content, uncompressed['Vary']), (self.body, 'Accept-Encoding'))
+
+    def test_streaming_is_compressed_incrementally(self):
+        chunks = [self.body[i:i + 500] for i in range(0, len(self.body), 500)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 2)
+        self.assertEqual(gzip.decompress(b''.join(parts)), self.body)
+
+    def test_cached_variants_are_compressed_once(self):
+        for _ in range(3):
+            response = compression.cache_variants(HttpResponse(self.body, content_type='application/json'), 'page:1')
+            self.assertEqual(gzip.decompress(self.respond(response).content), self.body)
+        counts = compression.stats()['gzip']
+        self.assertEqual((counts['responses'], counts['cache_hits']), (3, 2))
+        self.assertEqual(counts['bytes_in'], 3 * len(self.body))
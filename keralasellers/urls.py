@@ -1,12 +1,17 @@
 from django.contrib import admin
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from store.views import PublicStoreView, PublicStoreListView
 from users.views import BuyerProfileView
+from .media import ProtectedMediaView
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     
     # User authentication endpoints
     path("user/", include("users.urls")),
@@ -16,6 +21,7 @@ urlpatterns = [
     path('api/subscriptions/', include('subscriptions.urls')),
     path('api/chat/', include('chat.urls')),
     path('api/categories/', include('categories.urls')),
+    path('api/payments/', include('payments.urls')),
     
     # Store management endpoints (for sellers)
     path('api/store/', include('store.urls')),
@@ -29,6 +35,15 @@ urlpatterns = [
     # Public storefront endpoints
     path('shop/<str:seller_phone>/', PublicStoreView.as_view(), name='public-store-view'),
     path('shops/', PublicStoreListView.as_view(), name='public-store-list'),
+
+    # Chat media and other private files, at their usual MEDIA_URL paths
+    re_path(
+        r'^%s(?P<name>(?:%s).+)$' % (
+            re.escape(settings.MEDIA_URL.lstrip('/')),
+            '|'.join(re.escape(prefix) for prefix in settings.MEDIA_DELIVERY['PROTECTED']),
+        ),
+        ProtectedMediaView.as_view(), name='protected-media',
+    ),
 ]
 
 if settings.DEBUG:
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'keralasellers.settings')
 
 application = get_wsgi_application()
+
+# Warm hot read-only caches before the first request reaches this worker.
+from categories.cache import warm_schema_cache  # noqa: E402
+
+warm_schema_cache()
+
+# Write buffered trending events from idle and exiting workers too.
+from products import trending  # noqa: E402
+
+trending.flush_in_background()
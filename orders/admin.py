@@ -1,7 +1,8 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Order, OrderItem    
+from .models import Order, OrderItem, RazorpayOrder
 
 admin.site.register(Order)
-admin.site.register(OrderItem)  # Register the OrderItem model
\ No newline at end of file
+admin.site.register(OrderItem)  # Register the OrderItem model
+admin.site.register(RazorpayOrder)
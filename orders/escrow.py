@@ -0,0 +1,203 @@
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from payments.gateway import GatewayError
+from payments.registry import gateway_for_store
+from products import trending
+from products.models import Product, StockHistory
+from store import stats, storefront
+from users.models import Seller
+from .models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+Status = Order.OrderStatus
+
+
+def _due_orders(now, batch_size):
+    queryset = (
+        Order.objects.filter(next_deadline_at__lte=now)
+        .select_related('store')
+        .order_by('next_deadline_at')
+    )
+    features = connection.features
+    if features.has_select_for_update:
+        lock = {'of': ('self',)} if features.has_select_for_update_of else {}
+        if features.has_select_for_update_skip_locked:
+            # Several schedulers can run side by side without picking the same rows.
+            lock['skip_locked'] = True
+        queryset = queryset.select_for_update(**lock)
+    return list(queryset[:batch_size])
+
+
+def _restock(orders):
+    """Return the stock of cancelled/refunded orders in one pass."""
+    if not orders:
+        return
+    by_order = {order.pk: order for order in orders}
+    quantities = defaultdict(int)
+    history = []
+    seller_type = ContentType.objects.get_for_model(Seller)
+    items = OrderItem.objects.filter(order_id__in=by_order, product__isnull=False).values_list(
+        'order_id', 'product_id', 'quantity',
+    )
+    for order_id, product_id, quantity in items:
+        quantities[product_id] += quantity
+        order = by_order[order_id]
+        history.append(StockHistory(
+            product_id=product_id,
+            store_id=order.store_id,
+            user_content_type=seller_type,
+            user_object_id=order.store.seller_id,
+            action=StockHistory.Action.RETURN,
+            change_total=quantity,
+            change_online=quantity,
+            note=f"Stock returned for {order.get_status_display().lower()} Order #{order.pk}",
+        ))
+    for product_id, quantity in quantities.items():
+        Product.objects.filter(pk=product_id).update(
+            total_stock=F('total_stock') + quantity,
+            online_stock=F('online_stock') + quantity,
+        )
+    StockHistory.objects.bulk_create(history, batch_size=500)
+    # F() updates bypass the Product signals, so refresh the affected
+    # counters and shop pages here.
+    store_ids = {order.store_id for order in orders}
+    stats.reconcile(store_ids)
+    storefront.invalidate(store_ids)
+
+
+def capture(order):
+    """
+    Capture the order's payment. Checkout only authorizes it, so the money
+    is taken once the seller accepts the order. Raises GatewayError.
+    """
+    if not order.razorpay_payment_id:
+        return
+    gateway = gateway_for_store(order.store)
+    payment = gateway.fetch_payment(order.razorpay_payment_id)
+    if payment.get('status') == 'authorized':
+        gateway.capture_payment(order.razorpay_payment_id, payment['amount'], payment.get('currency', 'INR'))
+    elif payment.get('status') != 'captured':
+        raise GatewayError(f"Payment {order.razorpay_payment_id} is {payment.get('status')} and cannot be captured.")
+
+
+def _return_payment(order):
+    """
+    Give the buyer their money back and return the order's final status.
+
+    The payment is fetched first, so a refund that went through before a
+    crash is never sent twice. Razorpay releases payments that were only
+    authorized by itself, and refuses to refund them. Raises GatewayError.
+    """
+    if not order.razorpay_payment_id:
+        return Status.CANCELLED
+    gateway = gateway_for_store(order.store)
+    payment = gateway.fetch_payment(order.razorpay_payment_id)
+    if payment.get('status') == 'captured':
+        gateway.refund_payment(
+            order.razorpay_payment_id, notes={'order_id': order.pk, 'reason': 'escrow_deadline'},
+        )
+    elif payment.get('status') not in ('authorized', 'refunded'):
+        raise GatewayError(f"Payment {order.razorpay_payment_id} is {payment.get('status')}.")
+    return Status.REFUNDED
+
+
+def _settle_refunds(orders, now):
+    """
+    Return the payments of REFUND_PENDING `orders`, outside any transaction.
+    A failed order is retried after REFUND_RETRY_DELAY, up to
+    MAX_REFUND_ATTEMPTS, and then left pending with no deadline for a person
+    to settle.
+    """
+    for order in orders:
+        try:
+            final_status = _return_payment(order)
+        except GatewayError:
+            logger.warning("Refund of Order #%s failed (attempt %s)", order.pk, order.refund_attempts + 1, exc_info=True)
+            exhausted = order.refund_attempts + 1 >= settings.ESCROW['MAX_REFUND_ATTEMPTS']
+            Order.objects.filter(pk=order.pk, status=Status.REFUND_PENDING).update(
+                refund_attempts=F('refund_attempts') + 1,
+                next_deadline_at=None if exhausted else now + settings.ESCROW['REFUND_RETRY_DELAY'],
+            )
+            if exhausted:
+                logger.error("Giving up on refunding Order #%s; it needs a manual refund", order.pk)
+            continue
+        # A refund webhook may have settled the order meanwhile.
+        Order.objects.filter(pk=order.pk, status=Status.REFUND_PENDING).update(
+            status=final_status, next_deadline_at=None,
+        )
+
+
+def cancel(order, now=None):
+    """
+    Cancel a paid (HELD or ACCEPTED) order for the seller the way an expired
+    deadline does: restock it, mark it REFUND_PENDING and return the payment.
+    Call inside a transaction with the order locked. The refund is sent once
+    that commits; if it fails, process_due retries it like any other.
+    """
+    now = now or timezone.now()
+    order.status = Status.REFUND_PENDING
+    order.next_deadline_at = now + settings.ESCROW['REFUND_RETRY_DELAY']
+    order.save(update_fields=['status', 'next_deadline_at'])
+    _restock([order])
+    transaction.on_commit(lambda: _settle_refunds([order], now))
+
+
+def process_due(now=None, batch_size=None):
+    """
+    Enforce one batch of expired escrow deadlines and return the number of
+    orders handled.
+
+    - unpaid buyer orders are cancelled and restocked
+    - payments the seller never accepted, or accepted but never shipped,
+      are restocked and marked REFUND_PENDING, then refunded
+    - shipped orders are marked delivered
+
+    Gateway calls happen after the status changes commit, so a rollback can
+    never undo the record of a refund that was sent. Claimed refunds get a
+    REFUND_RETRY_DELAY deadline first, which keeps other schedulers off them.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.ESCROW['BATCH_SIZE']
+    retry_at = now + settings.ESCROW['REFUND_RETRY_DELAY']
+    with transaction.atomic():
+        orders = _due_orders(now, batch_size)
+        restock, delivered, refunds = [], [], []
+        for order in orders:
+            if order.status == Status.PENDING_PAYMENT:
+                order.status = Status.CANCELLED
+                restock.append(order)
+            elif order.status in (Status.HELD_FOR_SELLER_ACCEPTANCE, Status.ACCEPTED_BY_SELLER):
+                order.status = Status.REFUND_PENDING
+                restock.append(order)
+            elif order.status == Status.SHIPPED:
+                order.status = Status.DELIVERED
+                delivered.append(order.pk)
+            if order.status == Status.REFUND_PENDING:
+                order.next_deadline_at = retry_at
+                refunds.append(order)
+            else:
+                order.next_deadline_at = order.compute_next_deadline()
+        Order.objects.bulk_update(orders, ['status', 'next_deadline_at'], batch_size=500)
+        _restock(restock)
+        trending.record_order(delivered, 'sale')
+    _settle_refunds(refunds, now)
+    return len(orders)
+
+
+def process_all_due(now=None, batch_size=None):
+    """Work through every due order in bounded batches."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        handled = process_due(now, batch_size)
+        total += handled
+        if handled < (batch_size or settings.ESCROW['BATCH_SIZE']):
+            return total
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.escrow import process_all_due
+
+
+class Command(BaseCommand):
+    help = "Cancel, refund or complete orders whose escrow deadline has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ESCROW['BATCH_SIZE'])
+        parser.add_argument('--once', action='store_true', help="Process due orders once and exit.")
+        parser.add_argument('--interval', type=float, default=settings.ESCROW['POLL_INTERVAL'],
+                            help="Seconds to sleep between scans.")
+
+    def handle(self, *args, **options):
+        while True:
+            handled = process_all_due(batch_size=options['batch_size'])
+            if handled:
+                self.stdout.write(f"Processed {handled} due order(s).")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
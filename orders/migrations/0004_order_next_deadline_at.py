@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_deadlines(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    windows = settings.ESCROW
+    rules = [
+        ('PENDING_PAYMENT', 'created_at', 'PAYMENT_WINDOW'),
+        ('HELD', 'paid_at', 'ACCEPTANCE_WINDOW'),
+        ('ACCEPTED', 'seller_accepted_at', 'SHIPPING_WINDOW'),
+        ('SHIPPED', 'shipped_at', 'DELIVERY_CONFIRMATION_WINDOW'),
+    ]
+    for status, field, window in rules:
+        queryset = Order.objects.filter(status=status, **{f'{field}__isnull': False})
+        if status == 'PENDING_PAYMENT':
+            queryset = queryset.filter(buyer__isnull=False)
+        batch = []
+        for order in queryset.only('id', field).iterator(chunk_size=2000):
+            order.next_deadline_at = getattr(order, field) + windows[window]
+            batch.append(order)
+            if len(batch) >= 2000:
+                Order.objects.bulk_update(batch, ['next_deadline_at'])
+                batch = []
+        Order.objects.bulk_update(batch, ['next_deadline_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_razorpay_order_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='next_deadline_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+    ]
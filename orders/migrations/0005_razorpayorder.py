@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_razorpay_orders(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    RazorpayOrder = apps.get_model('orders', 'RazorpayOrder')
+    rows = Order.objects.exclude(razorpay_order_id__isnull=True).exclude(razorpay_order_id='')
+    batch = []
+    for order_id, razorpay_order_id in rows.values_list('id', 'razorpay_order_id').iterator(chunk_size=2000):
+        batch.append(RazorpayOrder(order_id=order_id, razorpay_order_id=razorpay_order_id))
+        if len(batch) >= 2000:
+            RazorpayOrder.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    RazorpayOrder.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_next_deadline_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RazorpayOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('razorpay_order_id', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='razorpay_orders', to='orders.order')),
+            ],
+        ),
+        migrations.RunPython(backfill_razorpay_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_razorpayorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='refund_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('PENDING_PAYMENT', 'Pending Payment'), ('HELD', 'Payment Held for Acceptance'), ('ACCEPTED', 'Accepted by Seller'), ('SHIPPED', 'Shipped'), ('DELIVERED', 'Delivered'), ('CANCELLED', 'Cancelled'), ('REFUNDED', 'Refunded'), ('REFUND_PENDING', 'Refund Pending')], default='PENDING_PAYMENT', max_length=20),
+        ),
+    ]
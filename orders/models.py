@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from store.models import StoreProfile
@@ -14,6 +15,8 @@ class Order(models.Model):
         DELIVERED = 'DELIVERED', 'Delivered'
         CANCELLED = 'CANCELLED', 'Cancelled'
         REFUNDED = 'REFUNDED', 'Refunded'
+        # The escrow worker is returning the payment; see orders.escrow.
+        REFUND_PENDING = 'REFUND_PENDING', 'Refund Pending'
 
     store = models.ForeignKey(StoreProfile, on_delete=models.CASCADE, related_name='orders')
     buyer = models.ForeignKey(Buyer, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
@@ -28,6 +31,7 @@ class Order(models.Model):
     )
     shipping_provider = models.CharField(max_length=100, blank=True, null=True)
     tracking_id = models.CharField(max_length=100, blank=True, null=True)
+    razorpay_order_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     razorpay_payment_id = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -36,6 +40,34 @@ class Order(models.Model):
     seller_accepted_at = models.DateTimeField(null=True, blank=True)
     shipped_at = models.DateTimeField(null=True, blank=True)
 
+    # When the escrow scheduler next has to look at this order. NULL once the
+    # order reaches a final state, so the index only holds open orders.
+    next_deadline_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    refund_attempts = models.PositiveSmallIntegerField(default=0)
+
+    def compute_next_deadline(self):
+        """Return the escrow deadline for the order's current status, or None."""
+        windows = settings.ESCROW
+        if self.status == self.OrderStatus.REFUND_PENDING:
+            # Retries are scheduled by the escrow worker itself.
+            return self.next_deadline_at
+        if self.status == self.OrderStatus.PENDING_PAYMENT and self.buyer_id:
+            return (self.created_at or timezone.now()) + windows['PAYMENT_WINDOW']
+        if self.status == self.OrderStatus.HELD_FOR_SELLER_ACCEPTANCE and self.paid_at:
+            return self.paid_at + windows['ACCEPTANCE_WINDOW']
+        if self.status == self.OrderStatus.ACCEPTED_BY_SELLER and self.seller_accepted_at:
+            return self.seller_accepted_at + windows['SHIPPING_WINDOW']
+        if self.status == self.OrderStatus.SHIPPED and self.shipped_at:
+            return self.shipped_at + windows['DELIVERY_CONFIRMATION_WINDOW']
+        return None
+
+    def save(self, *args, **kwargs):
+        self.next_deadline_at = self.compute_next_deadline()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'next_deadline_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['next_deadline_at']
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Order #{self.id} for {self.store.name}"
 
@@ -47,4 +79,18 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Price at the time of purchase")
 
     def __str__(self):
-        return f"{self.quantity} x {self.product.name if self.product else 'Deleted Product'}"
\ No newline at end of file
+        return f"{self.quantity} x {self.product.name if self.product else 'Deleted Product'}"
+
+class RazorpayOrder(models.Model):
+    """
+    Every Razorpay order created to pay for an Order. A buyer may start
+    checkout more than once, and a payment can arrive on any of them, so
+    payment webhooks match against all of these rather than the latest
+    `Order.razorpay_order_id`.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='razorpay_orders')
+    razorpay_order_id = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.razorpay_order_id} for Order #{self.order_id}"
@@ -1,3 +1,130 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from payments.gateway import GatewayError, get_gateway
+from products.models import Product
+from users.models import Buyer, Seller
+from . import escrow
+from .models import Order, OrderItem
+
+FAKE_GATEWAY = {'BACKEND': 'payments.gateway.FakeGateway'}
+
+Status = Order.OrderStatus
+
+
+@override_settings(PAYMENT_GATEWAY=FAKE_GATEWAY)
+class EscrowPaymentTests(TestCase):
+    def setUp(self):
+        self.seller = Seller.objects.create_user(phone='9000000030', password='pass', name='Seller')
+        self.store = self.seller.store_profile
+        self.product = Product.objects.create(
+            store=self.store, name='Banana chips', price=100, mrp=100, total_stock=5, online_stock=5,
+        )
+        self.gateway = get_gateway()
+
+    def held_order(self, captured=False):
+        rzp_order = self.gateway.create_order(20000, payment_capture=False)
+        payment = self.gateway.pay(rzp_order['id'], captured=captured)
+        order = Order.objects.create(
+            store=self.store, buyer=Buyer.objects.create_user(email=f"{payment['id']}@example.com"),
+            customer_name='Buyer', customer_phone='9000000031', shipping_address='Kochi', total_amount='200.00',
+            status=Status.HELD_FOR_SELLER_ACCEPTANCE, razorpay_payment_id=payment['id'],
+            paid_at=timezone.now() - timedelta(days=3),
+        )
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, price=100)
+        return order
+
+    def accept(self, order, new_status=Status.ACCEPTED_BY_SELLER):
+        client = APIClient()
+        client.force_authenticate(user=self.seller)
+        return client.patch(f'/user/orders/{order.pk}/update_status/', {'status': new_status}, format='json')
+
+    def test_accepting_captures_the_payment(self):
+        order = self.held_order()
+        self.assertEqual(self.accept(order).status_code, 200)
+        self.assertEqual(self.gateway.payments[order.razorpay_payment_id]['status'], 'captured')
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.ACCEPTED_BY_SELLER)
+
+    def test_failed_capture_leaves_order_held(self):
+        order = self.held_order()
+        with mock.patch.object(self.gateway, 'capture_payment', side_effect=GatewayError('declined')):
+            self.assertEqual(self.accept(order).status_code, 502)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.HELD_FOR_SELLER_ACCEPTANCE)
+
+    def test_order_the_scheduler_is_refunding_is_not_accepted(self):
+        order = self.held_order(captured=True)
+        Order.objects.filter(pk=order.pk).update(status=Status.REFUND_PENDING)
+        with mock.patch.object(self.gateway, 'capture_payment') as capture:
+            self.assertEqual(self.accept(order).status_code, 409)
+        capture.assert_not_called()
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.REFUND_PENDING)
+
+    def test_seller_cancellation_refunds_the_payment(self):
+        order = self.held_order()
+        self.assertEqual(self.accept(order).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.accept(order, Status.CANCELLED)
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.REFUNDED)
+        refunds = [r for r in self.gateway.refunds if r['payment_id'] == order.razorpay_payment_id]
+        self.assertEqual(len(refunds), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.online_stock, 7)
+        self.assertEqual(self.accept(order).status_code, 409)
+
+    def test_expired_authorized_payment_is_released_without_refund_call(self):
+        order = self.held_order()
+        escrow.process_due()
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.REFUNDED)
+        self.assertIsNone(order.next_deadline_at)
+        self.assertEqual(self.gateway.refunds, [])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.online_stock, 7)
+
+    def test_expired_captured_payment_is_refunded_once(self):
+        order = self.held_order(captured=True)
+        escrow.process_due()
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.REFUNDED)
+        self.assertEqual(len(self.gateway.refunds), 1)
+        # A refund that went through before the status was saved is not sent again.
+        Order.objects.filter(pk=order.pk).update(status=Status.REFUND_PENDING, next_deadline_at=timezone.now())
+        escrow.process_due()
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.REFUNDED)
+        self.assertEqual(len(self.gateway.refunds), 1)
+
+    def test_fake_gateway_refuses_to_refund_uncaptured_payment(self):
+        order = self.held_order()
+        with self.assertRaises(GatewayError):
+            self.gateway.refund_payment(order.razorpay_payment_id)
+
+    @override_settings(ESCROW={**settings.ESCROW, 'MAX_REFUND_ATTEMPTS': 2})
+    def test_refund_retries_are_capped(self):
+        order = self.held_order(captured=True)
+        now = timezone.now()
+        with mock.patch.object(self.gateway, 'refund_payment', side_effect=GatewayError('down')), \
+                self.assertLogs('orders.escrow', 'WARNING') as logs:
+            escrow.process_due(now)
+            order.refresh_from_db()
+            self.assertEqual(order.status, Status.REFUND_PENDING)
+            self.assertEqual(order.refund_attempts, 1)
+            self.assertEqual(order.next_deadline_at, now + settings.ESCROW['REFUND_RETRY_DELAY'])
+            escrow.process_due(order.next_deadline_at)
+        self.assertIn('manual refund', logs.output[-1])
+        order.refresh_from_db()
+        self.assertEqual(order.status, Status.REFUND_PENDING)
+        self.assertEqual(order.refund_attempts, 2)
+        self.assertIsNone(order.next_deadline_at)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.online_stock, 7)
@@ -1,26 +1,35 @@
+from collections import Counter
+
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 from django.db import transaction, models
-from django.conf import settings
+from django.utils import timezone
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
-import razorpay
 
-from .models import Order, OrderItem
+from . import escrow
+from .models import Order, OrderItem, RazorpayOrder
 from .serializers import OrderSerializer
 from products.models import Product
+from products import trending
 from users.models import Seller, Buyer
 from users.views import IsBuyer
-
-# Initialize Razorpay Client
-razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+from store.models import StoreProfile
+from payments.gateway import get_gateway, GatewayError, GatewayUnavailable
+from payments.registry import gateway_for_store
 
 # ==============================================================================
 # SELLER-FACING ORDER MANAGEMENT
 # ==============================================================================
+# Set only by the escrow scheduler and payment webhooks.
+ESCROW_STATUSES = {Order.OrderStatus.REFUND_PENDING, Order.OrderStatus.REFUNDED}
+# Orders a seller can no longer move.
+CLOSED_STATUSES = {Order.OrderStatus.CANCELLED, Order.OrderStatus.REFUND_PENDING, Order.OrderStatus.REFUNDED}
+
+
 class OrderViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -34,14 +43,44 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
         new_status = request.data.get('status')
         shipping_provider = request.data.get('shipping_provider')
         tracking_id = request.data.get('tracking_id')
-        valid_statuses = [choice[0] for choice in Order.OrderStatus.choices]
+        valid_statuses = [choice[0] for choice in Order.OrderStatus.choices if choice[0] not in ESCROW_STATUSES]
         if new_status not in valid_statuses:
             return Response({'error': 'Invalid status provided.'}, status=status.HTTP_400_BAD_REQUEST)
-        order.status = new_status
-        if new_status == 'SHIPPED':
-            order.shipping_provider = shipping_provider
-            order.tracking_id = tracking_id
-        order.save()
+        with transaction.atomic():
+            # The escrow scheduler may be refunding this order right now;
+            # lock it and decide from the status it really has.
+            order = Order.objects.select_for_update().select_related('store').get(pk=order.pk)
+            if order.status in CLOSED_STATUSES:
+                return Response(
+                    {'error': f"Order is already {order.get_status_display().lower()}."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            delivered = new_status == Order.OrderStatus.DELIVERED and order.status != new_status
+            paid = order.status in (Order.OrderStatus.HELD_FOR_SELLER_ACCEPTANCE, Order.OrderStatus.ACCEPTED_BY_SELLER)
+            if new_status == Order.OrderStatus.CANCELLED and paid:
+                escrow.cancel(order)
+                return Response(self.get_serializer(order).data)
+            if order.status == Order.OrderStatus.HELD_FOR_SELLER_ACCEPTANCE and new_status in (
+                Order.OrderStatus.ACCEPTED_BY_SELLER, Order.OrderStatus.SHIPPED, Order.OrderStatus.DELIVERED,
+            ):
+                # The buyer's payment was only authorized; take it now the seller has accepted.
+                try:
+                    escrow.capture(order)
+                except GatewayUnavailable as e:
+                    return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                except GatewayError as e:
+                    return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+            order.status = new_status
+            if new_status == Order.OrderStatus.ACCEPTED_BY_SELLER and not order.seller_accepted_at:
+                order.seller_accepted_at = timezone.now()
+            if new_status == 'SHIPPED':
+                order.shipping_provider = shipping_provider
+                order.tracking_id = tracking_id
+                if not order.shipped_at:
+                    order.shipped_at = timezone.now()
+            order.save()
+            if delivered:
+                trending.record_order([order.pk], 'sale')
         return Response(self.get_serializer(order).data)
 
 # ==============================================================================
@@ -99,7 +138,7 @@ class CreateOrderView(APIView):
                     customer_name = request.data.get('customer_name', user.full_name)
                     customer_phone = request.data.get('customer_phone', user.phone_number)
                     shipping_address = request.data.get('shipping_address')
-                    initial_status = Order.OrderStatus.PENDING
+                    initial_status = Order.OrderStatus.PENDING_PAYMENT
                     buyer_instance = user
                 else:
                     return Response({'error': 'Invalid user type.'}, status=status.HTTP_403_FORBIDDEN)
@@ -127,6 +166,11 @@ class CreateOrderView(APIView):
                     total_amount += item_total
                     order_items_to_create.append(OrderItem(order=new_order, product=product, quantity=quantity, price=product.price))
                 OrderItem.objects.bulk_create(order_items_to_create)
+                quantities = Counter()
+                for order_item in order_items_to_create:
+                    quantities[order_item.product_id] += order_item.quantity
+                # In-store orders are sales straight away; buyer orders count as add-to-order.
+                trending.record_after_commit('sale' if initial_status == Order.OrderStatus.DELIVERED else 'order', quantities)
                 new_order.total_amount = total_amount
                 new_order.save()
         except Exception as e:
@@ -134,16 +178,65 @@ class CreateOrderView(APIView):
         return Response({'order_id': new_order.id}, status=status.HTTP_201_CREATED)
 
 class CreatePaymentOrderView(APIView):
+    """
+    Creates a Razorpay order for a buyer checkout.
+
+    Pass `order_id` to pay for an existing pending Order: the amount comes from
+    the order, the Razorpay order is created on the store's own account when it
+    has one, and the Razorpay order id is saved so payment webhooks can move
+    the order forward. The legacy `amount` (+ optional `store_id`) form is
+    still accepted.
+    """
     permission_classes = [IsBuyer]
     def post(self, request):
-        amount = request.data.get('amount')
-        if not amount:
-            return Response({'error': 'Amount is required.'}, status=400)
+        order = None
+        order_id = request.data.get('order_id')
+        if order_id:
+            try:
+                order = Order.objects.select_related('store').get(
+                    pk=order_id, buyer=request.user, status=Order.OrderStatus.PENDING_PAYMENT
+                )
+            except (Order.DoesNotExist, ValueError):
+                return Response({'error': 'Order not found.'}, status=404)
+            order_amount = int(order.total_amount * 100)
+            gateway = gateway_for_store(order.store)
+        else:
+            amount = request.data.get('amount')
+            if not amount:
+                return Response({'error': 'Amount is required.'}, status=400)
+            try:
+                order_amount = int(float(amount) * 100)
+            except (TypeError, ValueError):
+                return Response({'error': 'Amount must be a number.'}, status=400)
+
+            store_id = request.data.get('store_id')
+            if store_id:
+                try:
+                    gateway = gateway_for_store(StoreProfile.objects.get(pk=store_id))
+                except (StoreProfile.DoesNotExist, ValueError):
+                    return Response({'error': 'Store not found.'}, status=404)
+            else:
+                gateway = get_gateway()
+
         try:
-            order_amount = int(float(amount) * 100)
-            razorpay_order = razorpay_client.order.create({
-                'amount': order_amount, 'currency': 'INR', 'payment_capture': '0'
-            })
-            return Response({'order_id': razorpay_order['id'], 'amount': razorpay_order['amount']})
-        except Exception as e:
-            return Response({'error': str(e)}, status=500)
\ No newline at end of file
+            razorpay_order = gateway.create_order(
+                order_amount,
+                payment_capture=False,
+                receipt=order.pk if order else None,
+                notes={'order_id': order.pk} if order else None,
+            )
+        except GatewayUnavailable as e:
+            return Response({'error': str(e)}, status=503)
+        except GatewayError as e:
+            return Response({'error': str(e)}, status=502)
+
+        if order:
+            # Earlier Razorpay orders stay matchable: the buyer may still pay one of them.
+            RazorpayOrder.objects.create(order=order, razorpay_order_id=razorpay_order['id'])
+            order.razorpay_order_id = razorpay_order['id']
+            order.save(update_fields=['razorpay_order_id'])
+        return Response({
+            'order_id': razorpay_order['id'],
+            'amount': razorpay_order['amount'],
+            'key_id': gateway.key_id,
+        })
@@ -0,0 +1,386 @@
+import hashlib
+import hmac
+import itertools
+import random
+import threading
+import time
+
+import razorpay
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# ==============================================================================
+# ERRORS
+# ==============================================================================
+class GatewayError(Exception):
+    """Raised when the payment provider rejects or fails a request."""
+
+
+class GatewayUnavailable(GatewayError):
+    """Raised when the provider is unreachable or the circuit breaker is open."""
+
+
+class SignatureError(GatewayError):
+    """Raised when a payment or webhook signature does not match."""
+
+
+DEFAULTS = {
+    'BACKEND': 'payments.gateway.RazorpayGateway',
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 10,
+    'MAX_RETRIES': 2,
+    'BACKOFF_FACTOR': 0.5,
+    'MAX_BACKOFF': 4,
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 20,
+    'BREAKER_THRESHOLD': 5,
+    'BREAKER_COOLDOWN': 30,
+    'REGISTRY_SIZE': 256,
+}
+
+
+def gateway_settings():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, 'PAYMENT_GATEWAY', {}))
+    return options
+
+
+# ==============================================================================
+# CIRCUIT BREAKER
+# ==============================================================================
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `cooldown` seconds, then lets a single trial call through (half-open).
+    Other callers keep failing fast until the trial reports back; if it
+    never does, another trial is allowed after a further cooldown.
+    """
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown:
+                raise GatewayUnavailable('Payment gateway is temporarily unavailable.')
+            # Half-open: this caller is the trial. Restarting the cooldown
+            # keeps everyone else out while it runs.
+            self._opened_at = now
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+# ==============================================================================
+# BASE GATEWAY
+# ==============================================================================
+class BaseGateway:
+    """
+    Common interface for payment gateways. Amounts are always in paise.
+    Signature checks are plain HMAC-SHA256 and never touch the network.
+    """
+    def __init__(self, key_id, key_secret, options=None):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.options = options or gateway_settings()
+
+    def create_order(self, amount, currency='INR', receipt=None, notes=None, payment_capture=True):
+        raise NotImplementedError
+
+    def fetch_payment(self, payment_id):
+        raise NotImplementedError
+
+    def capture_payment(self, payment_id, amount, currency='INR'):
+        raise NotImplementedError
+
+    def refund_payment(self, payment_id, amount=None, notes=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _sign(message, secret):
+        return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        expected = self._sign(f"{order_id}|{payment_id}", self.key_secret)
+        if not signature or not hmac.compare_digest(expected, str(signature)):
+            raise SignatureError('Payment signature verification failed.')
+        return True
+
+    def verify_webhook_signature(self, body, signature, secret):
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        expected = self._sign(body, secret)
+        if not signature or not hmac.compare_digest(expected, str(signature)):
+            raise SignatureError('Webhook signature verification failed.')
+        return True
+
+
+# ==============================================================================
+# RAZORPAY GATEWAY
+# ==============================================================================
+class TimeoutSession(requests.Session):
+    """A requests session that applies a default timeout to every call."""
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _retryable(error, idempotent):
+    """
+    Whether a failed call may be sent again. Idempotent calls retry any
+    connection error or timeout. Others (creating orders, refunds) only
+    retry when the connection was never made: once the request may have
+    reached Razorpay ("Connection aborted", a read timeout) a retry could
+    create a second order or refund.
+    """
+    if idempotent:
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    reason = getattr(error.args[0], 'reason', error.args[0])
+    # NewConnectionError and NameResolutionError subclass ConnectTimeoutError.
+    return isinstance(reason, urllib3.exceptions.ConnectTimeoutError)
+
+
+class RazorpayGateway(BaseGateway):
+    """
+    Razorpay client with a pooled keep-alive session, strict connect/read
+    timeouts, bounded retries with exponential backoff and a circuit breaker.
+
+    Order creation and refunds are only retried when the connection could
+    not be made, since anything later may mean Razorpay already acted.
+    """
+    def __init__(self, key_id, key_secret, options=None):
+        super().__init__(key_id, key_secret, options)
+        opts = self.options
+        self.session = TimeoutSession(timeout=(opts['CONNECT_TIMEOUT'], opts['READ_TIMEOUT']))
+        adapter = HTTPAdapter(
+            pool_connections=opts['POOL_CONNECTIONS'],
+            pool_maxsize=opts['POOL_MAXSIZE'],
+            max_retries=0,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.client = razorpay.Client(session=self.session, auth=(key_id, key_secret))
+        self.breaker = CircuitBreaker(opts['BREAKER_THRESHOLD'], opts['BREAKER_COOLDOWN'])
+
+    def _call(self, func, *args, idempotent=False):
+        self.breaker.before_call()
+        delay = self.options['BACKOFF_FACTOR']
+        for attempt in range(self.options['MAX_RETRIES'] + 1):
+            try:
+                result = func(*args)
+            except (razorpay.errors.BadRequestError, razorpay.errors.GatewayError) as e:
+                # The API answered, so the provider is healthy.
+                self.breaker.record_success()
+                raise GatewayError(str(e)) from e
+            except razorpay.errors.ServerError as e:
+                self.breaker.record_failure()
+                raise GatewayUnavailable(str(e)) from e
+            except requests.exceptions.RequestException as e:
+                if attempt >= self.options['MAX_RETRIES'] or not _retryable(e, idempotent):
+                    self.breaker.record_failure()
+                    raise GatewayUnavailable(str(e)) from e
+                time.sleep(min(delay * (1 + random.random() * 0.1), self.options['MAX_BACKOFF']))
+                delay *= 2
+            except Exception:
+                # Still report back, so a half-open trial is not left hanging.
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    def create_order(self, amount, currency='INR', receipt=None, notes=None, payment_capture=True):
+        data = {
+            'amount': int(amount),
+            'currency': currency,
+            'payment_capture': '1' if payment_capture else '0',
+        }
+        if receipt:
+            data['receipt'] = str(receipt)
+        if notes:
+            data['notes'] = notes
+        return self._call(self.client.order.create, data)
+
+    def fetch_payment(self, payment_id):
+        return self._call(self.client.payment.fetch, payment_id, idempotent=True)
+
+    def capture_payment(self, payment_id, amount, currency='INR'):
+        # Capturing an already captured payment is rejected, so retries are safe.
+        return self._call(self.client.payment.capture, payment_id, int(amount), {'currency': currency}, idempotent=True)
+
+    def refund_payment(self, payment_id, amount=None, notes=None):
+        data = {}
+        if amount is not None:
+            data['amount'] = int(amount)
+        if notes:
+            data['notes'] = notes
+        return self._call(self.client.payment.refund, payment_id, data)
+
+    def close(self):
+        self.session.close()
+
+
+# ==============================================================================
+# LOCAL FAKE GATEWAY (tests & benchmarks)
+# ==============================================================================
+class FakeGateway(BaseGateway):
+    """
+    In-process stand-in for Razorpay. Orders, payments and refunds live in
+    memory and signatures use the same HMAC scheme as the real API, so
+    `sign_payment` can be used to simulate a successful checkout.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, key_id='rzp_test_fake', key_secret='fake_secret', options=None):
+        super().__init__(key_id, key_secret, options)
+        self.orders = {}
+        self.payments = {}
+        self.refunds = []
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _new_id(self, prefix):
+        return f"{prefix}_fake{next(self._ids):010d}"
+
+    def create_order(self, amount, currency='INR', receipt=None, notes=None, payment_capture=True):
+        with self._lock:
+            self.calls.append(('create_order', amount))
+            order = {
+                'id': self._new_id('order'),
+                'entity': 'order',
+                'amount': int(amount),
+                'currency': currency,
+                'receipt': receipt,
+                'notes': notes or {},
+                'status': 'created',
+            }
+            self.orders[order['id']] = order
+            return dict(order)
+
+    def pay(self, order_id, captured=True):
+        """Simulate a buyer paying for `order_id` and return the payment."""
+        with self._lock:
+            order = self.orders[order_id]
+            payment = {
+                'id': self._new_id('pay'),
+                'entity': 'payment',
+                'order_id': order_id,
+                'amount': order['amount'],
+                'currency': order['currency'],
+                'status': 'captured' if captured else 'authorized',
+                'notes': order['notes'],
+            }
+            self.payments[payment['id']] = payment
+            order['status'] = 'paid'
+            return dict(payment)
+
+    def sign_payment(self, order_id, payment_id):
+        return self._sign(f"{order_id}|{payment_id}", self.key_secret)
+
+    def fetch_payment(self, payment_id):
+        self.calls.append(('fetch_payment', payment_id))
+        try:
+            return dict(self.payments[payment_id])
+        except KeyError:
+            raise GatewayError(f"The id provided does not exist: {payment_id}")
+
+    def capture_payment(self, payment_id, amount, currency='INR'):
+        self.calls.append(('capture_payment', payment_id))
+        payment = self.payments.get(payment_id)
+        if payment is None or payment['status'] != 'authorized':
+            raise GatewayError('This payment has already been captured or does not exist.')
+        payment['status'] = 'captured'
+        return dict(payment)
+
+    def refund_payment(self, payment_id, amount=None, notes=None):
+        self.calls.append(('refund_payment', payment_id))
+        payment = self.payments.get(payment_id)
+        if payment is None:
+            raise GatewayError(f"The id provided does not exist: {payment_id}")
+        if payment['status'] != 'captured':
+            raise GatewayError('The payment status should be captured for action to be taken.')
+        refund = {
+            'id': self._new_id('rfnd'),
+            'entity': 'refund',
+            'payment_id': payment_id,
+            'amount': payment['amount'] if amount is None else int(amount),
+            'notes': notes or {},
+        }
+        payment['status'] = 'refunded'
+        self.refunds.append(refund)
+        return dict(refund)
+
+
+# ==============================================================================
+# FACTORY
+# ==============================================================================
+_default_gateway = None
+_default_lock = threading.Lock()
+
+
+def build_gateway(key_id, key_secret, options=None):
+    options = options or gateway_settings()
+    backend = import_string(options['BACKEND'])
+    return backend(key_id, key_secret, options)
+
+
+def get_gateway():
+    """Return the process-wide gateway for the platform Razorpay account."""
+    global _default_gateway
+    if _default_gateway is None:
+        with _default_lock:
+            if _default_gateway is None:
+                _default_gateway = build_gateway(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+    return _default_gateway
+
+
+def reset_gateway():
+    """Drop the cached platform gateway (used when settings change in tests)."""
+    global _default_gateway
+    with _default_lock:
+        if _default_gateway is not None:
+            _default_gateway.close()
+        _default_gateway = None
+
+
+@receiver(setting_changed)
+def _reset_on_settings_change(setting, **kwargs):
+    if setting in ('PAYMENT_GATEWAY', 'RAZORPAY_KEY_ID', 'RAZORPAY_KEY_SECRET'):
+        reset_gateway()
+        if setting == 'PAYMENT_GATEWAY':
+            from .registry import registry
+            registry.clear()
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments.webhooks import process_pending
+
+
+class Command(BaseCommand):
+    help = "Apply queued Razorpay webhook events to orders in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PAYMENT_WEBHOOKS['BATCH_SIZE'])
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+        parser.add_argument('--interval', type=float, default=settings.PAYMENT_WEBHOOKS['POLL_INTERVAL'],
+                            help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            handled = process_pending(batch_size=options['batch_size'])
+            if handled:
+                self.stdout.write(f"Processed {handled} payment event(s).")
+            if options['once']:
+                break
+            if not handled:
+                time.sleep(options['interval'])
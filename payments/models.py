@@ -1,3 +1,31 @@
 from django.db import models
 
-# Create your models here.
+
+class PaymentEvent(models.Model):
+    """
+    Raw Razorpay webhook events, one row per provider event id. The payload
+    is stored exactly as received and never rewritten; only the processing
+    bookkeeping fields change after insert.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        PROCESSED = 'PROCESSED', 'Processed'
+        IGNORED = 'IGNORED', 'Ignored'
+        FAILED = 'FAILED', 'Failed'
+        # Money moved that the order workflow cannot settle on its own, e.g. a
+        # payment for a cancelled order; `error` says what to do.
+        REVIEW = 'REVIEW', 'Needs review'
+
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'], name='payment_event_queue_idx')]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id})"
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .gateway import build_gateway, get_gateway, gateway_settings
+
+
+class GatewayRegistry:
+    """
+    Bounded LRU of per-store gateways, so checkouts for a seller's own
+    Razorpay account reuse one client and HTTP session per store.
+
+    Entries are keyed by store id and remember a fingerprint of the
+    credentials they were built with. A store whose keys changed in another
+    worker is rebuilt on its next lookup; in this worker the StoreProfile
+    signals evict it straight away.
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(key_id, key_secret):
+        return hashlib.sha256(f"{key_id}:{key_secret}".encode()).hexdigest()
+
+    @staticmethod
+    def has_own_account(store):
+        return (
+            store.payment_method == 'RAZORPAY'
+            and bool(store.razorpay_key_id)
+            and bool(store.razorpay_key_secret)
+        )
+
+    def for_store(self, store):
+        """Return the gateway for `store`, falling back to the platform account."""
+        if not self.has_own_account(store):
+            return get_gateway()
+
+        fingerprint = self.fingerprint(store.razorpay_key_id, store.razorpay_key_secret)
+        with self._lock:
+            entry = self._entries.get(store.pk)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(store.pk)
+                return entry[1]
+            gateway = build_gateway(store.razorpay_key_id, store.razorpay_key_secret)
+            stale = [entry[1]] if entry is not None else []
+            self._entries[store.pk] = (fingerprint, gateway)
+            self._entries.move_to_end(store.pk)
+            while len(self._entries) > self.maxsize:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                stale.append(evicted)
+        for old in stale:
+            old.close()
+        return gateway
+
+    def invalidate(self, store_id):
+        with self._lock:
+            entry = self._entries.pop(store_id, None)
+        if entry is not None:
+            entry[1].close()
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for _, gateway in entries:
+            gateway.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, store_id):
+        return store_id in self._entries
+
+
+registry = GatewayRegistry(maxsize=gateway_settings()['REGISTRY_SIZE'])
+
+
+def gateway_for_store(store):
+    return registry.for_store(store)
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from store.models import StoreProfile
+from .registry import registry
+
+
+@receiver(post_save, sender=StoreProfile)
+@receiver(post_delete, sender=StoreProfile)
+def evict_store_gateway(sender, instance, **kwargs):
+    """
+    Drop the cached gateway whenever a store profile is saved or deleted,
+    so new Razorpay credentials take effect on the next checkout.
+    """
+    registry.invalidate(instance.pk)
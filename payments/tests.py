@@ -1,3 +1,341 @@
-from django.test import TestCase
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+import requests
+import urllib3
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from orders.models import Order
+from users.models import Seller, Buyer
+from .gateway import (
+    DEFAULTS, CircuitBreaker, FakeGateway, GatewayUnavailable, RazorpayGateway, get_gateway,
+)
+from .models import PaymentEvent
+from .registry import GatewayRegistry, registry
+from .webhooks import process_pending
+
+FAKE_GATEWAY = {'BACKEND': 'payments.gateway.FakeGateway'}
+
+
+@override_settings(PAYMENT_GATEWAY=FAKE_GATEWAY)
+class GatewayRegistryTests(TestCase):
+    def setUp(self):
+        self.registry = GatewayRegistry(maxsize=2)
+        self.store = self.make_store('9000000001', 'rzp_test_one', 'secret_one')
+
+    def make_store(self, phone, key_id, key_secret):
+        seller = Seller.objects.create_user(phone=phone, password='pass', name='Seller')
+        store = seller.store_profile
+        store.payment_method = 'RAZORPAY'
+        store.razorpay_key_id = key_id
+        store.razorpay_key_secret = key_secret
+        store.save()
+        return store
+
+    def test_same_store_reuses_gateway(self):
+        first = self.registry.for_store(self.store)
+        second = self.registry.for_store(self.store)
+        self.assertIs(first, second)
+        self.assertIsInstance(first, FakeGateway)
+        self.assertEqual(first.key_id, 'rzp_test_one')
+
+    def test_changed_credentials_rebuild_gateway(self):
+        first = self.registry.for_store(self.store)
+        self.store.razorpay_key_secret = 'rotated'
+        second = self.registry.for_store(self.store)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.key_secret, 'rotated')
+
+    def test_store_without_keys_uses_platform_gateway(self):
+        self.store.payment_method = 'UPI'
+        self.assertIs(self.registry.for_store(self.store), get_gateway())
+        self.assertEqual(len(self.registry), 0)
+
+    def test_least_recently_used_store_is_evicted(self):
+        second = self.make_store('9000000002', 'rzp_test_two', 'secret_two')
+        third = self.make_store('9000000003', 'rzp_test_three', 'secret_three')
+        self.registry.for_store(self.store)
+        self.registry.for_store(second)
+        self.registry.for_store(self.store)
+        self.registry.for_store(third)
+        self.assertIn(self.store.pk, self.registry)
+        self.assertNotIn(second.pk, self.registry)
+        self.assertIn(third.pk, self.registry)
+
+    def test_saving_store_profile_invalidates_shared_registry(self):
+        registry.for_store(self.store)
+        self.assertIn(self.store.pk, registry)
+        self.store.razorpay_key_id = 'rzp_test_new'
+        self.store.save()
+        self.assertNotIn(self.store.pk, registry)
+
+
+@override_settings(PAYMENT_GATEWAY=FAKE_GATEWAY)
+class CreatePaymentOrderViewTests(TestCase):
+    def setUp(self):
+        seller = Seller.objects.create_user(phone='9000000010', password='pass', name='Seller')
+        self.store = seller.store_profile
+        self.store.payment_method = 'RAZORPAY'
+        self.store.razorpay_key_id = 'rzp_test_store'
+        self.store.razorpay_key_secret = 'store_secret'
+        self.store.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=Buyer.objects.create_user(email='buyer@example.com'))
+
+    def test_order_is_created_on_store_account(self):
+        response = self.client.post('/user/orders/create-payment-order/', {
+            'amount': '499.50', 'store_id': self.store.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['key_id'], 'rzp_test_store')
+        self.assertEqual(response.data['amount'], 49950)
+        gateway = registry.for_store(self.store)
+        self.assertIn(response.data['order_id'], gateway.orders)
+
+    def test_order_without_store_uses_platform_account(self):
+        response = self.client.post('/user/orders/create-payment-order/', {'amount': '10'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(response.data['order_id'], get_gateway().orders)
+
+
+def _refused():
+    reason = urllib3.exceptions.NewConnectionError(None, 'Connection refused')
+    return requests.exceptions.ConnectionError(urllib3.exceptions.MaxRetryError(None, '/v1/orders', reason))
+
+
+def _aborted():
+    return requests.exceptions.ConnectionError(
+        urllib3.exceptions.ProtocolError('Connection aborted.', ConnectionResetError()),
+    )
+
+
+class GatewayRetryTests(SimpleTestCase):
+    def setUp(self):
+        self.gateway = RazorpayGateway('rzp_test', 'secret', {**DEFAULTS, 'BACKOFF_FACTOR': 0, 'MAX_RETRIES': 2})
+
+    def call(self, errors, idempotent=False):
+        func = mock.Mock(side_effect=errors)
+        try:
+            return self.gateway._call(func, idempotent=idempotent), func.call_count
+        except GatewayUnavailable:
+            return None, func.call_count
+
+    def test_orders_and_refunds_only_retry_failed_connects(self):
+        self.assertEqual(self.call([_refused(), _refused(), {'id': 'order_1'}]), ({'id': 'order_1'}, 3))
+        self.assertEqual(self.call([requests.exceptions.ConnectTimeout(), {'id': 'order_2'}]), ({'id': 'order_2'}, 2))
+        # The request may have reached Razorpay: never send it twice.
+        self.assertEqual(self.call([_aborted(), {'id': 'order_3'}]), (None, 1))
+        self.assertEqual(self.call([requests.exceptions.ReadTimeout(), {'id': 'order_4'}]), (None, 1))
+
+    def test_idempotent_calls_retry_any_connection_error(self):
+        self.assertEqual(self.call([_aborted(), requests.exceptions.ReadTimeout(), 'ok'], idempotent=True), ('ok', 3))
+        self.assertEqual(self.call([_aborted()] * 3, idempotent=True), (None, 3))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = mock.patch('payments.gateway.time.monotonic', return_value=100.0)
+        self.now = self.clock.start()
+        self.addCleanup(self.clock.stop)
+        self.breaker = CircuitBreaker(threshold=2, cooldown=30)
+
+    def trip(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open)
+
+    def test_open_breaker_fails_fast(self):
+        self.trip()
+        self.now.return_value = 120.0
+        with self.assertRaises(GatewayUnavailable):
+            self.breaker.before_call()
+
+    def test_half_open_lets_one_trial_through(self):
+        self.trip()
+        self.now.return_value = 131.0
+        self.breaker.before_call()
+        for _ in range(3):
+            with self.assertRaises(GatewayUnavailable):
+                self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.is_open)
+        self.breaker.before_call()
+
+    def test_failed_trial_reopens(self):
+        self.trip()
+        self.now.return_value = 131.0
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.now.return_value = 150.0
+        with self.assertRaises(GatewayUnavailable):
+            self.breaker.before_call()
+        self.now.return_value = 162.0
+        self.breaker.before_call()
+
+    def test_concurrent_callers_get_one_trial(self):
+        self.trip()
+        self.now.return_value = 131.0
+        passed, barrier = [], threading.Barrier(8)
+
+        def caller():
+            barrier.wait()
+            try:
+                self.breaker.before_call()
+                passed.append(1)
+            except GatewayUnavailable:
+                pass
+
+        threads = [threading.Thread(target=caller) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(passed), 1)
+
+
+WEBHOOKS = {'SECRET': 'webhook_secret', 'BATCH_SIZE': 200, 'POLL_INTERVAL': 1.0}
+
+
+@override_settings(PAYMENT_GATEWAY=FAKE_GATEWAY, PAYMENT_WEBHOOKS=WEBHOOKS)
+class RazorpayWebhookTests(TestCase):
+    def setUp(self):
+        self.store = Seller.objects.create_user(phone='9000000020', password='pass', name='Seller').store_profile
+        self.client = APIClient()
+        self.client.force_authenticate(user=Buyer.objects.create_user(email='webhook@example.com'))
+        self.order = Order.objects.create(
+            store=self.store, buyer=Buyer.objects.get(), customer_name='Buyer', customer_phone='9000000021',
+            shipping_address='Kochi', total_amount='250.00',
+        )
+        self.events = 0
+
+    def checkout(self):
+        response = self.client.post('/user/orders/create-payment-order/', {'order_id': self.order.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['order_id']
+
+    def deliver(self, payload, event_id=None, signature=None, secret=WEBHOOKS['SECRET']):
+        body = json.dumps(payload).encode()
+        if signature is None:
+            signature = FakeGateway._sign(body.decode(), secret)
+        if event_id is None:
+            self.events += 1
+            event_id = f"evt_{self.events}"
+        return self.client.generic(
+            'POST', '/api/payments/webhooks/razorpay/', body, content_type='application/json',
+            HTTP_X_RAZORPAY_SIGNATURE=signature, HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def captured(self, rzp_order_id, payment_id='pay_1'):
+        return {
+            'event': 'payment.captured', 'created_at': 1700000000,
+            'payload': {'payment': {'entity': {'id': payment_id, 'order_id': rzp_order_id, 'amount': 25000}}},
+        }
+
+    def refunded(self, amount, amount_refunded, payment_id='pay_1'):
+        return {
+            'event': 'refund.processed',
+            'payload': {
+                'refund': {'entity': {'id': f"rfnd_{amount}", 'payment_id': payment_id, 'amount': amount}},
+                'payment': {'entity': {'id': payment_id, 'amount': 25000, 'amount_refunded': amount_refunded}},
+            },
+        }
+
+    def process(self):
+        process_pending()
+        self.order.refresh_from_db()
+
+    def test_bad_signature_is_rejected(self):
+        response = self.deliver(self.captured('order_x'), signature='forged')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_store_account_events_use_the_store_secret(self):
+        self.store.payment_method = 'RAZORPAY'
+        self.store.razorpay_key_id = 'rzp_test_store'
+        self.store.razorpay_key_secret = 'store_secret'
+        self.store.save()
+        payload = self.captured(self.checkout())
+        self.assertEqual(self.deliver(payload).status_code, 503)  # no webhook secret set yet
+
+        self.store.razorpay_webhook_secret = 'store_webhook_secret'
+        self.store.save()
+        self.assertEqual(self.deliver(payload).status_code, 400)
+        self.assertEqual(self.deliver(payload, secret='store_webhook_secret').status_code, 200)
+        self.process()
+        self.assertEqual(self.order.status, Order.OrderStatus.HELD_FOR_SELLER_ACCEPTANCE)
+
+    def test_payload_must_be_an_object(self):
+        self.assertEqual(self.deliver(['payment.captured']).status_code, 400)
+        self.assertEqual(self.deliver(42).status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_duplicate_delivery_is_stored_once(self):
+        payload = self.captured(self.checkout())
+        self.assertEqual(self.deliver(payload, event_id='evt_same').data['status'], 'queued')
+        self.assertEqual(self.deliver(payload, event_id='evt_same').data['status'], 'duplicate')
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+    def test_batch_holds_paid_orders(self):
+        rzp_order_id = self.checkout()
+        self.deliver(self.captured(rzp_order_id))
+        self.deliver({'event': 'payment.failed', 'payload': {}})
+        self.deliver({'event': 'payment.captured', 'payload': []})
+        self.process()
+        self.assertEqual(self.order.status, Order.OrderStatus.HELD_FOR_SELLER_ACCEPTANCE)
+        self.assertEqual(self.order.razorpay_payment_id, 'pay_1')
+        self.assertIsNotNone(self.order.next_deadline_at)
+        self.assertEqual(
+            list(PaymentEvent.objects.order_by('id').values_list('status', flat=True)),
+            [PaymentEvent.Status.PROCESSED, PaymentEvent.Status.IGNORED, PaymentEvent.Status.FAILED],
+        )
+
+    def test_payment_on_earlier_razorpay_order_is_matched(self):
+        first = self.checkout()
+        self.checkout()
+        self.deliver(self.captured(first))
+        self.process()
+        self.assertEqual(self.order.status, Order.OrderStatus.HELD_FOR_SELLER_ACCEPTANCE)
+
+    def test_payment_for_cancelled_order_needs_review(self):
+        rzp_order_id = self.checkout()
+        Order.objects.filter(pk=self.order.pk).update(status=Order.OrderStatus.CANCELLED)
+        self.deliver(self.captured(rzp_order_id))
+        self.process()
+        self.assertEqual(self.order.status, Order.OrderStatus.CANCELLED)
+        event = PaymentEvent.objects.get()
+        self.assertEqual(event.status, PaymentEvent.Status.REVIEW)
+        self.assertIn('pay_1', event.error)
+
+    def test_second_payment_needs_review(self):
+        first, second = self.checkout(), self.checkout()
+        self.deliver(self.captured(first, 'pay_1'))
+        self.deliver(self.captured(second, 'pay_2'))
+        self.process()
+        self.assertEqual(self.order.razorpay_payment_id, 'pay_1')
+        self.assertEqual(
+            list(PaymentEvent.objects.order_by('id').values_list('status', flat=True)),
+            [PaymentEvent.Status.PROCESSED, PaymentEvent.Status.REVIEW],
+        )
+
+    def test_only_full_refund_of_held_order_refunds_it(self):
+        self.deliver(self.captured(self.checkout()))
+        self.process()
+        self.deliver(self.refunded(10000, 10000))
+        self.process()
+        self.assertEqual(self.order.status, Order.OrderStatus.HELD_FOR_SELLER_ACCEPTANCE)
+        self.assertEqual(PaymentEvent.objects.latest('id').status, PaymentEvent.Status.REVIEW)
+        self.deliver(self.refunded(15000, 25000))
+        self.process()
+        self.assertEqual(self.order.status, Order.OrderStatus.REFUNDED)
+        self.assertIsNone(self.order.next_deadline_at)
+
+    def test_refund_of_shipped_order_needs_review(self):
+        self.deliver(self.captured(self.checkout()))
+        self.process()
+        Order.objects.filter(pk=self.order.pk).update(status=Order.OrderStatus.SHIPPED)
+        self.deliver(self.refunded(25000, 25000))
+        self.process()
+        self.assertEqual(self.order.status, Order.OrderStatus.SHIPPED)
+        self.assertEqual(PaymentEvent.objects.latest('id').status, PaymentEvent.Status.REVIEW)
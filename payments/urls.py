@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import RazorpayWebhookView
+
+urlpatterns = [
+    path('webhooks/razorpay/', RazorpayWebhookView.as_view(), name='razorpay-webhook'),
+]
@@ -1,3 +1,44 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from .gateway import get_gateway, SignatureError
+from .webhooks import ingest_event, webhook_secret
+
+
+class RazorpayWebhookView(APIView):
+    """
+    Receives Razorpay webhooks, from the platform account and from sellers'
+    own accounts (see webhooks.webhook_secret). The request only verifies
+    the signature and appends the raw event; order updates happen in the
+    `process_payment_events` worker, so bursts never tie up web workers.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        body = request.body
+        try:
+            payload = json.loads(body)
+        except (ValueError, json.JSONDecodeError):
+            return Response({'error': 'Invalid payload.'}, status=status.HTTP_400_BAD_REQUEST)
+        secret = webhook_secret(payload) if isinstance(payload, dict) else settings.PAYMENT_WEBHOOKS['SECRET']
+        if not secret:
+            return Response({'error': 'Webhooks are not configured.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        signature = request.META.get('HTTP_X_RAZORPAY_SIGNATURE')
+        try:
+            get_gateway().verify_webhook_signature(body, signature, secret)
+        except SignatureError:
+            return Response({'error': 'Invalid signature.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            created = ingest_event(body, request.META.get('HTTP_X_RAZORPAY_EVENT_ID'))
+        except (ValueError, json.JSONDecodeError):
+            return Response({'error': 'Invalid payload.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Razorpay retries anything that is not 2xx, so duplicates are acknowledged too.
+        return Response({'status': 'queued' if created else 'duplicate'}, status=status.HTTP_200_OK)
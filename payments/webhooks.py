@@ -0,0 +1,236 @@
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from orders.models import Order, RazorpayOrder
+from .registry import GatewayRegistry
+from .models import PaymentEvent
+
+Status = Order.OrderStatus
+
+# Event types that mean the buyer's money is now held for the seller.
+PAID_EVENTS = {'payment.authorized', 'payment.captured', 'order.paid'}
+REFUND_EVENTS = {'refund.processed'}
+HANDLED_EVENTS = PAID_EVENTS | REFUND_EVENTS
+
+# Orders a full refund may move to REFUNDED. A refund in any other state
+# (the goods already shipped, say) is left for a person to settle.
+REFUNDABLE_STATUSES = {Status.HELD_FOR_SELLER_ACCEPTANCE, Status.ACCEPTED_BY_SELLER, Status.REFUND_PENDING}
+
+
+# ==============================================================================
+# INGESTION
+# ==============================================================================
+def _razorpay_order_id(payload):
+    payment = _entity(payload, 'payment')
+    return payment.get('order_id') or _entity(payload, 'order').get('id')
+
+
+def webhook_secret(payload):
+    """
+    The secret `payload` has to be signed with. Orders created on a store's
+    own Razorpay account (see payments.registry) are signed with that
+    store's webhook secret, which is None until the seller sets it; any
+    other event uses PAYMENT_WEBHOOKS['SECRET']. The payload is unverified
+    here, but it only picks the secret the signature is then checked with.
+    """
+    try:
+        rzp_order_id = _razorpay_order_id(payload)
+    except AttributeError:
+        rzp_order_id = None
+    if rzp_order_id and isinstance(rzp_order_id, str):
+        link = RazorpayOrder.objects.select_related('order__store').filter(razorpay_order_id=rzp_order_id).first()
+        if link is not None and GatewayRegistry.has_own_account(link.order.store):
+            return link.order.store.razorpay_webhook_secret or None
+    return settings.PAYMENT_WEBHOOKS['SECRET'] or None
+
+
+def ingest_event(body, event_id=None):
+    """
+    Store a verified webhook body. Returns True if the event is new and False
+    if Razorpay re-delivered an event we already have.
+    """
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError('Webhook payload must be a JSON object.')
+    if not event_id:
+        # Razorpay always sends X-Razorpay-Event-Id; hash the body as a fallback.
+        event_id = 'sha256:' + hashlib.sha256(body).hexdigest()
+    _, created = PaymentEvent.objects.get_or_create(
+        event_id=event_id,
+        defaults={'event_type': str(payload.get('event', ''))[:50], 'payload': payload},
+    )
+    return created
+
+
+# ==============================================================================
+# PROCESSING
+# ==============================================================================
+def _entity(payload, name):
+    return (payload.get('payload', {}).get(name) or {}).get('entity') or {}
+
+
+def _event_time(payload):
+    created_at = payload.get('created_at')
+    if created_at:
+        return datetime.datetime.fromtimestamp(int(created_at), tz=datetime.timezone.utc)
+    return timezone.now()
+
+
+def _claim_batch(batch_size):
+    queryset = PaymentEvent.objects.filter(status=PaymentEvent.Status.PENDING).order_by('id')
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    return list(queryset[:batch_size])
+
+
+def _apply_payments(payments):
+    """
+    Hold the orders paid for by `payments`, a list of (event pk, Razorpay
+    order id, payment id, paid at) in event order. Returns {event pk: reason}
+    for payments that arrived on an order no longer waiting for one, e.g.
+    cancelled for non-payment or already paid through another Razorpay order.
+    """
+    if not payments:
+        return {}
+    order_ids = dict(
+        RazorpayOrder.objects.filter(razorpay_order_id__in={payment[1] for payment in payments})
+        .values_list('razorpay_order_id', 'order_id')
+    )
+    orders = Order.objects.select_for_update().in_bulk(set(order_ids.values()))
+    held, review = {}, {}
+    for pk, rzp_order_id, payment_id, paid_at in payments:
+        order = orders.get(order_ids.get(rzp_order_id))
+        if order is None:
+            continue
+        if order.status == Status.PENDING_PAYMENT:
+            order.status = Status.HELD_FOR_SELLER_ACCEPTANCE
+            order.razorpay_payment_id = payment_id or order.razorpay_payment_id
+            order.paid_at = paid_at
+            order.next_deadline_at = order.compute_next_deadline()
+            held[order.pk] = order
+        elif payment_id and payment_id != order.razorpay_payment_id:
+            review[pk] = (
+                f"Payment {payment_id} arrived for Order #{order.pk}, which is "
+                f"{order.get_status_display().lower()}; refund it from the Razorpay dashboard."
+            )
+    Order.objects.bulk_update(
+        held.values(), ['status', 'razorpay_payment_id', 'paid_at', 'next_deadline_at'], batch_size=500,
+    )
+    return review
+
+
+def _apply_refunds(refunds):
+    """
+    Mark orders REFUNDED for `refunds`, a list of (event pk, payment id,
+    payment amount or None, amount refunded so far) in paise. Only a full
+    refund of an order in REFUNDABLE_STATUSES changes it; returns
+    {event pk: reason} for the rest.
+    """
+    if not refunds:
+        return {}
+    orders = {
+        order.razorpay_payment_id: order
+        for order in Order.objects.select_for_update().filter(
+            razorpay_payment_id__in={refund[1] for refund in refunds},
+        )
+    }
+    refunded, review = {}, {}
+    for pk, payment_id, amount, returned in refunds:
+        order = orders.get(payment_id)
+        if order is None or order.status == Status.REFUNDED:
+            continue
+        if amount is None:
+            amount = int(order.total_amount * 100)
+        if returned < amount:
+            review[pk] = f"Partial refund of {returned} of {amount} paise for Order #{order.pk}; order left as is."
+        elif order.status not in REFUNDABLE_STATUSES:
+            review[pk] = (
+                f"Order #{order.pk} was refunded while {order.get_status_display().lower()}; order left as is."
+            )
+        else:
+            order.status = Status.REFUNDED
+            order.next_deadline_at = None
+            refunded[order.pk] = order
+    Order.objects.bulk_update(refunded.values(), ['status', 'next_deadline_at'], batch_size=500)
+    return review
+
+
+def process_batch(batch_size=None):
+    """
+    Apply one batch of pending events and return how many were handled.
+
+    Transitions are conditional on the order's current status, so replays,
+    duplicate deliveries and out-of-order events can never double-apply.
+    Payments and refunds the workflow cannot settle are marked REVIEW.
+    Orders for the whole batch are loaded and written in bulk.
+    """
+    batch_size = batch_size or settings.PAYMENT_WEBHOOKS['BATCH_SIZE']
+    with transaction.atomic():
+        events = _claim_batch(batch_size)
+        if not events:
+            return 0
+
+        payments, refunds = [], []
+        ignored, failed = [], {}
+        for event in events:
+            if event.event_type not in HANDLED_EVENTS:
+                ignored.append(event.pk)
+                continue
+            try:
+                if event.event_type in REFUND_EVENTS:
+                    refund = _entity(event.payload, 'refund')
+                    payment = _entity(event.payload, 'payment')
+                    if refund.get('payment_id'):
+                        # The payment entity carries the running total over partial refunds.
+                        amount = payment.get('amount')
+                        refunds.append((
+                            event.pk, refund['payment_id'], None if amount is None else int(amount),
+                            int(payment.get('amount_refunded', refund.get('amount')) or 0),
+                        ))
+                    continue
+                payment = _entity(event.payload, 'payment')
+                rzp_order_id = _razorpay_order_id(event.payload)
+                if rzp_order_id:
+                    payments.append((event.pk, rzp_order_id, payment.get('id'), _event_time(event.payload)))
+            except (AttributeError, TypeError, ValueError) as e:
+                failed[event.pk] = f"Malformed payload: {e}"
+
+        review = _apply_payments(payments)
+        review.update(_apply_refunds(refunds))
+
+        now = timezone.now()
+        for pk, error in failed.items():
+            PaymentEvent.objects.filter(pk=pk).update(
+                status=PaymentEvent.Status.FAILED, processed_at=now, error=error,
+            )
+        for pk, error in review.items():
+            PaymentEvent.objects.filter(pk=pk).update(
+                status=PaymentEvent.Status.REVIEW, processed_at=now, error=error,
+            )
+        skipped = set(ignored) | set(failed) | set(review)
+        processed = [event.pk for event in events if event.pk not in skipped]
+        if ignored:
+            PaymentEvent.objects.filter(pk__in=ignored).update(
+                status=PaymentEvent.Status.IGNORED, processed_at=now,
+            )
+        PaymentEvent.objects.filter(pk__in=processed).update(
+            status=PaymentEvent.Status.PROCESSED, processed_at=now,
+        )
+    return len(events)
+
+
+def process_pending(batch_size=None, max_batches=None):
+    """Drain the event queue in batches. Returns the number of events handled."""
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        handled = process_batch(batch_size)
+        if not handled:
+            break
+        total += handled
+        batches += 1
+    return total
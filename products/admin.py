@@ -1,4 +1,17 @@
 from django.contrib import admin
-from .models import Product
+from .models import Product, ProductTransferJob, StockHistoryDaily
 # Register your models here.
-admin.site.register(Product)
\ No newline at end of file
+admin.site.register(Product)
+
+
+@admin.register(ProductTransferJob)
+class ProductTransferJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'store', 'kind', 'file_format', 'status', 'processed_rows', 'error_count', 'created_at')
+    list_filter = ('kind', 'status')
+
+
+@admin.register(StockHistoryDaily)
+class StockHistoryDailyAdmin(admin.ModelAdmin):
+    list_display = ('day', 'store', 'product', 'action', 'change_total', 'change_online', 'entries')
+    list_filter = ('action',)
+    raw_id_fields = ('store', 'product')
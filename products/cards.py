@@ -0,0 +1,100 @@
+"""
+Read-only fast path for product lists.
+
+ProductSerializer builds a tree of DRF field objects per row and its
+`average_rating`/`store.seller_phone` fields cost a query per product.
+ProductCardSerializer produces the same JSON from values_list() rows: one
+query for the page, one for its images and one for its ratings.
+"""
+from decimal import Decimal
+
+from django.db.models import Avg, Count
+
+from keralasellers import media
+from .models import Product, ProductImage, Review
+
+# The page projection. Rows are unpacked positionally in _card(), so keep
+# the two in step.
+COLUMNS = (
+    'id', 'name', 'model_name', 'description', 'price', 'mrp', 'total_stock',
+    'online_stock', 'sale_type', 'main_image', 'is_active', 'store__name',
+    'store__seller__phone', 'store__whatsapp_number', 'category', 'attributes',
+)
+
+_CENTS = Decimal('0.01')
+
+
+def _money(value):
+    # Matches DecimalField(decimal_places=2) with COERCE_DECIMAL_TO_STRING.
+    return None if value is None else f"{value.quantize(_CENTS):f}"
+
+
+class ProductCardSerializer:
+    """
+    Drop-in for `ProductSerializer(..., many=True).data` on read-only list
+    pages. `products` is a Product queryset (its select/prefetch settings
+    are ignored) or the rows of one already projected with
+    `.values_list(*COLUMNS)`.
+    """
+
+    def __init__(self, products, context=None):
+        self.products = products
+        self.context = context or {}
+
+    @classmethod
+    def project(cls, queryset):
+        """The queryset reduced to the card columns, suitable for paginating."""
+        return queryset.prefetch_related(None).values_list(*COLUMNS)
+
+    @property
+    def data(self):
+        rows = self.products
+        if hasattr(rows, 'values_list'):
+            rows = self.project(rows)
+        rows = list(rows)
+        if not rows:
+            return []
+        ids = [row[0] for row in rows]
+        request = self.context.get('request')
+        main_url = media.for_request(request, Product._meta.get_field('main_image').storage)
+        image_url = media.for_request(request, ProductImage._meta.get_field('image').storage)
+
+        images = {}
+        for image_id, product_id, name in (
+            ProductImage.objects.filter(product_id__in=ids).order_by('pk').values_list('pk', 'product_id', 'image')
+        ):
+            url = image_url(name)
+            images.setdefault(product_id, []).append({'id': image_id, 'image': url, 'image_url': url})
+        ratings = {
+            product_id: (average, count)
+            for product_id, average, count in (
+                Review.objects.filter(product_id__in=ids).values('product_id')
+                .annotate(average=Avg('rating'), count=Count('id')).values_list('product_id', 'average', 'count')
+            )
+        }
+        return [self._card(row, main_url, images, ratings) for row in rows]
+
+    @staticmethod
+    def _card(row, main_url, images, ratings):
+        (pk, name, model_name, description, price, mrp, total_stock, online_stock, sale_type,
+         main_image, is_active, store_name, seller_phone, whatsapp_number, category, attributes) = row
+        average, count = ratings.get(pk, (None, 0))
+        return {
+            'id': pk,
+            'name': name,
+            'model_name': model_name,
+            'description': description,
+            'price': _money(price),
+            'mrp': _money(mrp),
+            'total_stock': total_stock,
+            'online_stock': online_stock,
+            'sale_type': sale_type,
+            'main_image_url': main_url(main_image),
+            'sub_images': images.get(pk, []),
+            'is_active': is_active,
+            'store': {'name': store_name, 'seller_phone': seller_phone, 'whatsapp_number': whatsapp_number},
+            'category': category,
+            'attributes': attributes,
+            'average_rating': float(average or 0),
+            'review_count': count,
+        }
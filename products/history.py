@@ -0,0 +1,128 @@
+import datetime
+import gzip
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.utils import timezone
+
+from .models import StockHistory, StockHistoryDaily
+
+ARCHIVE_FIELDS = [
+    'id', 'product_id', 'store_id', 'user_content_type_id', 'user_object_id',
+    'action', 'change_total', 'change_online', 'note', 'timestamp',
+]
+
+
+def _config(name):
+    return settings.STOCK_HISTORY[name]
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def cutoff(now=None):
+    """Start of the oldest day still kept as raw StockHistory rows."""
+    today = timezone.localdate(now)
+    return _day_start(today - datetime.timedelta(days=_config('RETENTION_DAYS')))
+
+
+def _archive_path(day):
+    directory = _config('ARCHIVE_DIR')
+    if not directory:
+        return None
+    return Path(directory) / f"stock-history-{day:%Y-%m-%d}.jsonl.gz"
+
+
+def _write_archive(path, rows):
+    """
+    Write the rows to a temporary file next to `path` and return it. The same
+    temporary name is reused for the day, so a rerun after a failed attempt
+    overwrites the leftover instead of adding to it.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            row['timestamp'] = row['timestamp'].isoformat()
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return tmp
+
+
+def _roll_up(day, rows):
+    """Add one day's history, summed per (product, action), to the daily table."""
+    totals = {
+        (row['product_id'], row['action']): row
+        for row in rows.values('product_id', 'store_id', 'action').annotate(
+            total=Sum('change_total'), online=Sum('change_online'), count=Count('id'),
+        )
+    }
+    existing = {
+        (rollup.product_id, rollup.action): rollup
+        for rollup in StockHistoryDaily.objects.filter(day=day, product_id__in={key[0] for key in totals})
+    }
+    creates, updates = [], []
+    for key, row in totals.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            creates.append(StockHistoryDaily(
+                store_id=row['store_id'], product_id=row['product_id'], day=day, action=row['action'],
+                change_total=row['total'], change_online=row['online'], entries=row['count'],
+            ))
+        else:
+            rollup.change_total += row['total']
+            rollup.change_online += row['online']
+            rollup.entries += row['count']
+            updates.append(rollup)
+    StockHistoryDaily.objects.bulk_create(creates, batch_size=500)
+    StockHistoryDaily.objects.bulk_update(updates, ['change_total', 'change_online', 'entries'], batch_size=500)
+
+
+def archive_day(day):
+    """
+    Move one day of raw history out of StockHistory: the rows are summed
+    into StockHistoryDaily and deleted in one transaction, and written to
+    that day's archive file (when ARCHIVE_DIR is set), which only appears
+    once the delete has committed. Returns the number of rows archived.
+    """
+    start = _day_start(day)
+    rows = StockHistory.objects.filter(timestamp__gte=start, timestamp__lt=_day_start(day + datetime.timedelta(days=1)))
+    path = _archive_path(day)
+    tmp = None
+    try:
+        with transaction.atomic():
+            if path is not None:
+                tmp = _write_archive(path, rows.order_by('pk').values(*ARCHIVE_FIELDS).iterator(chunk_size=2000))
+                transaction.on_commit(lambda: os.replace(tmp, path))
+            _roll_up(day, rows)
+            deleted, _ = rows.delete()
+    except Exception:
+        if tmp is not None:
+            tmp.unlink(missing_ok=True)
+        raise
+    return deleted
+
+
+def archive(now=None):
+    """
+    Archive every whole day older than RETENTION_DAYS, oldest first, and
+    drop rollups past ROLLUP_RETENTION_DAYS. Safe to run from cron at any
+    interval. Returns (rows archived, days processed).
+    """
+    limit = cutoff(now)
+    archived = days = 0
+    while True:
+        oldest = StockHistory.objects.filter(timestamp__lt=limit).aggregate(oldest=Min('timestamp'))['oldest']
+        if oldest is None:
+            break
+        archived += archive_day(timezone.localdate(oldest))
+        days += 1
+
+    keep_days = _config('ROLLUP_RETENTION_DAYS')
+    if keep_days is not None:
+        StockHistoryDaily.objects.filter(day__lt=timezone.localdate(now) - datetime.timedelta(days=keep_days)).delete()
+    return archived, days
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from products.history import archive, cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive StockHistory rows older than STOCK_HISTORY['RETENTION_DAYS'] into "
+        "daily per-product rollups (and the raw archive files), one day at a time."
+    )
+
+    def handle(self, *args, **options):
+        archived, days = archive()
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} history row(s) from {days} day(s) before {cutoff():%Y-%m-%d}."
+        ))
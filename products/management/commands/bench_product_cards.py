@@ -0,0 +1,95 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from products.cards import ProductCardSerializer
+from products.models import Product, ProductImage, Review
+from products.serializers import ProductSerializer
+from users.models import Buyer, Seller
+
+
+def _timed(func, repeat):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        elapsed = (time.perf_counter() - start) / repeat
+    return result, elapsed, len(queries.captured_queries) // repeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark list-page product serialization: ProductSerializer(many=True) "
+        "versus ProductCardSerializer, for pages of 50 and 500 products. Runs in "
+        "a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='50,500', help='Comma-separated page sizes.')
+        parser.add_argument('--images', type=int, default=2, help='Sub-images per product.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        store = Seller.objects.create_user(phone='9000000000', password='bench').store_profile
+        products = Product.objects.bulk_create(
+            [
+                Product(store=store, name=f"product-{i}", description="A product " * 20,
+                        price=rng.randint(10, 5000), mrp=5000, total_stock=10, online_stock=5,
+                        main_image=f"product_images/main/{i}.jpg", attributes={'colour': 'red', 'size': i})
+                for i in range(max(sizes))
+            ],
+            batch_size=1000,
+        )
+        ProductImage.objects.bulk_create(
+            [ProductImage(product=product, image=f"product_images/sub/{product.pk}-{n}.jpg")
+             for product in products for n in range(options['images'])],
+            batch_size=1000,
+        )
+        buyers = Buyer.objects.bulk_create([Buyer(email=f"buyer{i}@example.com") for i in range(5)])
+        Review.objects.bulk_create(
+            [Review(product=product, buyer=buyer, rating=rng.randint(1, 5))
+             for product in products for buyer in rng.sample(buyers, rng.randint(0, 3))],
+            batch_size=1000,
+        )
+        request = APIRequestFactory().get('/api/products/')
+        context = {'request': request}
+        renderer = JSONRenderer()
+
+        for size in sizes:
+            queryset = Product.objects.filter(pk__in=[p.pk for p in products[:size]]).order_by('pk')
+
+            def drf():
+                page = queryset.select_related('store', 'category').prefetch_related('sub_images', 'reviews')
+                return ProductSerializer(page, many=True, context=context).data
+
+            def cards():
+                return ProductCardSerializer(queryset, context=context).data
+
+            expected, drf_seconds, drf_queries = _timed(drf, options['repeat'])
+            result, card_seconds, card_queries = _timed(cards, options['repeat'])
+            assert renderer.render(result) == renderer.render(expected)
+            self.stdout.write(f"\n{size} products")
+            for label, seconds, queries in (
+                ('ProductSerializer', drf_seconds, drf_queries),
+                ('ProductCardSerializer', card_seconds, card_queries),
+            ):
+                self.stdout.write(
+                    f"  {label:<22} {seconds * 1000:9.2f} ms  {size / seconds:9.0f} products/s  {queries} queries"
+                )
+            self.stdout.write(f"  speed-up: {drf_seconds / card_seconds:.1f}x")
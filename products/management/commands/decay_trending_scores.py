@@ -0,0 +1,23 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products import trending
+
+
+class Command(BaseCommand):
+    help = "Move the trending-score landmark forward once it is old enough, rescaling every score."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Check once and exit.")
+        parser.add_argument('--interval', type=float, default=settings.TRENDING['POLL_INTERVAL'],
+                            help="Seconds to sleep between checks.")
+
+    def handle(self, *args, **options):
+        while True:
+            if trending.rescale():
+                self.stdout.write("Rescaled trending scores.")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.transfer import recover_stale_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Requeue product import/export jobs left PENDING or RUNNING by a restarted "
+        "worker for longer than PRODUCT_TRANSFER['STALE_AFTER'], or fail interrupted imports."
+    )
+
+    def handle(self, *args, **options):
+        requeued, failed = recover_stale_jobs()
+        self.stdout.write(self.style.SUCCESS(f"Requeued {requeued} job(s), failed {failed} interrupted import(s)."))
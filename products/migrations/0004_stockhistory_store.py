@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_store(apps, schema_editor):
+    StockHistory = apps.get_model('products', 'StockHistory')
+    Product = apps.get_model('products', 'Product')
+    StockHistory.objects.filter(store__isnull=True).update(
+        store_id=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('store_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('products', '0003_producttransferjob'),
+        ('store', '0002_storestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockHistoryDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('action', models.CharField(choices=[('CREATED', 'Product Created'), ('UPDATED', 'Manual Update'), ('SALE', 'Sale'), ('RETURN', 'Return')], max_length=20)),
+                ('change_total', models.IntegerField(default=0)),
+                ('change_online', models.IntegerField(default=0)),
+                ('entries', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stockhistory',
+            name='store',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_history', to='store.storeprofile'),
+        ),
+        migrations.RunPython(backfill_store, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stockhistory',
+            index=models.Index(fields=['store', '-timestamp'], name='stockhistory_store_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockhistory',
+            index=models.Index(fields=['timestamp'], name='stockhistory_time_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockhistorydaily',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history_daily', to='products.product'),
+        ),
+        migrations.AddField(
+            model_name='stockhistorydaily',
+            name='store',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_history_daily', to='store.storeprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='stockhistorydaily',
+            index=models.Index(fields=['store', '-day'], name='stockdaily_store_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockhistorydaily',
+            constraint=models.UniqueConstraint(fields=('product', 'day', 'action'), name='unique_stock_history_day'),
+        ),
+    ]
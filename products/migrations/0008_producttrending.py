@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_trending_scores(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductTrending = apps.get_model('products', 'ProductTrending')
+    batch = []
+    for product_id, score in Product.objects.filter(trending_score__gt=0).values_list('id', 'trending_score').iterator(chunk_size=2000):
+        batch.append(ProductTrending(product_id=product_id, score=score))
+        if len(batch) >= 2000:
+            ProductTrending.objects.bulk_create(batch)
+            batch = []
+    ProductTrending.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_producttransferjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTrending',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='products.product')),
+                ('score', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.RunPython(copy_trending_scores, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_trending_idx',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='trending_score',
+        ),
+        migrations.AddIndex(
+            model_name='producttrending',
+            index=models.Index(fields=['-score', '-product'], name='product_trending_idx'),
+        ),
+    ]
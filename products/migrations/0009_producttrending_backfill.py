@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_missing_rows(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductTrending = apps.get_model('products', 'ProductTrending')
+    batch = []
+    for product_id in Product.objects.filter(trending__isnull=True).values_list('id', flat=True).iterator(chunk_size=2000):
+        batch.append(ProductTrending(product_id=product_id))
+        if len(batch) >= 2000:
+            ProductTrending.objects.bulk_create(batch)
+            batch = []
+    ProductTrending.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_producttrending'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_rows, migrations.RunPython.noop),
+    ]
@@ -65,6 +65,9 @@ class StockHistory(models.Model):
         SALE = 'SALE', 'Sale'
         RETURN = 'RETURN', 'Return'
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='history')
+    # Copied from product.store so a seller's history is one indexed range
+    # scan instead of a join through Product.
+    store = models.ForeignKey(StoreProfile, on_delete=models.CASCADE, related_name='stock_history', db_index=False)
     user_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     user_object_id = models.PositiveIntegerField()
     user = GenericForeignKey('user_content_type', 'user_object_id')
@@ -72,4 +75,109 @@ class StockHistory(models.Model):
     change_total = models.IntegerField()
     change_online = models.IntegerField()
     note = models.CharField(max_length=255, blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store', '-timestamp'], name='stockhistory_store_time_idx'),
+            models.Index(fields=['timestamp'], name='stockhistory_time_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.store_id is None:
+            self.store_id = self.product.store_id
+        super().save(*args, **kwargs)
+
+
+class StockHistoryDaily(models.Model):
+    """
+    StockHistory rows older than the retention window, summed per product,
+    day and action by products.history.archive().
+    """
+    store = models.ForeignKey(StoreProfile, on_delete=models.CASCADE, related_name='stock_history_daily')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='history_daily')
+    day = models.DateField()
+    action = models.CharField(max_length=20, choices=StockHistory.Action.choices)
+    change_total = models.IntegerField(default=0)
+    change_online = models.IntegerField(default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day', 'action'], name='unique_stock_history_day'),
+        ]
+        indexes = [
+            models.Index(fields=['store', '-day'], name='stockdaily_store_day_idx'),
+        ]
+
+
+class ProductTransferJob(models.Model):
+    """A seller's bulk product import or export, run in the background."""
+    class Kind(models.TextChoices):
+        IMPORT = 'IMPORT', 'Import'
+        EXPORT = 'EXPORT', 'Export'
+
+    class Format(models.TextChoices):
+        CSV = 'csv', 'CSV'
+        XLSX = 'xlsx', 'Excel'
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        FAILED = 'FAILED', 'Failed'
+
+    store = models.ForeignKey(StoreProfile, on_delete=models.CASCADE, related_name='transfer_jobs')
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    file_format = models.CharField(max_length=4, choices=Format.choices, default=Format.CSV)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    # The uploaded sheet for imports, the generated one for exports.
+    file = models.FileField(upload_to='product_transfers/', blank=True)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="Per-row errors: [{'row': n, 'errors': {...}}]")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Bumped with every progress save, so a job whose worker died can be told
+    # apart from one that is still running (see transfer.recover_stale_jobs).
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+
+class ProductTrending(models.Model):
+    """
+    A product's time-decayed popularity, maintained by products.trending.
+    Only the order is meaningful: scores are in units of the TrendingClock
+    landmark. Kept out of Product so saving a product never writes back a
+    score read before the last flush. Every product gets a row when it is
+    created, so ordering by score is an inner join over the score index.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['-score', '-product'], name='product_trending_idx')]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.score:.3f}"
+
+
+class TrendingClock(models.Model):
+    """
+    The landmark trending scores are measured from (a single row). An event
+    adds weight * 2 ** (age of the landmark / half-life), so older events
+    weigh relatively less without touching every score; see products.trending.
+    """
+    landmark = models.DateTimeField()
+
+    def __str__(self):
+        return f"Trending landmark {self.landmark:%Y-%m-%d %H:%M}"
@@ -1,8 +1,11 @@
 import json
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Product, ProductImage, Review, StockHistory
+from .models import Product, ProductImage, ProductTransferJob, Review, StockHistory, StockHistoryDaily
 from store.models import StoreProfile
 from users.models import Buyer
+from keralasellers.media import MediaURLField
 from .models import Product, ProductImage
 
 # ==============================================================================
@@ -24,25 +27,19 @@ class SimpleBuyerSerializer(serializers.ModelSerializer):
         fields = ['full_name']
 
 class ProductImageSerializer(serializers.ModelSerializer):
-    image_url = serializers.SerializerMethodField()
+    image = MediaURLField()
+    image_url = MediaURLField(source='image')
     
     class Meta:
         model = ProductImage
         fields = ['id', 'image', 'image_url']
-    
-    def get_image_url(self, obj):
-        request = self.context.get('request')
-        if obj.image and hasattr(obj.image, 'url'):
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-        return None
 
 # ==============================================================================
 # MAIN SERIALIZERS
 # ==============================================================================
 
 class ProductSerializer(serializers.ModelSerializer):
-    main_image_url = serializers.SerializerMethodField()
+    main_image_url = MediaURLField(source='main_image')
     sub_images = ProductImageSerializer(many=True, read_only=True)
     store = NestedStoreProfileSerializer(read_only=True)
     average_rating = serializers.FloatField(read_only=True)
@@ -62,13 +59,6 @@ class ProductSerializer(serializers.ModelSerializer):
             'attributes': {'required': False},
         }
 
-    def get_main_image_url(self, obj):
-        request = self.context.get('request')
-        if obj.main_image and hasattr(obj.main_image, 'url'):
-            if request:
-                return request.build_absolute_uri(obj.main_image.url)
-        return None
-    
     # Pass context to nested serializers
     def get_sub_images(self, obj):
         sub_images = obj.sub_images.all()
@@ -111,4 +101,95 @@ class StockHistorySerializer(serializers.ModelSerializer):
     product = serializers.StringRelatedField()
     class Meta:
         model = StockHistory
-        fields = ['id', 'product', 'user', 'action', 'change_total', 'change_online', 'note', 'timestamp']
\ No newline at end of file
+        fields = ['id', 'product', 'user', 'action', 'change_total', 'change_online', 'note', 'timestamp']
+
+class StockHistoryDailySerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    class Meta:
+        model = StockHistoryDaily
+        fields = ['product', 'product_name', 'day', 'action', 'change_total', 'change_online', 'entries']
+
+# ==============================================================================
+# BULK STOCK
+# ==============================================================================
+
+class StockAdjustmentSerializer(serializers.Serializer):
+    """One item of a bulk stock update: set a level or apply a delta, per stock type."""
+    product_id = serializers.IntegerField()
+    total_stock = serializers.IntegerField(min_value=0, required=False)
+    total_delta = serializers.IntegerField(required=False)
+    online_stock = serializers.IntegerField(min_value=0, required=False)
+    online_delta = serializers.IntegerField(required=False)
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        for kind in ('total', 'online'):
+            if f'{kind}_stock' in attrs and f'{kind}_delta' in attrs:
+                raise serializers.ValidationError(f"Send either {kind}_stock or {kind}_delta, not both.")
+        if not {'total_stock', 'total_delta', 'online_stock', 'online_delta'} & attrs.keys():
+            raise serializers.ValidationError("Nothing to update.")
+        return attrs
+
+class BulkStockUpdateSerializer(serializers.Serializer):
+    items = StockAdjustmentSerializer(many=True, allow_empty=False, max_length=settings.BULK_STOCK_MAX_ITEMS)
+    all_or_nothing = serializers.BooleanField(default=False)
+
+# ==============================================================================
+# BULK IMPORT / EXPORT
+# ==============================================================================
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """
+    Validates one spreadsheet row. Rows with an `id` update that product and
+    are validated partially; `category` is an id or name, resolved later.
+    """
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=255)
+    model_name = serializers.CharField(max_length=100, required=False)
+    description = serializers.CharField(required=False)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    mrp = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    total_stock = serializers.IntegerField(min_value=0, default=0)
+    online_stock = serializers.IntegerField(min_value=0, default=0)
+    sale_type = serializers.ChoiceField(choices=Product.SaleType.choices, default=Product.SaleType.ONLINE_AND_OFFLINE)
+    category = serializers.CharField(required=False)
+    is_active = serializers.BooleanField(default=True)
+    attributes = serializers.JSONField(binary=True, required=False)
+
+    def validate_attributes(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Attributes must be a JSON object.")
+        return value
+
+    def validate(self, attrs):
+        if 'online_stock' in attrs and 'total_stock' in attrs and attrs['online_stock'] > attrs['total_stock']:
+            raise serializers.ValidationError({"online_stock": "Online stock cannot be greater than total stock."})
+        return attrs
+
+class ProductTransferJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductTransferJob
+        fields = [
+            'id', 'kind', 'file_format', 'status', 'total_rows', 'processed_rows', 'progress',
+            'created_count', 'updated_count', 'error_count', 'errors', 'download_url',
+            'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Percent of rows handled, when the total is known."""
+        if obj.status == ProductTransferJob.Status.COMPLETED:
+            return 100
+        if not obj.total_rows:
+            return None
+        return min(100, round(obj.processed_rows * 100 / obj.total_rows))
+
+    def get_download_url(self, obj):
+        if obj.kind != ProductTransferJob.Kind.EXPORT or obj.status != ProductTransferJob.Status.COMPLETED:
+            return None
+        request = self.context.get('request')
+        url = reverse('product-transfer-download', kwargs={'pk': obj.pk})
+        return request.build_absolute_uri(url) if request else url
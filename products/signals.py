@@ -1,7 +1,9 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from .models import Product, StockHistory
+from .models import Product, ProductTrending, StockHistory
+from recommendations import similar
+from store import stats, storefront
 
 @receiver(pre_save, sender=Product)
 def capture_old_stock_values(sender, instance, **kwargs):
@@ -14,6 +16,9 @@ def capture_old_stock_values(sender, instance, **kwargs):
             old_instance = Product.objects.get(pk=instance.pk)
             instance._old_total_stock = old_instance.total_stock
             instance._old_online_stock = old_instance.online_stock
+            instance._old_store_id = old_instance.store_id
+            instance._old_counter_flags = stats.counter_flags(old_instance)
+            instance._old_similarity = similar.signature(old_instance)
         except Product.DoesNotExist:
             instance._old_total_stock = 0
             instance._old_online_stock = 0
@@ -45,6 +50,7 @@ def log_stock_changes(sender, instance, created, **kwargs):
                 
                 StockHistory.objects.create(
                     product=instance,
+                    store_id=instance.store_id,
                     user_content_type=content_type,
                     user_object_id=user.pk,
                     action=StockHistory.Action.CREATED,
@@ -74,6 +80,7 @@ def log_stock_changes(sender, instance, created, **kwargs):
                     
                     StockHistory.objects.create(
                         product=instance,
+                        store_id=instance.store_id,
                         user_content_type=content_type,
                         user_object_id=user.pk,
                         action=StockHistory.Action.UPDATED,
@@ -86,3 +93,32 @@ def log_stock_changes(sender, instance, created, **kwargs):
                     print(f"⚠️ Warning: No user found for product update {instance.name}")
             except Exception as e:
                 print(f"❌ Error creating StockHistory for update: {e}")
+
+@receiver(post_save, sender=Product)
+def update_store_counters(sender, instance, created, **kwargs):
+    """
+    Keep StoreStats in step with product creates and updates. Only the
+    counters whose flags actually changed are touched, with F() updates.
+    """
+    if created or not hasattr(instance, '_old_counter_flags'):
+        stats.record_change(None, (), instance.store_id, stats.counter_flags(instance))
+    else:
+        stats.record_change(
+            instance._old_store_id, instance._old_counter_flags,
+            instance.store_id, stats.counter_flags(instance),
+        )
+
+@receiver(post_save, sender=Product)
+def create_trending_row(sender, instance, created, **kwargs):
+    """Give every new product a ProductTrending row, so trending listings need no outer join."""
+    if created:
+        ProductTrending.objects.create(product=instance)
+
+@receiver(post_delete, sender=Product)
+def decrement_store_counters(sender, instance, **kwargs):
+    stats.record_change(instance.store_id, stats.counter_flags(instance), None, ())
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_storefront(sender, instance, **kwargs):
+    storefront.invalidate([instance.store_id, getattr(instance, '_old_store_id', None)])
@@ -0,0 +1,80 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from store import stats, storefront
+from .models import Product, StockHistory
+
+
+def _apply(product, item):
+    """Compute the new stock for one item in memory. Returns an error or None."""
+    total = item['total_stock'] if 'total_stock' in item else product.total_stock + item.get('total_delta', 0)
+    online = item['online_stock'] if 'online_stock' in item else product.online_stock + item.get('online_delta', 0)
+    if total < 0 or online < 0:
+        return 'Stock cannot go below zero.'
+    if online > total:
+        return 'Online stock cannot be greater than total stock.'
+    product.total_stock, product.online_stock = total, online
+    return None
+
+
+def bulk_adjust(seller, items, all_or_nothing=False):
+    """
+    Apply validated stock adjustments for `seller`'s products in one
+    transaction: one locking read, one batched UPDATE and one history
+    insert, however many items there are. Items for the same product apply
+    in order. Returns a result per item.
+
+    With `all_or_nothing`, any failing item rolls back the whole batch.
+    """
+    results = [{'product_id': item['product_id']} for item in items]
+    with transaction.atomic():
+        products = (
+            Product.objects.select_for_update()
+            .filter(store__seller=seller, pk__in={item['product_id'] for item in items})
+            .only('pk', 'store_id', 'total_stock', 'online_stock')
+            .in_bulk()
+        )
+        before = {pk: (product.total_stock, product.online_stock) for pk, product in products.items()}
+        notes = {}
+        failed = False
+        for item, result in zip(items, results):
+            product = products.get(item['product_id'])
+            error = 'Product not found.' if product is None else _apply(product, item)
+            if error:
+                result.update(success=False, error=error)
+                failed = True
+                continue
+            result.update(success=True, total_stock=product.total_stock, online_stock=product.online_stock)
+            if item.get('note'):
+                notes.setdefault(product.pk, []).append(item['note'])
+
+        if failed and all_or_nothing:
+            return [
+                result if not result['success'] else
+                {'product_id': result['product_id'], 'success': False, 'error': 'Not applied because another item failed.'}
+                for result in results
+            ]
+
+        changed = [product for pk, product in products.items() if (product.total_stock, product.online_stock) != before[pk]]
+        # Bulk writes skip the Product signals, so history, counters and the
+        # storefront cache are handled here.
+        Product.objects.bulk_update(changed, ['total_stock', 'online_stock'], batch_size=500)
+        seller_type = ContentType.objects.get_for_model(seller)
+        StockHistory.objects.bulk_create([
+            StockHistory(
+                product=product,
+                store_id=product.store_id,
+                user_content_type=seller_type,
+                user_object_id=seller.pk,
+                action=StockHistory.Action.UPDATED,
+                change_total=product.total_stock - before[product.pk][0],
+                change_online=product.online_stock - before[product.pk][1],
+                note=('; '.join(notes.get(product.pk, [])) or 'Bulk stock update')[:255],
+            )
+            for product in changed
+        ], batch_size=500)
+        if changed:
+            store_ids = {product.store_id for product in changed}
+            stats.reconcile(store_ids)
+            transaction.on_commit(lambda: storefront.invalidate(store_ids))
+    return results
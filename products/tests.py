@@ -1,3 +1,387 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from categories.models import Category
+from users.models import Buyer, Seller, SellerToken
+from . import history, transfer, trending
+from .cards import ProductCardSerializer
+from .models import (
+    Product, ProductImage, ProductTransferJob, ProductTrending, Review, StockHistory, StockHistoryDaily, TrendingClock,
+)
+from .serializers import ProductSerializer
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='test-media-')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    BACKGROUND_TASKS={'MAX_WORKERS': 1, 'ALWAYS_EAGER': True},
+    SUBSCRIPTIONS={'FREE_PRODUCT_LIMIT': 5, 'CACHE_TIMEOUT': 60},
+)
+class ProductTransferTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=self.seller).key}")
+        self.category = Category.objects.create(name='Spices')
+
+    def upload(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(rows)
+        upload = SimpleUploadedFile('products.csv', buffer.getvalue().encode(), content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/products/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        return self.client.get(f"/api/products/transfer-jobs/{response.data['id']}/").data
+
+    def test_import_creates_updates_and_reports_row_errors(self):
+        existing = Product.objects.create(store=self.seller.store_profile, name='Old', price=10, total_stock=1, online_stock=1)
+        job = self.upload([
+            ['id', 'name', 'price', 'total_stock', 'online_stock', 'category'],
+            ['', 'Pepper', '120.50', '10', '5', 'spices'],
+            ['', 'Cardamom', 'abc', '10', '5', ''],
+            ['', 'Clove', '80', '2', '5', ''],
+            [existing.pk, '', '', '20', '', ''],
+            ['', 'Nutmeg', '40', '3', '3', 'Missing'],
+        ])
+        self.assertEqual(job['status'], 'COMPLETED')
+        self.assertEqual((job['created_count'], job['updated_count'], job['error_count']), (1, 1, 3))
+        self.assertEqual([error['row'] for error in job['errors']], [3, 4, 6])
+        pepper = Product.objects.get(name='Pepper')
+        self.assertEqual(pepper.category, self.category)
+        self.assertEqual(pepper.mrp, pepper.price)
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.total_stock), ('Old', 20))
+        self.assertEqual(
+            sorted(StockHistory.objects.values_list('product__name', 'action', 'change_total')),
+            [('Old', 'CREATED', 1), ('Old', 'UPDATED', 19), ('Pepper', 'CREATED', 10)],
+        )
+        self.assertEqual(self.seller.store_profile.stats.total_products, 2)
+        self.assertTrue(ProductTrending.objects.filter(product=pepper).exists())
+
+    def test_import_respects_plan_product_limit(self):
+        rows = [['name', 'price']] + [[f"Item {i}", '10'] for i in range(7)]
+        job = self.upload(rows)
+        self.assertEqual(job['created_count'], 5)
+        self.assertEqual(job['error_count'], 2)
+
+    def test_export_round_trips_through_import(self):
+        Product.objects.create(store=self.seller.store_profile, name='Tea', price=99, total_stock=4,
+                               online_stock=2, category=self.category, attributes={'grade': 'A'})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/products/export/', {'format': 'csv'}, format='json')
+        job = self.client.get(f"/api/products/transfer-jobs/{response.data['id']}/").data
+        self.assertEqual(job['status'], 'COMPLETED')
+        download = self.client.get(f"/api/products/transfer-jobs/{job['id']}/download/")
+        rows = list(csv.reader(io.StringIO(b''.join(download.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'name', 'model_name'])
+        self.assertEqual(rows[1][1], 'Tea')
+
+        job = self.upload(rows)
+        self.assertEqual((job['created_count'], job['updated_count'], job['error_count']), (0, 1, 0))
+        self.assertEqual(Product.objects.get().attributes, {'grade': 'A'})
+
+    def test_stale_jobs_are_requeued_or_failed(self):
+        store = self.seller.store_profile
+        Product.objects.create(store=store, name='Tea', price=99, total_stock=4, online_stock=2)
+        long_ago = timezone.now() - timedelta(hours=2)
+        export = ProductTransferJob.objects.create(store=store, kind=ProductTransferJob.Kind.EXPORT)
+        interrupted = ProductTransferJob.objects.create(
+            store=store, kind=ProductTransferJob.Kind.IMPORT, status=ProductTransferJob.Status.RUNNING,
+            started_at=long_ago, heartbeat_at=long_ago, processed_rows=500,
+        )
+        live = ProductTransferJob.objects.create(
+            store=store, kind=ProductTransferJob.Kind.IMPORT, status=ProductTransferJob.Status.RUNNING,
+            started_at=long_ago, heartbeat_at=timezone.now(),
+        )
+        ProductTransferJob.objects.filter(pk__in=[export.pk, interrupted.pk, live.pk]).update(created_at=long_ago)
+
+        self.assertEqual(transfer.recover_stale_jobs(), (1, 1))
+        export.refresh_from_db()
+        self.assertEqual((export.status, export.processed_rows), ('COMPLETED', 1))
+        interrupted.refresh_from_db()
+        self.assertEqual(interrupted.status, 'FAILED')
+        self.assertIn('interrupted', str(interrupted.errors))
+        live.refresh_from_db()
+        self.assertEqual(live.status, 'RUNNING')
+
+    def test_claimed_job_is_not_run_twice(self):
+        job = ProductTransferJob.objects.create(
+            store=self.seller.store_profile, kind=ProductTransferJob.Kind.EXPORT, status=ProductTransferJob.Status.RUNNING,
+        )
+        transfer.run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.file.name), ('RUNNING', ''))
+
+    def test_other_sellers_cannot_see_jobs(self):
+        job = ProductTransferJob.objects.create(store=self.seller.store_profile, kind=ProductTransferJob.Kind.EXPORT)
+        other = Seller.objects.create_user(phone='9000000002', password='pass', name='Other')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=other).key}")
+        self.assertEqual(self.client.get(f"/api/products/transfer-jobs/{job.pk}/").status_code, 404)
+
+
+class BulkStockUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=self.seller).key}")
+        store = self.seller.store_profile
+        self.tea = Product.objects.create(store=store, name='Tea', price=10, total_stock=10, online_stock=5)
+        self.coffee = Product.objects.create(store=store, name='Coffee', price=10, total_stock=4, online_stock=4)
+
+    def post(self, items, **extra):
+        return self.client.post('/api/products/bulk-update-stock/', {'items': items, **extra}, format='json')
+
+    def test_applies_levels_and_deltas_in_one_batch(self):
+        response = self.post([
+            {'product_id': self.tea.pk, 'total_delta': -3, 'online_stock': 2, 'note': 'Stock take'},
+            {'product_id': self.coffee.pk, 'total_stock': 0, 'online_stock': 0},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['updated'], response.data['failed']), (2, 0))
+        self.tea.refresh_from_db()
+        self.assertEqual((self.tea.total_stock, self.tea.online_stock), (7, 2))
+        self.assertEqual(
+            sorted(StockHistory.objects.filter(action='UPDATED').values_list('product__name', 'change_total', 'note')),
+            [('Coffee', -4, 'Bulk stock update'), ('Tea', -3, 'Stock take')],
+        )
+        self.assertEqual(self.seller.store_profile.stats.low_stock_products, 1)
+
+    def test_reports_per_item_errors(self):
+        other = Seller.objects.create_user(phone='9000000002', password='pass', name='Other')
+        foreign = Product.objects.create(store=other.store_profile, name='Rice', price=5, total_stock=1, online_stock=1)
+        response = self.post([
+            {'product_id': self.tea.pk, 'online_delta': 10},
+            {'product_id': foreign.pk, 'total_stock': 50},
+            {'product_id': self.coffee.pk, 'total_delta': 1},
+        ])
+        self.assertEqual([result['success'] for result in response.data['results']], [False, False, True])
+        self.assertEqual(response.data['results'][1]['error'], 'Product not found.')
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.total_stock, 1)
+
+    def test_all_or_nothing_applies_nothing_on_failure(self):
+        response = self.post([
+            {'product_id': self.tea.pk, 'total_delta': 1},
+            {'product_id': self.coffee.pk, 'total_delta': -5},
+        ], all_or_nothing=True)
+        self.assertEqual(response.data['updated'], 0)
+        self.tea.refresh_from_db()
+        self.assertEqual(self.tea.total_stock, 10)
+
+    def test_rejects_conflicting_fields(self):
+        response = self.post([{'product_id': self.tea.pk, 'total_stock': 1, 'total_delta': 1}])
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(STOCK_HISTORY={'RETENTION_DAYS': 30, 'ROLLUP_RETENTION_DAYS': None, 'ARCHIVE_DIR': None})
+class StockHistoryTests(TestCase):
+    def setUp(self):
+        self.seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=self.seller).key}")
+        self.product = Product.objects.create(store=self.seller.store_profile, name='Tea', price=10, total_stock=10, online_stock=5)
+
+    def adjust(self, total_stock):
+        self.product.total_stock = total_stock
+        self.product.save()
+
+    def test_rows_carry_store_and_list_batches_user_lookups(self):
+        for total in range(11, 16):
+            self.adjust(total)
+        self.assertFalse(StockHistory.objects.exclude(store=self.seller.store_profile).exists())
+        with self.assertNumQueries(4):  # token, count, page with products, one batch of sellers
+            response = self.client.get('/api/products/stock-history/')
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual(response.data['results'][0]['user'], str(self.seller))
+
+    def test_archive_rolls_old_days_into_daily_totals(self):
+        self.adjust(12)
+        self.adjust(15)
+        old = timezone.now() - timedelta(days=40)
+        StockHistory.objects.update(timestamp=old)
+        self.adjust(16)
+
+        archived, days = history.archive()
+        self.assertEqual((archived, days), (3, 1))
+        self.assertEqual(StockHistory.objects.count(), 1)
+        self.assertEqual(
+            sorted(StockHistoryDaily.objects.values_list('day', 'action', 'change_total', 'entries')),
+            [(timezone.localdate(old), 'CREATED', 10, 1), (timezone.localdate(old), 'UPDATED', 5, 2)],
+        )
+        response = self.client.get(f'/api/products/stock-history/daily/?product={self.product.pk}')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_archive_file_only_appears_once_the_delete_commits(self):
+        archive_dir = tempfile.mkdtemp(prefix='test-archive-')
+        self.addCleanup(shutil.rmtree, archive_dir, ignore_errors=True)
+        self.adjust(12)
+        old = timezone.now() - timedelta(days=40)
+        StockHistory.objects.update(timestamp=old)
+        day = timezone.localdate(old)
+
+        with override_settings(STOCK_HISTORY={**settings.STOCK_HISTORY, 'ARCHIVE_DIR': archive_dir}):
+            with mock.patch.object(history, '_roll_up', side_effect=RuntimeError('boom')), \
+                    self.assertRaises(RuntimeError):
+                history.archive_day(day)
+            self.assertEqual(os.listdir(archive_dir), [])
+            self.assertEqual(StockHistory.objects.count(), 2)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(history.archive_day(day), 2)
+        with gzip.open(os.path.join(archive_dir, f"stock-history-{day:%Y-%m-%d}.jsonl.gz"), 'rt') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.assertEqual(len(os.listdir(archive_dir)), 1)
+
+
+class ProductCardTests(TestCase):
+    def setUp(self):
+        seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        store = seller.store_profile
+        store.whatsapp_number = '919000000001'
+        store.save()
+        category = Category.objects.create(name='Spices')
+        self.pepper = Product.objects.create(
+            store=store, name='Pepper', model_name='Tellicherry', description='Bold', price='120.5',
+            total_stock=10, online_stock=5, category=category, attributes={'grade': 'A'},
+            main_image='product_images/main/pepper.jpg',
+        )
+        ProductImage.objects.create(product=self.pepper, image='product_images/sub/pepper 1.jpg')
+        ProductImage.objects.create(product=self.pepper, image='product_images/sub/pepper-2.jpg')
+        for i, rating in enumerate([4, 5]):
+            Review.objects.create(product=self.pepper, buyer=Buyer.objects.create(email=f"b{i}@example.com"), rating=rating)
+        Product.objects.create(store=store, name='Tea', price=99, mrp=110, total_stock=1, online_stock=1)
+
+    def test_cards_render_exactly_like_product_serializer(self):
+        request = APIRequestFactory().get('/api/products/', )
+        products = Product.objects.order_by('pk')
+        expected = ProductSerializer(products, many=True, context={'request': request}).data
+        with self.assertNumQueries(3):
+            cards = ProductCardSerializer(products, context={'request': request}).data
+        self.assertEqual(JSONRenderer().render(cards), JSONRenderer().render(expected))
+
+    def test_list_endpoint_uses_cards(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data['count'], 2)
+        pepper = next(card for card in response.data['results'] if card['id'] == self.pepper.pk)
+        self.assertEqual((pepper['average_rating'], pepper['review_count']), (4.5, 2))
+        self.assertEqual(pepper['main_image_url'], 'http://testserver/media/product_images/main/pepper.jpg')
+
+
+TRENDING = {
+    'WEIGHTS': {'view': 1, 'order': 5, 'sale': 10},
+    'HALF_LIFE': timedelta(days=3),
+    'FLUSH_INTERVAL': 3600,
+    'FLUSH_SIZE': 1000,
+    'RESCALE_AFTER': timedelta(days=7),
+    'MIN_SCORE': 0.2,
+    'POLL_INTERVAL': 3600,
+}
+
+
+@override_settings(TRENDING=TRENDING)
+class TrendingTests(TestCase):
+    def setUp(self):
+        trending.buffer.drain()
+        self.seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        store = self.seller.store_profile
+        self.pepper, self.tea, self.coffee = (
+            Product.objects.create(store=store, name=name, price=10, total_stock=50, online_stock=5)
+            for name in ('Pepper', 'Tea', 'Coffee')
+        )
+        self.client = APIClient()
+
+    def tearDown(self):
+        trending.buffer.drain()
+
+    def names(self):
+        response = self.client.get('/api/products/', {'ordering': 'trending'})
+        return [product['name'] for product in response.data['results']]
+
+    def test_buffered_views_and_sales(self):
+        for product in (self.tea, self.tea, self.coffee):
+            self.assertEqual(self.client.get(f'/api/products/{product.pk}/').status_code, 200)
+        self.assertFalse(ProductTrending.objects.filter(score__gt=0).exists())  # still buffered
+        self.assertEqual(trending.flush(), 2)
+        self.assertEqual(self.names(), ['Tea', 'Coffee', 'Pepper'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=self.seller).key}")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/user/orders/create-order/', {'items': [{'id': self.pepper.pk, 'quantity': 2}]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        trending.flush()
+        self.client.credentials()
+        self.assertEqual(self.names(), ['Pepper', 'Tea', 'Coffee'])
+
+        with override_settings(TRENDING={**TRENDING, 'FLUSH_SIZE': 1}):
+            self.client.get(f'/api/products/{self.coffee.pk}/')
+        self.assertGreater(ProductTrending.objects.get(pk=self.coffee.pk).score, 0.99)
+
+    def test_trending_listing_joins_the_score_index(self):
+        self.assertEqual(ProductTrending.objects.count(), 3)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.names(), ['Coffee', 'Tea', 'Pepper'])
+        listing = next(query['sql'] for query in queries if 'ORDER BY' in query['sql'])
+        self.assertIn('INNER JOIN "products_producttrending"', listing)
+
+    def test_idle_worker_flushes_from_a_timer(self):
+        with mock.patch.object(trending, '_background', True), mock.patch.object(trending, '_timer', None), \
+                mock.patch.object(trending.threading, 'Timer') as timer:
+            trending.record('view', {self.tea.pk: 2})
+            trending.record('view', {self.tea.pk: 1})
+        timer.assert_called_once_with(3600, trending._flush_from_timer)
+        timer.return_value.start.assert_called_once_with()
+        self.assertEqual(ProductTrending.objects.get(pk=self.tea.pk).score, 0)
+        trending._flush_quietly()  # what the timer thread runs
+        self.assertAlmostEqual(ProductTrending.objects.get(pk=self.tea.pk).score, 3, places=3)
+
+    def test_product_saves_leave_scores_alone(self):
+        stale = Product.objects.get(pk=self.tea.pk)
+        trending.record('view', {self.tea.pk: 4})
+        trending.flush()
+        stale.total_stock = 40
+        stale.save()
+        self.assertAlmostEqual(ProductTrending.objects.get(pk=self.tea.pk).score, 4, places=3)
+
+    def test_rescale_keeps_order(self):
+        start = timezone.now() - timedelta(days=9)
+        TrendingClock.objects.create(pk=1, landmark=start)
+        trending.record('view', {self.tea.pk: 1, self.coffee.pk: 3})
+        trending.flush()
+        self.assertFalse(trending.rescale(start + timedelta(days=6)))
+        self.assertTrue(trending.rescale())
+        scores = dict(ProductTrending.objects.values_list('product__name', 'score'))
+        self.assertAlmostEqual(scores['Coffee'], 3, places=3)
+        self.assertAlmostEqual(scores['Tea'], 1, places=3)
+        self.assertEqual(scores['Pepper'], 0)
+        self.assertEqual(self.names(), ['Coffee', 'Tea', 'Pepper'])
+
+        # Nine days is three half-lives: a unit view back then is worth 1/8 now.
+        TrendingClock.objects.filter(pk=1).update(landmark=timezone.now() - timedelta(days=9))
+        self.assertTrue(trending.rescale())
+        self.assertAlmostEqual(ProductTrending.objects.get(pk=self.coffee.pk).score, 3 / 8, places=3)
+        self.assertEqual(ProductTrending.objects.get(pk=self.tea.pk).score, 0)  # 1/8 is under MIN_SCORE
@@ -0,0 +1,398 @@
+import codecs
+import csv
+import json
+import os
+import tempfile
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from categories.models import Category
+from keralasellers import tasks
+from recommendations import similar
+from store import stats, storefront
+from subscriptions import entitlements
+from users.models import Seller
+from .models import Product, ProductTrending, ProductTransferJob, StockHistory
+from .serializers import ProductImportRowSerializer
+
+try:
+    import openpyxl
+except ImportError:  # Excel support is optional; CSV always works.
+    openpyxl = None
+
+COLUMNS = [
+    'id', 'name', 'model_name', 'description', 'price', 'mrp', 'total_stock',
+    'online_stock', 'sale_type', 'category', 'is_active', 'attributes',
+]
+UPDATE_FIELDS = [
+    'name', 'model_name', 'description', 'price', 'mrp', 'total_stock',
+    'online_stock', 'sale_type', 'category', 'is_active', 'attributes',
+]
+
+Status = ProductTransferJob.Status
+
+
+def _config(name):
+    return settings.PRODUCT_TRANSFER[name]
+
+
+def detect_format(filename):
+    """Return the job format for an upload name, or None if unsupported."""
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension == ProductTransferJob.Format.CSV:
+        return ProductTransferJob.Format.CSV
+    if extension == ProductTransferJob.Format.XLSX and openpyxl is not None:
+        return ProductTransferJob.Format.XLSX
+    return None
+
+
+def can_access_media(user, name):
+    """Transfer sheets are only served to the seller whose store the job belongs to."""
+    return isinstance(user, Seller) and ProductTransferJob.objects.filter(file=name, store__seller=user).exists()
+
+
+# ==============================================================================
+# READING
+# ==============================================================================
+def _csv_rows(fileobj):
+    yield from csv.DictReader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+
+
+def _xlsx_rows(fileobj):
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _count_rows(job):
+    with job.file.open('rb') as f:
+        if job.file_format == ProductTransferJob.Format.XLSX:
+            workbook = openpyxl.load_workbook(f, read_only=True)
+            try:
+                max_row = workbook.active.max_row
+            finally:
+                workbook.close()
+            return max(0, max_row - 1) if max_row else None
+        return max(0, sum(1 for _ in csv.reader(codecs.iterdecode(f, 'utf-8-sig'))) - 1)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for number, row in enumerate(rows, start=2):  # row 1 is the header
+        chunk.append((number, row))
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean(row):
+    """Drop blank cells so missing values fall back to defaults (or stay unchanged on update)."""
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = str(key).strip().lower()
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '':
+            continue
+        if isinstance(value, float) and value.is_integer() and key in ('id', 'total_stock', 'online_stock'):
+            value = int(value)
+        cleaned[key] = value
+    return cleaned
+
+
+# ==============================================================================
+# IMPORT
+# ==============================================================================
+class _CategoryResolver:
+    """Maps a category cell (id or exact name) to an id using one query."""
+
+    def __init__(self):
+        self.ids = set()
+        self.by_name = {}
+        for pk, name in Category.objects.values_list('pk', 'name'):
+            self.ids.add(pk)
+            self.by_name.setdefault(name.lower(), []).append(pk)
+
+    def resolve(self, value):
+        value = str(value).strip()
+        if value.isdigit() and int(value) in self.ids:
+            return int(value)
+        matches = self.by_name.get(value.lower(), [])
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            raise ValueError(f"Category name '{value}' is ambiguous; use the category id.")
+        raise ValueError(f"Unknown category '{value}'.")
+
+
+class _Importer:
+    def __init__(self, job):
+        self.job = job
+        self.store = job.store
+        self.categories = _CategoryResolver()
+        self.seller_type = ContentType.objects.get_for_model(Seller)
+        snapshot = entitlements.get_entitlement(self.store.seller_id)
+        self.remaining = entitlements.product_limit(snapshot) - entitlements.product_count(self.store.seller_id)
+        self.created = self.updated = self.processed = 0
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, number, errors):
+        self.error_count += 1
+        if len(self.errors) < _config('MAX_ERRORS'):
+            self.errors.append({'row': number, 'errors': errors})
+
+    def validate(self, chunk):
+        """Return the valid rows as (row number, validated data), recording the rest as errors."""
+        parsed = []
+        for number, raw in chunk:
+            row = _clean(raw)
+            serializer = ProductImportRowSerializer(data=row, partial='id' in row)
+            if not serializer.is_valid():
+                self.error(number, serializer.errors)
+                continue
+            data = dict(serializer.validated_data)
+            if 'category' in data:
+                try:
+                    data['category'] = self.categories.resolve(data['category'])
+                except ValueError as e:
+                    self.error(number, {'category': [str(e)]})
+                    continue
+            parsed.append((number, data))
+        return parsed
+
+    def match(self, parsed):
+        """
+        Split parsed rows into (creates, updates). Must run inside the chunk's
+        transaction: the products are locked so the stock read here is still
+        current when bulk_update writes it back, and a concurrent checkout
+        waits instead of being overwritten.
+        """
+        ids = {data['id'] for _, data in parsed if data.get('id')}
+        existing = Product.objects.select_for_update().filter(store=self.store).in_bulk(ids) if ids else {}
+        creates, updates = [], []
+        for number, data in parsed:
+            product_id = data.pop('id', None)
+            if product_id is None:
+                creates.append((number, data))
+            elif product_id in existing:
+                updates.append((number, existing[product_id], data))
+            else:
+                self.error(number, {'id': [f"Product {product_id} does not exist in your store."]})
+        return creates, updates
+
+    def history(self, product, action, change_total, change_online, note):
+        return StockHistory(
+            product=product, store=self.store, user_content_type=self.seller_type, user_object_id=self.store.seller_id,
+            action=action, change_total=change_total, change_online=change_online, note=note,
+        )
+
+    def build_creates(self, creates):
+        products = []
+        for number, data in creates:
+            if self.remaining <= 0:
+                self.error(number, {'non_field_errors': ["Product limit reached for your plan."]})
+                continue
+            self.remaining -= 1
+            category_id = data.pop('category', None)
+            product = Product(store=self.store, category_id=category_id, **data)
+            if product.mrp is None:
+                product.mrp = product.price
+            products.append(product)
+        return products
+
+    def apply_updates(self, updates):
+        changed, history = [], []
+        for number, product, data in updates:
+            old_total, old_online = product.total_stock, product.online_stock
+            if 'category' in data:
+                product.category_id = data.pop('category')
+            for field, value in data.items():
+                setattr(product, field, value)
+            if product.online_stock > product.total_stock:
+                self.error(number, {'online_stock': ["Online stock cannot be greater than total stock."]})
+                continue
+            changed.append(product)
+            if (product.total_stock, product.online_stock) != (old_total, old_online):
+                history.append(self.history(
+                    product, StockHistory.Action.UPDATED,
+                    product.total_stock - old_total, product.online_stock - old_online,
+                    f"Bulk import (job #{self.job.pk})",
+                ))
+        return changed, history
+
+    def run_chunk(self, chunk):
+        parsed = self.validate(chunk)
+        batch_size = _config('BATCH_SIZE')
+        with transaction.atomic():
+            creates, updates = self.match(parsed)
+            new_products = self.build_creates(creates)
+            changed, history = self.apply_updates(updates)
+            # bulk_create skips the Product signals, so history, trending rows,
+            # the store counters and the similar-products queue are written here.
+            Product.objects.bulk_create(new_products, batch_size=batch_size)
+            ProductTrending.objects.bulk_create(
+                [ProductTrending(product=product) for product in new_products], batch_size=batch_size,
+            )
+            if changed:
+                Product.objects.bulk_update(changed, UPDATE_FIELDS, batch_size=batch_size)
+            history += [
+                self.history(
+                    product, StockHistory.Action.CREATED, product.total_stock, product.online_stock,
+                    f"Bulk import (job #{self.job.pk})",
+                )
+                for product in new_products
+            ]
+            StockHistory.objects.bulk_create(history, batch_size=batch_size)
+            similar.enqueue([product.pk for product in new_products + changed])
+        self.created += len(new_products)
+        self.updated += len(changed)
+        self.processed += len(chunk)
+        self.save_progress()
+
+    def save_progress(self):
+        ProductTransferJob.objects.filter(pk=self.job.pk).update(
+            processed_rows=self.processed, created_count=self.created, updated_count=self.updated,
+            error_count=self.error_count, errors=self.errors, heartbeat_at=timezone.now(),
+        )
+
+    def run(self):
+        reader = _xlsx_rows if self.job.file_format == ProductTransferJob.Format.XLSX else _csv_rows
+        try:
+            with self.job.file.open('rb') as f:
+                for chunk in _chunks(reader(f), _config('CHUNK_SIZE')):
+                    self.run_chunk(chunk)
+        finally:
+            if self.created or self.updated:
+                stats.reconcile([self.store.pk])
+                storefront.invalidate([self.store.pk])
+
+
+def import_products(job):
+    ProductTransferJob.objects.filter(pk=job.pk).update(total_rows=_count_rows(job))
+    _Importer(job).run()
+
+
+# ==============================================================================
+# EXPORT
+# ==============================================================================
+def _export_values(product):
+    values = []
+    for column in COLUMNS:
+        value = product[column]
+        if column == 'attributes':
+            value = json.dumps(value or {}, ensure_ascii=False)
+        elif isinstance(value, Decimal):
+            value = str(value)
+        values.append(value)
+    return values
+
+
+def export_products(job):
+    # values('category') yields the category id, which the importer accepts back.
+    products = Product.objects.filter(store=job.store).order_by('pk').values(*COLUMNS)
+    ProductTransferJob.objects.filter(pk=job.pk).update(total_rows=products.count())
+    chunk_size = _config('CHUNK_SIZE')
+    suffix = f".{job.file_format}"
+    with tempfile.TemporaryFile(suffix=suffix) as tmp:
+        if job.file_format == ProductTransferJob.Format.XLSX:
+            workbook = openpyxl.Workbook(write_only=True)
+            sheet = workbook.create_sheet('Products')
+            write = sheet.append
+        else:
+            text = codecs.getwriter('utf-8')(tmp)
+            writer = csv.writer(text)
+            write = writer.writerow
+        write(COLUMNS)
+        processed = 0
+        for product in products.iterator(chunk_size=chunk_size):
+            write(_export_values(product))
+            processed += 1
+            if processed % chunk_size == 0:
+                ProductTransferJob.objects.filter(pk=job.pk).update(processed_rows=processed, heartbeat_at=timezone.now())
+        if job.file_format == ProductTransferJob.Format.XLSX:
+            workbook.save(tmp)
+        tmp.seek(0)
+        name = f"products-{job.store_id}-{timezone.now():%Y%m%d-%H%M%S}{suffix}"
+        job.file.save(name, File(tmp), save=False)
+    ProductTransferJob.objects.filter(pk=job.pk).update(file=job.file.name, processed_rows=processed)
+
+
+# ==============================================================================
+# JOBS
+# ==============================================================================
+def run_job(job_id):
+    now = timezone.now()
+    # Claiming the job by its status means a job that was requeued while its
+    # first submission was still waiting in the pool only runs once.
+    if not ProductTransferJob.objects.filter(pk=job_id, status=Status.PENDING).update(
+        status=Status.RUNNING, started_at=now, heartbeat_at=now,
+    ):
+        return
+    job = ProductTransferJob.objects.select_related('store').get(pk=job_id)
+    try:
+        if job.kind == ProductTransferJob.Kind.IMPORT:
+            import_products(job)
+        else:
+            export_products(job)
+    except Exception as e:
+        job.refresh_from_db(fields=['errors'])
+        ProductTransferJob.objects.filter(pk=job_id).update(
+            status=Status.FAILED, finished_at=timezone.now(),
+            errors=job.errors + [{'row': None, 'errors': {'non_field_errors': [f"The job failed: {e}"]}}],
+        )
+        raise
+    ProductTransferJob.objects.filter(pk=job_id).update(status=Status.COMPLETED, finished_at=timezone.now())
+
+
+def start(job):
+    """Queue the job on the background pool once the creating transaction commits."""
+    transaction.on_commit(lambda: tasks.submit(run_job, job.pk))
+
+
+def recover_stale_jobs(now=None):
+    """
+    Deal with jobs the in-process pool lost, e.g. to a worker restart: jobs
+    still PENDING, or RUNNING with no heartbeat, after STALE_AFTER. Pending
+    jobs and exports are requeued; an interrupted import has already committed
+    some chunks and would create those products twice, so it is failed for the
+    seller to fix and re-upload. Returns (requeued, failed).
+    """
+    now = now or timezone.now()
+    cutoff = now - _config('STALE_AFTER')
+    stale = ProductTransferJob.objects.filter(
+        Q(status=Status.PENDING, created_at__lt=cutoff) | Q(status=Status.RUNNING, heartbeat_at__lt=cutoff)
+    )
+    requeued = failed = 0
+    for job in stale.only('pk', 'kind', 'status', 'heartbeat_at', 'errors'):
+        # Each transition is conditional on what was read, so a job that made
+        # progress (or was recovered by another run) in the meantime is left alone.
+        current = ProductTransferJob.objects.filter(pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at)
+        if job.status == Status.RUNNING and job.kind == ProductTransferJob.Kind.IMPORT:
+            failed += current.update(
+                status=Status.FAILED, finished_at=now,
+                errors=job.errors + [{'row': None, 'errors': {'non_field_errors': [
+                    "The import was interrupted. Rows up to processed_rows were saved; "
+                    "upload the remaining rows again."
+                ]}}],
+            )
+        elif current.update(status=Status.PENDING, started_at=None, processed_rows=0):
+            tasks.submit(run_job, job.pk)
+            requeued += 1
+    return requeued, failed
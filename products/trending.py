@@ -0,0 +1,208 @@
+"""
+Trending scores for `?ordering=trending`.
+
+Views, add-to-order events and sales add TRENDING['WEIGHTS'] to a product's
+score, and an event's weight halves every HALF_LIFE. Rather than decaying
+every score as time passes, scores use forward decay: an event at time t adds
+
+    weight * 2 ** ((t - landmark) / HALF_LIFE)
+
+where the landmark is kept in TrendingClock. Newer events simply add more,
+so the ordering is exactly that of the decayed scores while stored scores
+only ever grow. `rescale()` (run by `manage.py decay_trending_scores`)
+moves the landmark to the present once it is RESCALE_AFTER old, dividing
+every score by the same factor in one UPDATE, which keeps the numbers small
+and leaves the ordering alone.
+
+Scores live in ProductTrending, one row per product, so a product save
+never touches them. Events are added to a per-worker buffer and written
+at most every FLUSH_INTERVAL seconds, one UPDATE per 500 products, so a
+product page view costs no write of its own. Web workers call
+`flush_in_background()` at startup, which also flushes an idle worker's
+buffer from a timer and flushes it once more when the worker exits.
+Events are still lost if a worker is killed; trending is approximate by
+design.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from orders.models import OrderItem
+from .models import ProductTrending, TrendingClock
+
+logger = logging.getLogger(__name__)
+
+
+def _config(name):
+    return settings.TRENDING[name]
+
+
+class Buffer:
+    """Event weights per product id, waiting to be flushed."""
+
+    def __init__(self):
+        self._weights = Counter()
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, weights):
+        """Add {product id: weight}; True when the buffer is due a flush."""
+        with self._lock:
+            self._weights.update(weights)
+            return (
+                len(self._weights) >= _config('FLUSH_SIZE')
+                or time.monotonic() - self._started >= _config('FLUSH_INTERVAL')
+            )
+
+    def drain(self):
+        with self._lock:
+            weights, self._weights = self._weights, Counter()
+            self._started = time.monotonic()
+        return weights
+
+
+buffer = Buffer()
+
+# Set by flush_in_background(); tests and management commands flush themselves.
+_background = False
+_timer = None
+_timer_lock = threading.Lock()
+
+
+def _clock():
+    """The landmark row, locked for the rest of the transaction."""
+    clock, _ = TrendingClock.objects.select_for_update().get_or_create(pk=1, defaults={'landmark': timezone.now()})
+    return clock
+
+
+def _growth(clock, now):
+    return 2 ** ((now - clock.landmark) / _config('HALF_LIFE'))
+
+
+def flush():
+    """Write the buffered events of this worker. Returns the number of products updated."""
+    weights = buffer.drain()
+    weights = {product_id: weight for product_id, weight in weights.items() if weight}
+    if not weights:
+        return 0
+    product_ids = sorted(weights)
+    with transaction.atomic():
+        growth = _growth(_clock(), timezone.now())
+        for start in range(0, len(product_ids), 500):
+            chunk = product_ids[start:start + 500]
+            # Products deleted since the event have no row left and are skipped.
+            ProductTrending.objects.filter(product_id__in=chunk).update(score=F('score') + Case(
+                *[When(product_id=product_id, then=Value(weights[product_id] * growth)) for product_id in chunk],
+                default=Value(0.0), output_field=FloatField(),
+            ))
+    return len(product_ids)
+
+
+def _flush_quietly():
+    """flush(), logging a failure instead of raising; its events are dropped."""
+    try:
+        flush()
+    except DatabaseError:
+        logger.exception("Could not flush trending scores")
+
+
+def _flush_from_timer():
+    try:
+        _flush_quietly()
+    finally:
+        connection.close()
+
+
+def _schedule():
+    """Start a timer that flushes this worker's buffer within FLUSH_INTERVAL, unless one is pending."""
+    global _timer
+    with _timer_lock:
+        if _timer is None or not _timer.is_alive():
+            _timer = threading.Timer(_config('FLUSH_INTERVAL'), _flush_from_timer)
+            _timer.daemon = True
+            _timer.start()
+
+
+def flush_in_background():
+    """
+    Make this process flush its buffer from a timer thread even when no
+    further events arrive, and once more when it exits. Called by the
+    WSGI and ASGI entry points.
+    """
+    global _background
+    if not _background:
+        _background = True
+        atexit.register(_flush_quietly)
+
+
+def record(event, quantities):
+    """
+    Buffer `event` ('view', 'order' or 'sale') for {product id: quantity}.
+    The worker that fills the buffer, or finds it FLUSH_INTERVAL old,
+    flushes it; a failed flush is logged and its events dropped.
+    """
+    weight = _config('WEIGHTS')[event]
+    if buffer.add({product_id: weight * quantity for product_id, quantity in quantities.items() if product_id}):
+        _flush_quietly()
+    elif _background:
+        _schedule()
+
+
+def record_view(product_id):
+    record('view', {product_id: 1})
+
+
+def record_after_commit(event, quantities):
+    """`record()` once the current transaction commits, so a rolled-back order counts nothing."""
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if product_id}
+    if quantities:
+        transaction.on_commit(lambda: record(event, quantities))
+
+
+def record_order(order_ids, event):
+    """
+    Buffer `event` for the items of `order_ids` once the current transaction
+    commits. Callers holding the items already use record_after_commit().
+    """
+    order_ids = list(order_ids)
+
+    def send():
+        quantities = Counter()
+        for product_id, quantity in OrderItem.objects.filter(
+            order_id__in=order_ids, product__isnull=False,
+        ).values_list('product_id', 'quantity'):
+            quantities[product_id] += quantity
+        if quantities:
+            record(event, quantities)
+
+    if order_ids:
+        transaction.on_commit(send)
+
+
+def rescale(now=None):
+    """
+    Flush this worker's buffer, then move the landmark to `now` if it is
+    at least RESCALE_AFTER old, shrinking every score by the same factor.
+    Scores that fall below MIN_SCORE drop to 0. Returns True if it rescaled.
+    """
+    flush()
+    now = now or timezone.now()
+    with transaction.atomic():
+        clock = _clock()
+        if now - clock.landmark < _config('RESCALE_AFTER'):
+            return False
+        shrink = 1 / _growth(clock, now)
+        ProductTrending.objects.filter(score__gt=0).update(score=Case(
+            When(score__lt=_config('MIN_SCORE') / shrink, then=Value(0.0)),
+            default=F('score') * shrink, output_field=FloatField(),
+        ))
+        clock.landmark = now
+        clock.save(update_fields=['landmark'])
+    return True
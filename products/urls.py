@@ -5,10 +5,17 @@ from .views import (
     ProductViewSet, 
     UpdateStockView, 
     StockHistoryListView,
+    StockHistoryDailyListView,
     ReviewListView, 
     CreateReviewView,
     CanReviewView,
-    EstimateDeliveryView
+    EstimateDeliveryView,
+    BatchEstimateDeliveryView,
+    BulkUpdateStockView,
+    ProductImportView,
+    ProductExportView,
+    ProductTransferJobView,
+    ProductTransferDownloadView,
 )
 
 router = DefaultRouter()
@@ -20,6 +27,13 @@ urlpatterns = [
     path('<int:pk>/create-review/', CreateReviewView.as_view(), name='create-review'),
     path('<int:pk>/can-review/', CanReviewView.as_view(), name='can-review'),
     path('<int:pk>/estimate-delivery/', EstimateDeliveryView.as_view(), name='estimate-delivery'),
+    path('estimate-delivery/', BatchEstimateDeliveryView.as_view(), name='batch-estimate-delivery'),
     path('stock-history/', StockHistoryListView.as_view(), name='stock-history'),
+    path('stock-history/daily/', StockHistoryDailyListView.as_view(), name='stock-history-daily'),
+    path('bulk-update-stock/', BulkUpdateStockView.as_view(), name='bulk-update-stock'),
+    path('import/', ProductImportView.as_view(), name='product-import'),
+    path('export/', ProductExportView.as_view(), name='product-export'),
+    path('transfer-jobs/<int:pk>/', ProductTransferJobView.as_view(), name='product-transfer-job'),
+    path('transfer-jobs/<int:pk>/download/', ProductTransferDownloadView.as_view(), name='product-transfer-download'),
     path('', include(router.urls)),
 ]
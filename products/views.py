@@ -1,23 +1,40 @@
-from datetime import date, timedelta
+from datetime import date
 from rest_framework import viewsets, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.filters import SearchFilter
-from rest_framework.generics import ListAPIView
+from rest_framework.filters import SearchFilter, BaseFilterBackend
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.utils.dateparse import parse_date
 
-from .models import Product, ProductImage, Review, StockHistory
+from .models import Product, ProductImage, ProductTransferJob, Review, StockHistory, StockHistoryDaily
 from .serializers import (
     ProductSerializer, 
+    ProductTransferJobSerializer,
+    BulkStockUpdateSerializer,
     StockHistorySerializer,
+    StockHistoryDailySerializer,
     ReviewSerializer
 )
+from . import stock, transfer, trending
+from .cards import ProductCardSerializer
 from users.models import Seller, Buyer
-from users.views import IsBuyer
+from users.views import IsBuyer, IsSeller
 from orders.models import Order
+from subscriptions import entitlements
+from categories.cache import get_category
+from categories.models import subtree_bounds
+from keralasellers import media
+from delivery import estimates, pincodes
+from delivery.serializers import BatchDeliveryEstimateSerializer
+from recommendations import neighbors
+from recommendations.models import ProductNeighbor
 
 
 # ==============================================================================
@@ -29,11 +46,40 @@ class ProductPagination(PageNumberPagination):
     max_page_size = 50
 
 
+class CategoryTreeFilter(BaseFilterBackend):
+    """
+    `?category_tree=<id>` keeps products in that category or any descendant.
+    The category's materialized path comes from the cached schema, so the
+    subtree is resolved with one index range on Category.path.
+    """
+    def filter_queryset(self, request, queryset, view):
+        category_id = request.query_params.get('category_tree')
+        if not category_id:
+            return queryset
+        entry = get_category(category_id)
+        if entry is None:
+            return queryset.none()
+        lower, upper = subtree_bounds(entry['path'])
+        return queryset.filter(category__path__gte=lower, category__path__lt=upper)
+
+
+class TrendingOrdering(BaseFilterBackend):
+    """
+    `?ordering=trending` lists the most popular products first; any other
+    value keeps the default order. Every product has a ProductTrending row,
+    so this is an inner join that can walk product_trending_idx.
+    """
+    def filter_queryset(self, request, queryset, view):
+        if request.query_params.get('ordering') != 'trending':
+            return queryset
+        return queryset.filter(trending__isnull=False).order_by('-trending__score', '-trending__product_id')
+
+
 class ProductViewSet(viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     pagination_class = ProductPagination
-    filter_backends = [SearchFilter, DjangoFilterBackend]
+    filter_backends = [SearchFilter, DjangoFilterBackend, CategoryTreeFilter, TrendingOrdering]
     search_fields = ['name', 'model_name', 'description']
     filterset_fields = ['category', 'sale_type', 'is_active']
 
@@ -63,8 +109,25 @@ class ProductViewSet(viewsets.ModelViewSet):
             sale_type__in=[Product.SaleType.ONLINE_AND_OFFLINE, Product.SaleType.ONLINE_ONLY]
         ).select_related('store', 'category').prefetch_related('sub_images', 'reviews').order_by('-created_at')
 
+    def list(self, request, *args, **kwargs):
+        """Serve list pages through the read-only card path (same JSON, far fewer queries)."""
+        queryset = ProductCardSerializer.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ProductCardSerializer(page, context=self.get_serializer_context()).data)
+        return Response(ProductCardSerializer(queryset, context=self.get_serializer_context()).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if not isinstance(request.user, Seller):
+            trending.record_view(response.data['id'])
+        return response
+
     def perform_create(self, serializer):
         """Create product with sub-images."""
+        if not entitlements.check(self.request.user, entitlements.ADD_PRODUCT):
+            raise PermissionDenied("Product limit reached for your plan. Upgrade your subscription to add more products.")
+
         sub_images_data = self.request.FILES.getlist('sub_images')
         
         # Save the main product
@@ -123,6 +186,39 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = ReviewSerializer(reviews, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='bought-together', permission_classes=[permissions.AllowAny])
+    def bought_together(self, request, pk=None):
+        """Products most often bought together with this one, best first."""
+        return self._neighbor_cards(pk, ProductNeighbor.Kind.BOUGHT_TOGETHER)
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny])
+    def similar(self, request, pk=None):
+        """Products with the most similar name, description, category and attributes."""
+        return self._neighbor_cards(pk, ProductNeighbor.Kind.SIMILAR)
+
+    def _neighbor_cards(self, pk, kind):
+        """
+        Cards for a product's precomputed neighbors of `kind`, in rank order.
+        The id list is cached, so a hit costs one query for the cards (plus
+        their images and ratings); neighbors no longer on sale are skipped.
+        """
+        try:
+            product_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        ids = neighbors.get(product_id, kind)
+        if not ids:
+            return Response([])
+        rank = {neighbor_id: position for position, neighbor_id in enumerate(ids)}
+        rows = ProductCardSerializer.project(Product.objects.filter(
+            pk__in=ids,
+            is_active=True,
+            online_stock__gt=0,
+            sale_type__in=[Product.SaleType.ONLINE_AND_OFFLINE, Product.SaleType.ONLINE_ONLY],
+        ))
+        rows = sorted(rows, key=lambda row: rank[row[0]])
+        return Response(ProductCardSerializer(rows, context=self.get_serializer_context()).data)
+
 
 # ==============================================================================
 # STOCK MANAGEMENT VIEWS
@@ -175,15 +271,62 @@ class UpdateStockView(APIView):
         })
 
 
+class BulkUpdateStockView(APIView):
+    """
+    Adjust many products' stock in one request. Each item sets
+    total_stock/online_stock or applies total_delta/online_delta; the
+    response has a result per item, in order.
+    """
+    permission_classes = [IsSeller]
+
+    def post(self, request):
+        serializer = BulkStockUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = stock.bulk_adjust(
+            request.user, serializer.validated_data['items'],
+            all_or_nothing=serializer.validated_data['all_or_nothing'],
+        )
+        updated = sum(1 for result in results if result['success'])
+        return Response({
+            'updated': updated,
+            'failed': len(results) - updated,
+            'results': results,
+        })
+
+
 class StockHistoryListView(ListAPIView):
     serializer_class = StockHistorySerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [IsSeller]
     pagination_class = ProductPagination
     
     def get_queryset(self):
+        # `user` is a generic FK, so it is prefetched: one query per user
+        # type for the page being served rather than one per row.
         return StockHistory.objects.filter(
-            product__store__seller=self.request.user
-        ).select_related('product', 'user').order_by('-timestamp')
+            store__seller=self.request.user
+        ).select_related('product').prefetch_related('user').order_by('-timestamp')
+
+
+class StockHistoryDailyListView(ListAPIView):
+    """
+    Daily per-product stock movement for history older than the raw
+    retention window. Filters: ?product=<id>, ?from=YYYY-MM-DD, ?to=YYYY-MM-DD.
+    """
+    serializer_class = StockHistoryDailySerializer
+    permission_classes = [IsSeller]
+    pagination_class = ProductPagination
+
+    def get_queryset(self):
+        queryset = StockHistoryDaily.objects.filter(store__seller=self.request.user)
+        params = self.request.query_params
+        if params.get('product', '').isdigit():
+            queryset = queryset.filter(product_id=params['product'])
+        for param, lookup in (('from', 'day__gte'), ('to', 'day__lte')):
+            day = parse_date(params.get(param, ''))
+            if day:
+                queryset = queryset.filter(**{lookup: day})
+        return queryset.select_related('product').order_by('-day', 'product_id', 'action')
 
 
 # ==============================================================================
@@ -283,27 +426,121 @@ class EstimateDeliveryView(APIView):
             return Response({
                 'error': 'Pincode is required for delivery estimation.'
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not store.pincode:
+        if pincodes.normalize(buyer_pincode) is None:
+            return Response({'error': 'Please enter a valid 6-digit pincode.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        estimate = estimates.estimate(store, buyer_pincode)
+        if estimate is None:
             return Response({
                 'estimate': 'Delivery information not available for this store.'
             })
-        
-        # Simple logic for Kerala (pincode starting with 6)
-        is_local = buyer_pincode.startswith('6') and store.pincode.startswith('6')
-        
-        if is_local and store.delivery_time_local:
-            estimate = f"Around {store.delivery_time_local}"
-        elif not is_local and store.delivery_time_national:
-            estimate = f"Around {store.delivery_time_national}"
-        else:
-            # Default estimation
-            delivery_days = 3 if is_local else 7
-            estimated_date = date.today() + timedelta(days=delivery_days)
-            estimate = f"By {estimated_date.strftime('%A, %b %d')}"
-        
+        return Response(estimates.describe(store, estimate))
+
+
+class BatchEstimateDeliveryView(APIView):
+    """
+    Delivery estimates for a cart page: every product's store priced
+    against one pincode, with each store classified once and one query for
+    the products.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = BatchDeliveryEstimateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pincode = serializer.validated_data['pincode']
+        product_ids = list(dict.fromkeys(serializer.validated_data['product_ids']))
+
+        products = Product.objects.filter(pk__in=product_ids).select_related('store').only(
+            'id', 'store__id', 'store__pincode', 'store__delivery_time_local', 'store__delivery_time_national',
+        )
+        store_ids = {product.pk: product.store_id for product in products}
+        stores = {product.store_id: product.store for product in products}
+        today = date.today()
+        described = {
+            store_id: estimates.describe(stores[store_id], estimate, today)
+            for store_id, estimate in estimates.estimate_many(stores.values(), pincode).items()
+        }
+
+        results = []
+        for product_id in product_ids:
+            if product_id not in store_ids:
+                results.append({'product_id': product_id, 'error': 'Product not found.'})
+                continue
+            store_id = store_ids[product_id]
+            estimate = described.get(store_id, {'estimate': 'Delivery information not available for this store.'})
+            results.append({'product_id': product_id, 'store_id': store_id, **estimate})
+        place = pincodes.lookup(pincode)
         return Response({
-            'estimate': estimate,
-            'is_local_delivery': is_local,
-            'store_location': store.pincode
+            'pincode': pincode,
+            'district': place.district if place else None,
+            'state': place.state if place else None,
+            'results': results,
         })
+
+
+# ==============================================================================
+# BULK IMPORT / EXPORT
+# ==============================================================================
+class ProductImportView(APIView):
+    """
+    Upload a CSV (or XLSX) of products. Rows with an `id` update that
+    product, other rows create new ones. Returns 202 with a job to poll.
+    """
+    permission_classes = [IsSeller]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'A file is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = transfer.detect_format(upload.name)
+        if file_format is None:
+            formats = '.csv or .xlsx' if transfer.openpyxl else '.csv'
+            return Response({'error': f'Upload a {formats} file.'}, status=status.HTTP_400_BAD_REQUEST)
+        if upload.size > settings.PRODUCT_TRANSFER['MAX_UPLOAD_SIZE']:
+            return Response({'error': 'The file is too large.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = ProductTransferJob.objects.create(
+            store=request.user.store_profile, kind=ProductTransferJob.Kind.IMPORT,
+            file_format=file_format, file=upload,
+        )
+        transfer.start(job)
+        serializer = ProductTransferJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ProductExportView(APIView):
+    """Start an export of all the seller's products (`format`: csv or xlsx)."""
+    permission_classes = [IsSeller]
+
+    def post(self, request):
+        file_format = transfer.detect_format(f"export.{request.data.get('format', 'csv')}")
+        if file_format is None:
+            return Response({'error': 'Unsupported export format.'}, status=status.HTTP_400_BAD_REQUEST)
+        job = ProductTransferJob.objects.create(
+            store=request.user.store_profile, kind=ProductTransferJob.Kind.EXPORT, file_format=file_format,
+        )
+        transfer.start(job)
+        serializer = ProductTransferJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ProductTransferJobView(RetrieveAPIView):
+    """Poll an import/export job for progress and per-row errors."""
+    serializer_class = ProductTransferJobSerializer
+    permission_classes = [IsSeller]
+
+    def get_queryset(self):
+        return ProductTransferJob.objects.filter(store__seller=self.request.user)
+
+
+class ProductTransferDownloadView(APIView):
+    permission_classes = [IsSeller]
+
+    def get(self, request, pk=None):
+        job = get_object_or_404(
+            ProductTransferJob, pk=pk, store__seller=request.user,
+            kind=ProductTransferJob.Kind.EXPORT, status=ProductTransferJob.Status.COMPLETED,
+        )
+        return media.serve(request, job.file.name, job.file.storage, as_attachment=True)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import ProductNeighbor
+
+
+@admin.register(ProductNeighbor)
+class ProductNeighborAdmin(admin.ModelAdmin):
+    list_display = ('product', 'kind', 'rank', 'neighbor', 'score')
+    list_filter = ('kind',)
+    raw_id_fields = ('product', 'neighbor')
@@ -0,0 +1,182 @@
+"""
+"Frequently bought together" lists from delivered orders.
+
+Each delivered order is a basket of distinct products. The job adds every
+pair in the basket to a sparse co-occurrence matrix (CoPurchase, upper
+triangle only) and records the order in CoPurchaseOrder, so each run only
+counts orders delivered since the last one. The products whose counts moved
+then get their top-K list recomputed with cosine similarity,
+
+    score(a, b) = orders(a, b) / sqrt(orders(a) * orders(b)),
+
+which keeps best-sellers from topping every list. A new order also shifts
+the scores other products give to the ones in it; those lists catch up the
+next time they are touched, or on a `--full` rebuild.
+"""
+import math
+from collections import Counter, defaultdict
+from itertools import chain, combinations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from orders.models import Order, OrderItem
+from . import neighbors
+from .models import CoPurchase, CoPurchaseOrder, ProductNeighbor
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python counter gives the same result.
+    np = None
+
+KIND = ProductNeighbor.Kind.BOUGHT_TOGETHER
+
+
+def _config(name):
+    return settings.RECOMMENDATIONS[name]
+
+
+def count_pairs(baskets):
+    """
+    {(a, b): orders} over the upper triangle (a <= b) of the co-occurrence
+    matrix of `baskets`, each a sorted list of distinct product ids.
+    (a, a) is the number of baskets holding a.
+    """
+    if np is not None and baskets:
+        return _count_numpy(baskets)
+    counts = Counter()
+    for basket in baskets:
+        counts.update(zip(basket, basket))
+        counts.update(combinations(basket, 2))
+    return counts
+
+
+def _count_numpy(baskets):
+    # Products are renumbered 0..n-1 so a pair packs into one int64 code.
+    # Baskets of the same size are stacked into a matrix and all their
+    # pairs taken at once with the upper-triangle indices for that size.
+    products = np.unique(np.fromiter(chain.from_iterable(baskets), dtype=np.int64))
+    n = len(products)
+    by_size = defaultdict(list)
+    for basket in baskets:
+        by_size[len(basket)].append(basket)
+    codes = []
+    for size, group in by_size.items():
+        dense = np.searchsorted(products, np.array(group, dtype=np.int64))
+        first, second = np.triu_indices(size)
+        codes.append((dense[:, first] * n + dense[:, second]).ravel())
+    pairs, counts = np.unique(np.concatenate(codes), return_counts=True)
+    a, b = products[pairs // n], products[pairs % n]
+    return dict(zip(zip(a.tolist(), b.tolist()), counts.tolist()))
+
+
+def _pending_orders(size):
+    """Ids of delivered orders not yet counted, `size` at a time in pk order."""
+    pending = Order.objects.filter(
+        status=Order.OrderStatus.DELIVERED, co_purchase__isnull=True,
+    ).order_by('pk').values_list('pk', flat=True)
+    last = 0
+    while True:
+        ids = list(pending.filter(pk__gt=last)[:size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def _baskets(order_ids):
+    """Sorted product ids of each order, leaving out bulk orders over MAX_BASKET."""
+    wanted = set(order_ids)
+    baskets = defaultdict(set)
+    rows = OrderItem.objects.filter(
+        order_id__gte=order_ids[0], order_id__lte=order_ids[-1], product__isnull=False,
+    ).values_list('order_id', 'product_id')
+    for order_id, product_id in rows.iterator(chunk_size=2000):
+        if order_id in wanted:
+            baskets[order_id].add(product_id)
+    limit = _config('MAX_BASKET')
+    return [sorted(basket) for basket in baskets.values() if len(basket) <= limit]
+
+
+def _merge(counts):
+    """Add `counts` into CoPurchase."""
+    for chunk in neighbors.batches(counts, 500):
+        existing = {
+            (row.product_a_id, row.product_b_id): row
+            for row in CoPurchase.objects.filter(
+                product_a_id__in={a for a, _ in chunk}, product_b_id__in={b for _, b in chunk},
+            )
+        }
+        updated, created = [], []
+        for pair in chunk:
+            row = existing.get(pair)
+            if row is None:
+                created.append(CoPurchase(product_a_id=pair[0], product_b_id=pair[1], orders=counts[pair]))
+            else:
+                row.orders += counts[pair]
+                updated.append(row)
+        CoPurchase.objects.bulk_update(updated, ['orders'], batch_size=500)
+        CoPurchase.objects.bulk_create(created, batch_size=500)
+
+
+def _totals(product_ids):
+    totals = {}
+    for chunk in neighbors.batches(product_ids, 500):
+        totals.update(
+            CoPurchase.objects.filter(product_a_id__in=chunk, product_b=F('product_a'))
+            .values_list('product_a_id', 'orders')
+        )
+    return totals
+
+
+def refresh(product_ids):
+    """Recompute the top-K lists of `product_ids` from CoPurchase."""
+    k, support = _config('TOP_K'), _config('MIN_SUPPORT')
+    for chunk in neighbors.batches(sorted(product_ids), 500):
+        members = set(chunk)
+        pairs = defaultdict(dict)
+        rows = CoPurchase.objects.filter(
+            Q(product_a_id__in=chunk) | Q(product_b_id__in=chunk), orders__gte=support,
+        ).values_list('product_a_id', 'product_b_id', 'orders')
+        for a, b, orders in rows.iterator(chunk_size=2000):
+            if a == b:
+                continue
+            if a in members:
+                pairs[a][b] = orders
+            if b in members:
+                pairs[b][a] = orders
+        totals = _totals(members.union(*pairs.values()))
+        lists = {}
+        for product_id in chunk:
+            scores = {
+                other: orders / math.sqrt(totals[product_id] * totals[other])
+                for other, orders in pairs[product_id].items()
+            }
+            lists[product_id] = neighbors.top_k(scores, k)
+        neighbors.replace(KIND, lists)
+
+
+def build(full=False):
+    """
+    Count delivered orders not seen before and refresh the lists of every
+    product they contain. `full` starts the matrix over from every
+    delivered order. Returns (orders counted, products refreshed).
+    """
+    if full:
+        with transaction.atomic():
+            CoPurchaseOrder.objects.all().delete()
+            CoPurchase.objects.all().delete()
+            neighbors.clear(KIND)
+    counted, touched = 0, set()
+    for order_ids in _pending_orders(_config('BATCH_ORDERS')):
+        counts = count_pairs(_baskets(order_ids))
+        with transaction.atomic():
+            _merge(counts)
+            CoPurchaseOrder.objects.bulk_create(
+                [CoPurchaseOrder(order_id=order_id) for order_id in order_ids], batch_size=1000,
+            )
+        counted += len(order_ids)
+        touched.update(a for a, b in counts if a == b)
+    refresh(touched)
+    return counted, len(touched)
@@ -0,0 +1,97 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from products.models import Product
+from recommendations import similar
+from recommendations.models import SimilarityQueue
+from users.models import Seller
+
+# Synthetic catalogue: a name is a variety, a product and a pack size, so
+# products share a few words each with many others.
+VARIETIES = [f"variety{i}" for i in range(400)]
+PRODUCTS = [f"item{i}" for i in range(300)]
+WORDS = [f"word{i}" for i in range(5000)]
+PACKS = ['100g', '250g', '500g', '1kg', 'pack of 2']
+
+
+def _timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def _brute_force(index, product_id):
+    """Cosine against every product, as a request-time scorer would."""
+    vector = index.vectors[product_id]
+    scores = {}
+    for other, other_vector in index.vectors.items():
+        if other != product_id:
+            score = sum(weight * other_vector.get(feature, 0.0) for feature, weight in vector.items())
+            if score >= similar._config('SIMILAR_MIN_SCORE'):
+                scores[other] = score
+    return scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark similar-product lists over a synthetic catalogue: brute-force "
+        "cosine for one product versus the inverted index, a full rebuild, and an "
+        "incremental refresh after one product changes. Runs in a throwaway test "
+        "database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000)
+        parser.add_argument('--samples', type=int, default=20, help='Products scored one at a time.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        store = Seller.objects.create_user(phone='9000000000', password='bench').store_profile
+        Product.objects.bulk_create(
+            [
+                Product(
+                    store=store, name=f"{rng.choice(VARIETIES)} {rng.choice(PRODUCTS)} {rng.choice(PACKS)}",
+                    description=' '.join(rng.choices(WORDS, k=30)), price=10, mrp=10,
+                    total_stock=5, online_stock=5, attributes={'grade': rng.choice('ABC')},
+                )
+                for _ in range(options['products'])
+            ],
+            batch_size=2000,
+        )
+        self.stdout.write(f"numpy: {'yes' if similar.np is not None else 'no'}; {options['products']} products")
+
+        index, seconds = _timed(lambda: similar.Index(similar.documents()))
+        self.stdout.write(f"  tokenize + index       {seconds * 1000:9.1f} ms")
+        sample = rng.sample(index.ids, options['samples'])
+        for product_id in sample:
+            assert index.scores(product_id).keys() == _brute_force(index, product_id).keys(), 'index misses products'
+        _, brute = _timed(lambda: [_brute_force(index, product_id) for product_id in sample])
+        _, indexed = _timed(lambda: [index.scores(product_id) for product_id in sample])
+        self.stdout.write(f"  brute force / product  {brute / len(sample) * 1000:9.2f} ms")
+        self.stdout.write(
+            f"  index / product        {indexed / len(sample) * 1000:9.2f} ms  {brute / indexed:6.1f}x"
+        )
+
+        written, seconds = _timed(lambda: similar.build(full=True))
+        self.stdout.write(f"  full rebuild           {seconds * 1000:9.1f} ms  {written} lists")
+
+        product = Product.objects.get(pk=sample[0])
+        product.name = f"{product.name} premium"
+        product.save(update_fields=['name'])
+        assert SimilarityQueue.objects.filter(product_id=product.pk).exists()
+        written, seconds = _timed(similar.build)
+        self.stdout.write(f"  incremental, 1 edit    {seconds * 1000:9.1f} ms  {written} lists")
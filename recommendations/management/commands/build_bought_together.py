@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from recommendations import bought_together
+
+
+class Command(BaseCommand):
+    help = "Count newly delivered orders into the co-purchase matrix and refresh the affected bought-together lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Discard the matrix and recount every delivered order.")
+
+    def handle(self, *args, **options):
+        orders, products = bought_together.build(full=options['full'])
+        self.stdout.write(f"Counted {orders} order(s); refreshed {products} product list(s).")
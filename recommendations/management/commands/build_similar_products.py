@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from recommendations import similar
+
+
+class Command(BaseCommand):
+    help = "Refresh the similar-product lists of products whose text changed, and the lists they affect."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Re-tokenize the catalogue and rebuild every product's list.")
+
+    def handle(self, *args, **options):
+        written = similar.build(full=options['full'])
+        self.stdout.write(f"Refreshed {written} product list(s).")
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_producttransferjob_heartbeat_at'),
+        ('recommendations', '0002_similarityqueue_alter_productneighbor_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField()),
+                ('weight', models.FloatField()),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['feature', 'product'], name='similarityterm_feature_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'feature'), name='unique_similarity_term')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import models
+from django.utils import timezone
+
+from orders.models import Order
+from products.models import Product
+
+
+class ProductNeighbor(models.Model):
+    """
+    Precomputed top-K recommendation lists: `neighbor` is the product's
+    `rank`-th best match of `kind`. Read in rank order with one index range.
+    """
+    class Kind(models.TextChoices):
+        BOUGHT_TOGETHER = 'BOUGHT', 'Frequently bought together'
+        SIMILAR = 'SIMILAR', 'Similar products'
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='neighbors')
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    rank = models.PositiveSmallIntegerField()
+    neighbor = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'kind', 'rank'], name='unique_product_neighbor_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.neighbor_id} ({self.kind} #{self.rank})"
+
+
+class CoPurchase(models.Model):
+    """
+    One non-zero cell of the upper triangle (product_a <= product_b) of the
+    delivered-order co-occurrence matrix: `orders` is how many orders held
+    both products. The diagonal (product_a == product_b) is the product's
+    own order count.
+    """
+    product_a = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', db_index=False)
+    product_b = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', db_index=False)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product_a', 'product_b'], name='unique_co_purchase_pair'),
+        ]
+        indexes = [models.Index(fields=['product_b', 'product_a'], name='copurchase_b_a_idx')]
+
+
+class CoPurchaseOrder(models.Model):
+    """Delivered orders already counted into CoPurchase, so runs are incremental."""
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, primary_key=True, related_name='co_purchase')
+
+
+class SimilarityQueue(models.Model):
+    """Products whose text changed since their similar lists were last built."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    queued_at = models.DateTimeField(default=timezone.now)
+
+
+class SimilarityTerm(models.Model):
+    """
+    One hashed text feature of a listed product: its weighted term count and
+    its weight in the product's unit-length TF-IDF vector (0 for features in
+    too much of the catalogue). These are the postings recommendations.similar
+    keeps between runs, so an incremental build only re-tokenizes queued
+    products and reads the postings of the features they have.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+', db_index=False)
+    feature = models.PositiveIntegerField()
+    count = models.PositiveIntegerField()
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'feature'], name='unique_similarity_term'),
+        ]
+        indexes = [models.Index(fields=['feature', 'product'], name='similarityterm_feature_idx')]
@@ -0,0 +1,65 @@
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+
+from keralasellers.cache import Namespace
+from .models import ProductNeighbor
+
+neighbor_cache = Namespace('neighbors')
+
+
+def _config(name):
+    return settings.RECOMMENDATIONS[name]
+
+
+def _key(kind, product_id):
+    return f"{kind}:{product_id}"
+
+
+def batches(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def top_k(scores, k):
+    """The `k` best (neighbor_id, score) pairs of a {neighbor_id: score} dict, ties to the lower id."""
+    return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def get(product_id, kind):
+    """A product's neighbor ids of `kind`, best first. Cached until the lists are rebuilt."""
+    return neighbor_cache.get_or_compute(
+        _key(kind, product_id),
+        lambda: list(
+            ProductNeighbor.objects.filter(product_id=product_id, kind=kind)
+            .order_by('rank').values_list('neighbor_id', flat=True)
+        ),
+        _config('CACHE_TIMEOUT'),
+    )
+
+
+def replace(kind, lists):
+    """
+    Store `{product_id: [(neighbor_id, score), ...]}` (best first) as the
+    products' lists of `kind`, dropping their old ones. An empty list
+    clears a product.
+    """
+    for chunk in batches(lists, 500):
+        with transaction.atomic():
+            ProductNeighbor.objects.filter(kind=kind, product_id__in=chunk).delete()
+            ProductNeighbor.objects.bulk_create(
+                [
+                    ProductNeighbor(product_id=product_id, kind=kind, rank=rank, neighbor_id=neighbor_id, score=score)
+                    for product_id in chunk
+                    for rank, (neighbor_id, score) in enumerate(lists[product_id])
+                ],
+                batch_size=1000,
+            )
+        neighbor_cache.delete_many([_key(kind, product_id) for product_id in chunk])
+
+
+def clear(kind):
+    """Drop every list of `kind`. Lists already cached age out after CACHE_TIMEOUT."""
+    ProductNeighbor.objects.filter(kind=kind).delete()
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from products.models import Product
+from . import similar
+
+
+@receiver(post_save, sender=Product)
+def queue_similar_refresh(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not similar.SIMILARITY_FIELDS.intersection(update_fields):
+        return
+    # products.signals stores the pre-save values, so full saves that only
+    # touch stock (checkout, stock updates) don't queue a refresh.
+    if created or getattr(instance, '_old_similarity', None) != similar.signature(instance):
+        similar.enqueue([instance.pk])
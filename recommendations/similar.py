@@ -0,0 +1,323 @@
+"""
+"Similar products" lists from product text, for products without sales yet.
+
+Each listed product becomes a sparse TF-IDF vector over hashed terms: words
+and word pairs of the name, the model name and its words, words of the
+description, the category and each of its ancestors, and the attribute
+key/value pairs. Terms are hashed into SIMILAR_FEATURES buckets, so no
+vocabulary is stored, and terms found in more than SIMILAR_MAX_DF of the
+catalogue are dropped: they say little about similarity and would make the
+posting lists as long as the catalogue. Cosine similarity is then a sparse
+dot product over an inverted index, so each product is only scored against
+the ones sharing a term with it.
+
+Each product's hashed term counts are stored as SimilarityTerm rows.
+Saving a product queues it when its text changes (see
+recommendations.signals). `build()` re-tokenizes only the queued products,
+then refreshes their lists, the lists they were in and the lists they now
+score high enough to join, reading just the postings those products share;
+`build(full=True)` re-tokenizes the catalogue and refreshes every list.
+"""
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from categories.models import PATH_SEPARATOR
+from products.models import Product
+from . import neighbors
+from .models import ProductNeighbor, SimilarityQueue, SimilarityTerm
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python scorer gives the same lists.
+    np = None
+
+KIND = ProductNeighbor.Kind.SIMILAR
+
+# Term weights per field: a shared name word says more than a shared
+# description word.
+NAME_WEIGHT = 3
+MODEL_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+CATEGORY_WEIGHT = 2
+ATTRIBUTE_WEIGHT = 2
+
+# Small catalogues keep every term; SIMILAR_MAX_DF only applies past this.
+MIN_DF_LIMIT = 100
+
+# Fields that change a product's similar list, or whether it has one.
+SIMILARITY_FIELDS = frozenset({'name', 'model_name', 'description', 'category', 'attributes', 'is_active', 'sale_type'})
+
+STOP_WORDS = frozenset('an and for from in is of on or the to with'.split())
+_WORD = re.compile(r'\w+')
+
+
+def _config(name):
+    return settings.RECOMMENDATIONS[name]
+
+
+def _words(text):
+    return [word for word in _WORD.findall((text or '').lower()) if len(word) > 1 and word not in STOP_WORDS]
+
+
+def terms(name, model_name, description, category_path, attributes):
+    """Weighted term counts of one product's text."""
+    counts = Counter()
+    words = _words(name)
+    for word in words:
+        counts[f"w:{word}"] += NAME_WEIGHT
+    for first, second in zip(words, words[1:]):
+        counts[f"p:{first} {second}"] += NAME_WEIGHT
+    if model_name and model_name.strip():
+        counts[f"m:{model_name.strip().lower()}"] += MODEL_WEIGHT
+        for word in _words(model_name):
+            counts[f"w:{word}"] += MODEL_WEIGHT
+    for word in _words(description):
+        counts[f"w:{word}"] += DESCRIPTION_WEIGHT
+    for category_id in filter(None, (category_path or '').split(PATH_SEPARATOR)):
+        counts[f"c:{category_id}"] += CATEGORY_WEIGHT
+    if isinstance(attributes, dict):
+        for key, value in attributes.items():
+            counts[f"a:{key}={value}".lower()] += ATTRIBUTE_WEIGHT
+    return counts
+
+
+def features(counts):
+    """Term counts hashed into feature buckets; crc32 is stable across processes, unlike hash()."""
+    size = _config('SIMILAR_FEATURES')
+    hashed = Counter()
+    for term, count in counts.items():
+        hashed[zlib.crc32(term.encode()) % size] += count
+    return hashed
+
+
+def signature(product):
+    """The values of SIMILARITY_FIELDS on `product`, to tell whether a save changed them."""
+    return tuple(getattr(product, Product._meta.get_field(name).attname) for name in sorted(SIMILARITY_FIELDS))
+
+
+def _listed():
+    return Product.objects.filter(
+        is_active=True, sale_type__in=[Product.SaleType.ONLINE_AND_OFFLINE, Product.SaleType.ONLINE_ONLY],
+    ).order_by()
+
+
+def documents(product_ids=None):
+    """{product id: hashed features} for every active product sold online, or just those of `product_ids`."""
+    fields = ('pk', 'name', 'model_name', 'description', 'category__path', 'attributes')
+    if product_ids is None:
+        rows = _listed().values_list(*fields).iterator(chunk_size=2000)
+    else:
+        rows = (row for chunk in neighbors.batches(product_ids, 500)
+                for row in _listed().filter(pk__in=chunk).values_list(*fields))
+    return {row[0]: features(terms(*row[1:])) for row in rows}
+
+
+def _idf(df, total):
+    """Inverse document frequencies of the features in at most SIMILAR_MAX_DF of `total` documents."""
+    limit = max(_config('SIMILAR_MAX_DF') * total, MIN_DF_LIMIT)
+    return {feature: math.log((1 + total) / (1 + count)) + 1 for feature, count in df.items() if count <= limit}
+
+
+def weigh(counts, idf):
+    """One document's unit-length TF-IDF vector; features without an idf are dropped."""
+    vector = {feature: (1 + math.log(count)) * idf[feature] for feature, count in counts.items() if feature in idf}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+
+
+class Index:
+    """Unit-length TF-IDF vectors of a set of documents and their inverted index."""
+
+    def __init__(self, docs):
+        self.ids = list(docs)
+        self.position = {product_id: position for position, product_id in enumerate(self.ids)}
+        df = Counter()
+        for counts in docs.values():
+            df.update(counts.keys())
+        idf = _idf(df, len(docs))
+
+        self.vectors = {}
+        postings = defaultdict(list)
+        for position, (product_id, counts) in enumerate(docs.items()):
+            vector = self.vectors[product_id] = weigh(counts, idf)
+            for feature, weight in vector.items():
+                postings[feature].append((position, weight))
+        if np is not None:
+            self.id_array = np.array(self.ids, dtype=np.int64)
+            self.postings = {
+                feature: (np.array([p for p, _ in entries], dtype=np.int64), np.array([w for _, w in entries]))
+                for feature, entries in postings.items()
+            }
+        else:
+            self.postings = postings
+
+    def __contains__(self, product_id):
+        return product_id in self.position
+
+    def scores(self, product_id):
+        """{other id: cosine} for the products scoring at least SIMILAR_MIN_SCORE against this one."""
+        vector, own = self.vectors[product_id], self.position[product_id]
+        floor = _config('SIMILAR_MIN_SCORE')
+        if np is not None:
+            totals = np.zeros(len(self.ids))
+            for feature, weight in vector.items():
+                positions, weights = self.postings[feature]
+                totals[positions] += weight * weights  # a posting list holds each product once
+            totals[own] = 0
+            hits = np.flatnonzero(totals >= floor)
+            return dict(zip(self.id_array[hits].tolist(), totals[hits].tolist()))
+        totals = defaultdict(float)
+        for feature, weight in vector.items():
+            for position, other in self.postings[feature]:
+                totals[position] += weight * other
+        return {self.ids[position]: score for position, score in totals.items() if position != own and score >= floor}
+
+
+def enqueue(product_ids):
+    now = timezone.now()
+    SimilarityQueue.objects.bulk_create(
+        [SimilarityQueue(product_id=product_id, queued_at=now) for product_id in product_ids],
+        update_conflicts=True, unique_fields=['product'], update_fields=['queued_at'],
+    )
+
+
+def _delete_terms(product_ids=None):
+    """Drop the stored terms of `product_ids`, or of every product when None."""
+    if product_ids is None:
+        SimilarityTerm.objects.all().delete()
+    for chunk in neighbors.batches(product_ids or (), 500):
+        SimilarityTerm.objects.filter(product_id__in=chunk).delete()
+
+
+def _save_terms(docs, vectors):
+    """Store each document's feature counts with their weights; features over SIMILAR_MAX_DF get 0."""
+    for chunk in neighbors.batches(docs, 500):
+        SimilarityTerm.objects.bulk_create(
+            [
+                SimilarityTerm(
+                    product_id=product_id, feature=feature, count=count, weight=vectors[product_id].get(feature, 0.0),
+                )
+                for product_id in chunk
+                for feature, count in docs[product_id].items()
+            ],
+            batch_size=2000,
+        )
+
+
+def _weigh_queued(docs):
+    """
+    Vectors of re-tokenized products, against the document frequencies of
+    the stored catalogue (their own old terms are already deleted).
+    """
+    df = Counter()
+    for counts in docs.values():
+        df.update(counts.keys())
+    for chunk in neighbors.batches(df, 500):
+        for feature, documents in SimilarityTerm.objects.filter(feature__in=chunk).values('feature').annotate(
+            documents=Count('pk'),
+        ).values_list('feature', 'documents'):
+            df[feature] += documents
+    idf = _idf(df, _listed().count())
+    return {product_id: weigh(counts, idf) for product_id, counts in docs.items()}
+
+
+def _stored_scores(product_ids):
+    """
+    {product id: {other id: cosine}} from the stored postings: only the
+    postings of the products' own features are read.
+    """
+    by_feature = defaultdict(list)
+    for chunk in neighbors.batches(product_ids, 500):
+        for product_id, feature, weight in SimilarityTerm.objects.filter(
+            product_id__in=chunk, weight__gt=0,
+        ).values_list('product_id', 'feature', 'weight'):
+            by_feature[feature].append((product_id, weight))
+    totals = defaultdict(lambda: defaultdict(float))
+    for chunk in neighbors.batches(by_feature, 500):
+        for feature, other, other_weight in SimilarityTerm.objects.filter(
+            feature__in=chunk, weight__gt=0,
+        ).values_list('feature', 'product_id', 'weight'):
+            for product_id, weight in by_feature[feature]:
+                totals[product_id][other] += weight * other_weight
+    floor = _config('SIMILAR_MIN_SCORE')
+    return {
+        product_id: {other: score for other, score in totals[product_id].items() if other != product_id and score >= floor}
+        for product_id in product_ids
+    }
+
+
+def _affected(scores, queued):
+    """Products whose lists a queued product was in, or may now belong in."""
+    k = _config('TOP_K')
+    affected = set()
+    for chunk in neighbors.batches(queued, 500):
+        affected.update(
+            ProductNeighbor.objects.filter(kind=KIND, neighbor_id__in=chunk).values_list('product_id', flat=True)
+        )
+    floors = {}
+    for chunk in neighbors.batches({other for found in scores.values() for other in found}, 500):
+        floors.update(
+            (product_id, (length, lowest))
+            for product_id, length, lowest in ProductNeighbor.objects.filter(kind=KIND, product_id__in=chunk)
+            .values('product_id').annotate(length=Count('pk'), lowest=Min('score'))
+            .values_list('product_id', 'length', 'lowest')
+        )
+    for found in scores.values():
+        for other, score in found.items():
+            length, lowest = floors.get(other, (0, 0.0))
+            if length < k or score > lowest:
+                affected.add(other)
+    return affected - queued
+
+
+def build(full=False):
+    """
+    Refresh similar lists: those of queued products and the lists they
+    affect, or every list with `full` (also the first time, before any
+    terms are stored). Products no longer listed get an empty list.
+    Returns the number of lists written.
+
+    An incremental run weighs the queued products against today's document
+    frequencies and scores from the stored postings, so other products keep
+    the weights of the build that last tokenized them; a periodic full
+    build brings every weight up to date.
+    """
+    started = timezone.now()
+    queued = set(SimilarityQueue.objects.values_list('product_id', flat=True))
+    if full or not SimilarityTerm.objects.exists():
+        docs = documents()
+        index = Index(docs)
+        with transaction.atomic():
+            _delete_terms()
+            _save_terms(docs, index.vectors)
+        # Products that have a list but are no longer indexed get it cleared.
+        targets = set(index.ids).union(
+            ProductNeighbor.objects.filter(kind=KIND).values_list('product_id', flat=True).distinct()
+        )
+
+        def scores(product_id):
+            return index.scores(product_id) if product_id in index else {}
+    else:
+        docs = documents(queued)
+        with transaction.atomic():
+            _delete_terms(queued)
+            _save_terms(docs, _weigh_queued(docs))
+        found = _stored_scores(queued)
+        affected = _affected(found, queued)
+        found.update(_stored_scores(affected))
+        targets = queued | affected
+        scores = found.__getitem__
+    k = _config('TOP_K')
+    for chunk in neighbors.batches(sorted(targets), 500):
+        neighbors.replace(KIND, {product_id: neighbors.top_k(scores(product_id), k) for product_id in chunk})
+    # Products saved again while this ran stay queued for the next run.
+    for chunk in neighbors.batches(queued, 500):
+        SimilarityQueue.objects.filter(product_id__in=chunk, queued_at__lte=started).delete()
+    return len(targets)
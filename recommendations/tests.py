@@ -0,0 +1,189 @@
+import random
+import unittest
+from collections import Counter
+from itertools import combinations
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from categories.models import Category
+from orders.models import Order, OrderItem
+from products.models import Product
+from users.models import Seller
+from . import bought_together, similar
+from .models import CoPurchase, ProductNeighbor, SimilarityQueue
+
+RECOMMENDATIONS = {
+    'TOP_K': 2,
+    'MIN_SUPPORT': 2,
+    'BATCH_ORDERS': 2,
+    'MAX_BASKET': 3,
+    'CACHE_TIMEOUT': 60,
+    'SIMILAR_FEATURES': 2 ** 20,
+    'SIMILAR_MAX_DF': 0.1,
+    'SIMILAR_MIN_SCORE': 0.1,
+}
+
+
+class CountPairsTests(unittest.TestCase):
+    def baskets(self):
+        rng = random.Random(7)
+        return [sorted(rng.sample(range(1, 40), rng.randint(1, 6))) for _ in range(300)]
+
+    def expected(self, baskets):
+        counts = Counter()
+        for basket in baskets:
+            counts.update((a, a) for a in basket)
+            counts.update(combinations(basket, 2))
+        return counts
+
+    @unittest.skipIf(bought_together.np is None, 'numpy is not installed')
+    def test_numpy_matches_python(self):
+        baskets = self.baskets()
+        self.assertEqual(bought_together._count_numpy(baskets), self.expected(baskets))
+
+    def test_counts_upper_triangle(self):
+        baskets = self.baskets()
+        self.assertEqual(dict(bought_together.count_pairs(baskets)), dict(self.expected(baskets)))
+        self.assertEqual(dict(bought_together.count_pairs([])), {})
+
+
+@override_settings(RECOMMENDATIONS=RECOMMENDATIONS)
+class BoughtTogetherTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller').store_profile
+        self.pepper, self.tea, self.cardamom, self.coffee = (
+            Product.objects.create(store=self.store, name=name, price=10, total_stock=5, online_stock=5)
+            for name in ('Pepper', 'Tea', 'Cardamom', 'Coffee')
+        )
+
+    def order(self, *products, status=Order.OrderStatus.DELIVERED):
+        order = Order.objects.create(
+            store=self.store, customer_name='Buyer', customer_phone='9000000002',
+            shipping_address='Kochi', total_amount=10, status=status,
+        )
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=10)
+        return order
+
+    def lists(self):
+        return {
+            product_id: [neighbor for neighbor, _ in group]
+            for product_id, group in _grouped(ProductNeighbor.objects.order_by('product_id', 'rank'))
+        }
+
+    def test_incremental_build(self):
+        self.order(self.pepper, self.tea)
+        self.order(self.pepper, self.tea, self.cardamom)
+        self.order(self.pepper, self.cardamom)
+        self.order(self.pepper, self.tea, self.cardamom, self.coffee)  # over MAX_BASKET
+        self.order(self.pepper, self.coffee, status=Order.OrderStatus.SHIPPED)
+
+        self.assertEqual(bought_together.build(), (4, 3))
+        self.assertEqual(CoPurchase.objects.get(product_a=self.pepper, product_b=self.tea).orders, 2)
+        self.assertEqual(self.lists(), {
+            self.pepper.pk: [self.tea.pk, self.cardamom.pk],
+            self.tea.pk: [self.pepper.pk],
+            self.cardamom.pk: [self.pepper.pk],
+        })
+
+        self.assertEqual(bought_together.build(), (0, 0))
+        self.order(self.tea, self.cardamom)
+        Order.objects.filter(status=Order.OrderStatus.SHIPPED).update(status=Order.OrderStatus.DELIVERED)
+        self.assertEqual(bought_together.build(), (2, 4))
+        self.assertEqual(CoPurchase.objects.get(product_a=self.tea, product_b=self.cardamom).orders, 2)
+        self.assertEqual(self.lists()[self.tea.pk], [self.cardamom.pk, self.pepper.pk])
+
+        before = list(CoPurchase.objects.order_by('product_a', 'product_b').values_list('product_a', 'product_b', 'orders'))
+        self.assertEqual(bought_together.build(full=True), (6, 4))
+        after = list(CoPurchase.objects.order_by('product_a', 'product_b').values_list('product_a', 'product_b', 'orders'))
+        self.assertEqual(before, after)
+
+    def test_endpoint(self):
+        self.order(self.pepper, self.tea, self.cardamom)
+        self.order(self.pepper, self.tea, self.cardamom)
+        bought_together.build()
+        url = f'/api/products/{self.pepper.pk}/bought-together/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['name'] for card in response.data], ['Tea', 'Cardamom'])
+
+        self.tea.is_active = False
+        self.tea.save()
+        with self.assertNumQueries(3):  # cards, images, ratings; the id list is cached
+            response = self.client.get(url)
+        self.assertEqual([card['name'] for card in response.data], ['Cardamom'])
+        self.assertEqual(self.client.get(f'/api/products/{self.coffee.pk}/bought-together/').data, [])
+
+
+@override_settings(RECOMMENDATIONS=RECOMMENDATIONS)
+class SimilarProductsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller').store_profile
+        spices = Category.objects.create(name='Spices')
+        drinks = Category.objects.create(name='Drinks')
+        self.black = self.product('Black Pepper', spices, 'Whole black pepper from Wayanad', {'weight': '100g'})
+        self.white = self.product('White Pepper', spices, 'Whole white pepper', {'weight': '100g'})
+        self.cardamom = self.product('Green Cardamom', spices, 'Idukki cardamom pods')
+        self.tea = self.product('Masala Tea', drinks, 'Black tea with cardamom')
+
+    def product(self, name, category, description, attributes=None):
+        return Product.objects.create(
+            store=self.store, name=name, category=category, description=description,
+            attributes=attributes or {}, price=10, total_stock=5, online_stock=5,
+        )
+
+    def lists(self):
+        return {
+            product_id: [neighbor for neighbor, _ in group]
+            for product_id, group in _grouped(ProductNeighbor.objects.filter(kind=ProductNeighbor.Kind.SIMILAR).order_by('product_id', 'rank'))
+        }
+
+    def test_incremental_matches_full_build(self):
+        self.assertEqual(similar.build(), 4)
+        self.assertEqual(self.lists()[self.black.pk][0], self.white.pk)
+        self.assertFalse(SimilarityQueue.objects.exists())
+
+        newcomer = self.product('Black Pepper', self.black.category, 'Whole black pepper, bulk pack', {'weight': '1kg'})
+        self.tea.is_active = False
+        self.tea.save(update_fields=['is_active'])
+        self.cardamom.online_stock = 4
+        self.cardamom.save(update_fields=['online_stock'])
+        self.white.total_stock = 9
+        self.white.save()  # a full save that leaves the text alone
+        self.assertEqual(set(SimilarityQueue.objects.values_list('product_id', flat=True)), {newcomer.pk, self.tea.pk})
+
+        # Only the queued products still listed are tokenized again.
+        with mock.patch.object(similar, 'terms', wraps=similar.terms) as tokenized:
+            similar.build()
+        self.assertEqual(tokenized.call_count, 1)
+        incremental = self.lists()
+        self.assertEqual(incremental[self.black.pk][0], newcomer.pk)
+        self.assertNotIn(self.tea.pk, incremental)
+        similar.build(full=True)
+        self.assertEqual(self.lists(), incremental)
+
+    def test_full_save_queues_text_changes(self):
+        similar.build()
+        self.cardamom.description = 'Bold Idukki cardamom pods'
+        self.cardamom.save()
+        self.assertEqual(list(SimilarityQueue.objects.values_list('product_id', flat=True)), [self.cardamom.pk])
+
+    def test_endpoint(self):
+        similar.build()
+        response = self.client.get(f'/api/products/{self.black.pk}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['name'], 'White Pepper')
+        self.assertEqual(self.client.get('/api/products/x/similar/').status_code, 404)
+
+
+def _grouped(neighbors):
+    groups = {}
+    for row in neighbors:
+        groups.setdefault(row.product_id, []).append((row.neighbor_id, row.score))
+    return groups.items()
@@ -1,4 +1,9 @@
 from django.contrib import admin
-from .models import StoreProfile
+from .models import StoreProfile, StoreStats
 # Register your models here.
 admin.site.register(StoreProfile)
+
+@admin.register(StoreStats)
+class StoreStatsAdmin(admin.ModelAdmin):
+    list_display = ('store', 'total_products', 'active_products', 'online_products', 'low_stock_products', 'updated_at')
+    readonly_fields = ('store', 'total_products', 'active_products', 'online_products', 'low_stock_products', 'updated_at')
@@ -4,5 +4,5 @@ class StoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'store'
 
-    # The 'ready' method and the 'import store.signals'
-    # line that were here before can now be safely deleted.
\ No newline at end of file
+    def ready(self):
+        import store.signals
@@ -0,0 +1,111 @@
+import random
+import time
+from operator import itemgetter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from delivery import geo, pincodes
+from store.models import StoreProfile
+from store.views import PublicStoreListView
+from users.models import Seller
+
+# (south, north, west, east): most synthetic stores are in Kerala, the rest
+# anywhere in India.
+KERALA = (8.2, 12.8, 74.8, 77.4)
+INDIA = (8.0, 32.0, 68.0, 92.0)
+
+
+def _timed(func, repeat):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        elapsed = (time.perf_counter() - start) / repeat
+    return result, elapsed, len(queries.captured_queries) // repeat
+
+
+def _full_scan(queryset, latitude, longitude, radius):
+    """The unindexed way: a distance for every store, then filter and sort."""
+    matches = []
+    for pk, lat, lng in queryset.order_by().values_list('pk', 'latitude', 'longitude'):
+        if lat is None:
+            continue
+        distance = geo.haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius:
+            matches.append((pk, distance))
+    matches.sort(key=itemgetter(1, 0))
+    return matches
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the public store list `?near=` search over synthetic stores: "
+        "a distance for every store versus the geo_cell grid, plus the full "
+        "endpoint. Runs in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=50000)
+        parser.add_argument('--radii', default='10,25,50', help='Comma-separated search radii in km.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def populate(self, rng, count):
+        password = make_password('bench')
+        sellers = Seller.objects.bulk_create(
+            [Seller(phone=f"7{i:09d}", password=password) for i in range(count)], batch_size=2000,
+        )
+        stores = []
+        for i, seller in enumerate(sellers):
+            south, north, west, east = KERALA if i % 5 else INDIA
+            latitude, longitude = rng.uniform(south, north), rng.uniform(west, east)
+            # bulk_create skips save(), so the cell is set here.
+            stores.append(StoreProfile(
+                seller=seller, name=f"Store {i}", latitude=latitude, longitude=longitude,
+                geo_cell=geo.cell_for(latitude, longitude),
+            ))
+        StoreProfile.objects.bulk_create(stores, batch_size=2000)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+        self.populate(rng, options['stores'])
+        self.stdout.write(f"Created {options['stores']} stores in {time.perf_counter() - start:.1f}s")
+        queryset = PublicStoreListView.queryset
+        view = PublicStoreListView.as_view()
+        factory = APIRequestFactory()
+        repeat = options['repeat']
+
+        for pincode in ('682001', '695001', '673001'):
+            place = pincodes.lookup(pincode)
+            for radius in (float(radius) for radius in options['radii'].split(',')):
+                expected, scan_seconds, _ = _timed(
+                    lambda: _full_scan(queryset, place.latitude, place.longitude, radius), repeat,
+                )
+                matches, grid_seconds, grid_queries = _timed(
+                    lambda: geo.nearby(queryset, place.latitude, place.longitude, radius), repeat,
+                )
+                assert [pk for pk, _ in matches] == [pk for pk, _ in expected], 'grid search differs from full scan'
+                request = factory.get('/shops/', {'near': pincode, 'radius': radius})
+                response, endpoint_seconds, endpoint_queries = _timed(lambda: view(request), repeat)
+                assert response.status_code == 200
+
+                self.stdout.write(f"\nnear {pincode} ({place.district}), {radius:g} km: {len(matches)} stores")
+                self.stdout.write(f"  full scan      {scan_seconds * 1000:8.2f} ms  {options['stores']} distances")
+                self.stdout.write(
+                    f"  grid           {grid_seconds * 1000:8.2f} ms  {grid_queries} query   "
+                    f"{scan_seconds / grid_seconds:5.1f}x"
+                )
+                self.stdout.write(f"  endpoint page  {endpoint_seconds * 1000:8.2f} ms  {endpoint_queries} queries")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from store.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized StoreStats product counters from the Product table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, action='append', dest='stores',
+                            help="Only reconcile this store id (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = reconcile(options['stores'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters for {count} store(s)."))
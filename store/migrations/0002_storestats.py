@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreStats',
+            fields=[
+                ('store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='store.storeprofile')),
+                ('total_products', models.IntegerField(default=0)),
+                ('active_products', models.IntegerField(default=0)),
+                ('online_products', models.IntegerField(default=0, help_text='Active products visible in the online catalog')),
+                ('low_stock_products', models.IntegerField(default=0, help_text='Active products at or below LOW_STOCK_THRESHOLD')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Store stats',
+            },
+        ),
+    ]
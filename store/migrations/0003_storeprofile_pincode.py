@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_storestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeprofile',
+            name='pincode',
+            field=models.CharField(blank=True, help_text='Where orders ship from; used for delivery estimates', max_length=6, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_storeprofile_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storeprofile',
+            name='razorpay_webhook_secret',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.db.models import Avg, Q, F, CheckConstraint
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from delivery.geo import cell_for
 from users.models import Seller, Buyer
 
 # ==============================================================================
@@ -18,6 +19,11 @@ class StoreProfile(models.Model):
     whatsapp_number = models.CharField(max_length=20, blank=True, null=True)
     instagram_link = models.URLField(max_length=200, blank=True, null=True)
     facebook_link = models.URLField(max_length=200, blank=True, null=True)
+    pincode = models.CharField(max_length=6, blank=True, null=True, help_text="Where orders ship from; used for delivery estimates")
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    # Grid bucket of (latitude, longitude) for "stores near me"; see delivery.geo.
+    geo_cell = models.IntegerField(blank=True, null=True, editable=False)
     delivery_time_local = models.CharField(max_length=50, blank=True, null=True)
     delivery_time_national = models.CharField(max_length=50, blank=True, null=True)
     meta_title = models.CharField(max_length=100, blank=True, null=True)
@@ -27,13 +33,47 @@ class StoreProfile(models.Model):
     payment_method = models.CharField(max_length=10, choices=PAYMENT_CHOICES, default='NONE')
     razorpay_key_id = models.CharField(max_length=100, blank=True, null=True)
     razorpay_key_secret = models.CharField(max_length=100, blank=True, null=True)
+    # Razorpay signs a seller account's webhooks with that account's own secret.
+    razorpay_webhook_secret = models.CharField(max_length=100, blank=True, null=True)
     upi_id = models.CharField(max_length=100, blank=True, null=True)
     accepts_cod = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Covers the nearby-store scan: cell ranges, then the bounding box.
+            models.Index(fields=['geo_cell', 'latitude', 'longitude'], name='store_geo_cell_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.geo_cell = cell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geo_cell'}
+        super().save(*args, **kwargs)
+
+class StoreStats(models.Model):
+    """
+    Denormalized product counters for a store, kept current by the Product
+    signals with F() updates so dashboards and plan limits never count rows.
+    Run `manage.py reconcile_store_counters` to rebuild them from scratch.
+    """
+    store = models.OneToOneField(StoreProfile, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_products = models.IntegerField(default=0)
+    active_products = models.IntegerField(default=0)
+    online_products = models.IntegerField(default=0, help_text="Active products visible in the online catalog")
+    low_stock_products = models.IntegerField(default=0, help_text="Active products at or below LOW_STOCK_THRESHOLD")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Store stats"
+
+    def __str__(self):
+        return f"Stats for {self.store}"
+
 # ==============================================================================
 # PRODUCT MODELS
 # ==============================================================================
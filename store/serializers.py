@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from delivery import pincodes
+from keralasellers.media import MediaURLField
 from .models import StoreProfile  # Only import StoreProfile from store.models
 
 class StoreProfileSerializer(serializers.ModelSerializer):
-    banner_image_url = serializers.SerializerMethodField()
-    logo_url = serializers.SerializerMethodField()
+    banner_image_url = MediaURLField(source='banner_image')
+    logo_url = MediaURLField(source='logo')
     seller_phone = serializers.CharField(source='seller.phone', read_only=True)
 
     class Meta:
@@ -11,25 +13,45 @@ class StoreProfileSerializer(serializers.ModelSerializer):
         fields = [
             'name', 'description', 'banner_image', 'banner_image_url', 
             'logo', 'logo_url', 'seller_phone', 'payment_method', 
-            'razorpay_key_id', 'razorpay_key_secret', 'upi_id', 'accepts_cod',
+            'razorpay_key_id', 'razorpay_key_secret', 'razorpay_webhook_secret', 'upi_id', 'accepts_cod',
             'tagline', 'whatsapp_number', 'instagram_link', 'facebook_link',
-            'delivery_time_local', 'delivery_time_national',
+            'pincode', 'latitude', 'longitude', 'delivery_time_local', 'delivery_time_national',
             'meta_title', 'meta_description'
         ]
         extra_kwargs = {
             'banner_image': {'write_only': True, 'required': False},
             'logo': {'write_only': True, 'required': False},
-            'razorpay_key_secret': {'write_only': True, 'required': False}
+            'razorpay_key_secret': {'write_only': True, 'required': False},
+            'razorpay_webhook_secret': {'write_only': True, 'required': False},
         }
-    
-    def get_banner_image_url(self, obj):
-        request = self.context.get('request')
-        if obj.banner_image and hasattr(obj.banner_image, 'url'):
-            return request.build_absolute_uri(obj.banner_image.url)
-        return None
-
-    def get_logo_url(self, obj):
-        request = self.context.get('request')
-        if obj.logo and hasattr(obj.logo, 'url'):
-            return request.build_absolute_uri(obj.logo.url)
-        return None
+
+    def validate_pincode(self, value):
+        if not value:
+            return value
+        pincode = pincodes.normalize(value)
+        if pincode is None:
+            raise serializers.ValidationError("Please enter a valid 6-digit pincode.")
+        return pincode
+
+    def validate(self, attrs):
+        latitude = attrs.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = attrs.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("Set both latitude and longitude, or neither.")
+        if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise serializers.ValidationError("Coordinates are out of range.")
+        # A changed pincode sent without coordinates places the store at its district.
+        pincode = attrs.get('pincode')
+        if pincode and pincode != getattr(self.instance, 'pincode', None) and 'latitude' not in attrs:
+            place = pincodes.lookup(pincode)
+            if place is not None:
+                attrs['latitude'], attrs['longitude'] = place.latitude, place.longitude
+        return attrs
+
+
+
+class NearbyStoreSerializer(StoreProfileSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(StoreProfileSerializer.Meta):
+        fields = StoreProfileSerializer.Meta.fields + ['distance_km']
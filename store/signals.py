@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import StoreProfile
+from . import storefront
+
+
+@receiver(post_save, sender=StoreProfile)
+def invalidate_storefront(sender, instance, **kwargs):
+    storefront.invalidate([instance.pk])
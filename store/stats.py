@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from products.models import Product
+from .models import StoreProfile, StoreStats
+
+COUNTERS = ('total_products', 'active_products', 'online_products', 'low_stock_products')
+ONLINE_SALE_TYPES = (Product.SaleType.ONLINE_AND_OFFLINE, Product.SaleType.ONLINE_ONLY)
+
+
+def low_stock_threshold():
+    return settings.LOW_STOCK_THRESHOLD
+
+
+def counter_flags(product):
+    """Which counters `product` contributes to, as a tuple aligned with COUNTERS."""
+    active = bool(product.is_active)
+    return (
+        1,
+        int(active),
+        int(active and product.online_stock > 0 and product.sale_type in ONLINE_SALE_TYPES),
+        int(active and product.total_stock <= low_stock_threshold()),
+    )
+
+
+def apply_deltas(store_id, deltas):
+    """Add `deltas` (aligned with COUNTERS) to the store's counters in one UPDATE."""
+    changes = {name: F(name) + delta for name, delta in zip(COUNTERS, deltas) if delta}
+    if not changes:
+        return
+    updated = StoreStats.objects.filter(store_id=store_id).update(updated_at=timezone.now(), **changes)
+    if not updated and any(delta > 0 for delta in deltas):
+        # First change for this store: build the row from the table once.
+        # Pure decrements are skipped so cascading store deletes never
+        # recreate the row.
+        reconcile([store_id])
+
+
+def record_change(old_store_id, old_flags, new_store_id, new_flags):
+    """Apply the difference between a product's old and new counter flags."""
+    if old_store_id == new_store_id:
+        apply_deltas(new_store_id, [new - old for old, new in zip(old_flags, new_flags)])
+        return
+    if old_store_id is not None:
+        apply_deltas(old_store_id, [-old for old in old_flags])
+    if new_store_id is not None:
+        apply_deltas(new_store_id, new_flags)
+
+
+def _aggregate(store_ids=None):
+    products = Product.objects.all()
+    if store_ids is not None:
+        products = products.filter(store_id__in=store_ids)
+    active = Q(is_active=True)
+    return {
+        row['store_id']: row
+        for row in products.values('store_id').annotate(
+            total_products=Count('id'),
+            active_products=Count('id', filter=active),
+            online_products=Count('id', filter=active & Q(online_stock__gt=0, sale_type__in=ONLINE_SALE_TYPES)),
+            low_stock_products=Count('id', filter=active & Q(total_stock__lte=low_stock_threshold())),
+        )
+    }
+
+
+def reconcile(store_ids=None, batch_size=500):
+    """
+    Recount products for the given stores (or all stores) with one aggregate
+    query per batch and upsert the counters. Returns the number of stores.
+    """
+    if store_ids is None:
+        store_ids = list(StoreProfile.objects.values_list('pk', flat=True))
+    store_ids = list(store_ids)
+    now = timezone.now()
+    for start in range(0, len(store_ids), batch_size):
+        chunk = store_ids[start:start + batch_size]
+        counts = _aggregate(chunk)
+        rows = [
+            StoreStats(
+                store_id=store_id,
+                updated_at=now,
+                **{name: counts.get(store_id, {}).get(name, 0) for name in COUNTERS},
+            )
+            for store_id in chunk
+        ]
+        StoreStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['store'],
+            update_fields=list(COUNTERS) + ['updated_at'],
+        )
+    return len(store_ids)
+
+
+def get_stats(store_id):
+    """Return the store's counters, building them on first use."""
+    stats = StoreStats.objects.filter(store_id=store_id).first()
+    if stats is None:
+        reconcile([store_id])
+        stats = StoreStats.objects.get(store_id=store_id)
+    return stats
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+
+from keralasellers.cache import Namespace
+from products.models import Product
+from products.cards import ProductCardSerializer
+from .models import StoreProfile
+from .serializers import StoreProfileSerializer
+
+storefront_cache = Namespace('storefront')
+
+
+def _timeout():
+    return settings.CACHE_FRAMEWORK['STOREFRONT_TIMEOUT']
+
+
+def _store_id(seller_phone):
+    def lookup():
+        return StoreProfile.objects.values_list('pk', flat=True).get(seller__phone=seller_phone)
+    return storefront_cache.get_or_compute(f"store-id:{seller_phone}", lookup, _timeout())
+
+
+def _build(request, store_id):
+    store_profile = StoreProfile.objects.get(pk=store_id)
+    products = Product.objects.filter(
+        store=store_profile, is_active=True, online_stock__gt=0,
+        sale_type__in=[Product.SaleType.ONLINE_AND_OFFLINE, Product.SaleType.ONLINE_ONLY]
+    ).order_by('-created_at')
+
+    # Ensure context is passed to both serializers
+    store_data = StoreProfileSerializer(store_profile, context={'request': request}).data
+    product_data = ProductCardSerializer(products, context={'request': request}).data
+
+    # Automatic SEO Generation
+    if not store_data.get('meta_title'):
+        store_data['meta_title'] = f"{store_profile.name} | Kerala Sellers"
+    if not store_data.get('meta_description'):
+        store_data['meta_description'] = f"Explore products from {store_profile.name} on Kerala Sellers."
+
+    return {'store': dict(store_data), 'products': product_data}
+
+
+def get_storefront(request, seller_phone):
+    """
+    Return (cache key, payload) for the public shop page. Raises
+    StoreProfile.DoesNotExist.
+
+    Pages are cached per store generation; invalidate() starts a new
+    generation, so every cached variant (one per host, since image URLs
+    are absolute) goes stale at once.
+    """
+    store_id = _store_id(seller_phone)
+    generation = storefront_cache.get(f"generation:{store_id}", 0)
+    key = f"page:{store_id}:{generation}:{request.get_host()}"
+    return key, storefront_cache.get_or_compute(key, lambda: _build(request, store_id), _timeout())
+
+
+def invalidate(store_ids):
+    generation = time.time_ns()
+    for store_id in set(store_ids):
+        if store_id is not None:
+            storefront_cache.set(f"generation:{store_id}", generation, _timeout())
@@ -1,3 +1,105 @@
-from django.test import TestCase
+from django.test import override_settings
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from delivery import geo
+from orders import escrow
+from orders.models import Order
+from products.models import Product, Review
+from users.models import Buyer, Seller, SellerToken
+from . import stats
+from .models import StoreProfile, StoreStats
+
+
+class NearbyStoreTests(APITestCase):
+    def store(self, phone, name, latitude, longitude):
+        store = Seller.objects.create_user(phone=phone, password='pass', name=name).store_profile
+        store.name, store.latitude, store.longitude = name, latitude, longitude
+        store.save()
+        return store
+
+    def test_sorted_by_distance_within_radius(self):
+        self.store('9000000001', 'Fort Kochi', 9.9658, 76.2421)
+        self.store('9000000002', 'Aluva', 10.1004, 76.3570)
+        self.store('9000000003', 'Thrissur', 10.5276, 76.2144)
+        self.store('9000000004', 'Nowhere', None, None)
+
+        response = self.client.get('/shops/', {'near': '9.9816,76.2999', 'radius': 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([store['name'] for store in response.data['results']], ['Fort Kochi', 'Aluva'])
+        self.assertLess(response.data['results'][0]['distance_km'], response.data['results'][1]['distance_km'])
+        self.assertEqual(response.data['count'], 2)
+
+        by_pincode = self.client.get('/shops/', {'near': '680001', 'radius': 100})
+        self.assertEqual(by_pincode.data['results'][0]['name'], 'Thrissur')
+        self.assertNotIn('distance_km', self.client.get('/shops/').data['results'][0])
+        for params in ({'near': '999999'}, {'near': '10,200'}, {'near': '682001', 'radius': 500}):
+            self.assertEqual(self.client.get('/shops/', params).status_code, 400)
+
+    def test_location_from_profile(self):
+        seller = Seller.objects.create_user(phone='9000000001', password='pass', name='Seller')
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=seller).key}")
+        response = self.client.patch('/api/store/profile/', {'pincode': '695001'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        store = StoreProfile.objects.get(seller=seller)
+        self.assertAlmostEqual(store.latitude, 8.5241)
+        self.assertEqual(store.geo_cell, geo.cell_for(store.latitude, store.longitude))
+
+        response = self.client.patch('/api/store/profile/', {'latitude': 8.5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StoreProfile.objects.get(seller=seller).geo_cell, geo.cell_for(8.5, store.longitude))
+        self.assertEqual(self.client.patch('/api/store/profile/', {'latitude': 95}, format='json').status_code, 400)
+
+
+@override_settings(LOW_STOCK_THRESHOLD=5)
+class StoreStatsTests(APITestCase):
+    def setUp(self):
+        self.store = Seller.objects.create_user(phone='9000000050', password='pass', name='Seller').store_profile
+        self.buyer = Buyer.objects.create_user(email='stats@example.com')
+
+    def counters(self):
+        row = StoreStats.objects.get(store=self.store)
+        return tuple(getattr(row, name) for name in stats.COUNTERS)
+
+    def product(self, stock=10, **fields):
+        return Product.objects.create(store=self.store, name='Jaggery', price=50, total_stock=stock, online_stock=stock, **fields)
+
+    def test_product_writes(self):
+        product = self.product()
+        self.product(stock=2, sale_type=Product.SaleType.OFFLINE_ONLY)
+        self.assertEqual(self.counters(), (2, 2, 1, 1))
+        product.is_active = False
+        product.save()
+        self.assertEqual(self.counters(), (2, 1, 0, 1))
+        product.delete()
+        self.assertEqual(self.counters(), (1, 1, 0, 1))
+
+    def test_order_writes(self):
+        product = self.product(stock=6)
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.post('/user/orders/create-order/', {
+            'items': [{'id': product.pk, 'quantity': 6}], 'shipping_address': 'Kochi',
+            'customer_name': 'Buyer', 'customer_phone': '9000000051',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counters(), (1, 1, 0, 1))
+        # The unpaid order is cancelled and its stock comes back.
+        Order.objects.filter(pk=response.data['order_id']).update(next_deadline_at=Order.objects.get().created_at)
+        escrow.process_due()
+        self.assertEqual(self.counters(), (1, 1, 1, 0))
+
+    def test_review_writes_leave_counters_alone(self):
+        product = self.product(stock=1)
+        before = self.counters()
+        Review.objects.create(product=product, buyer=self.buyer, rating=5)
+        self.assertEqual(self.counters(), before)
+        self.assertEqual(before, (1, 1, 1, 1))
+
+    def test_reconcile_repairs_drift(self):
+        self.product()
+        self.product(stock=0)
+        StoreStats.objects.filter(store=self.store).update(total_products=40, online_products=-3, low_stock_products=7)
+        self.assertEqual(stats.reconcile([self.store.pk]), 1)
+        self.assertEqual(self.counters(), (2, 2, 1, 1))
+        StoreStats.objects.all().delete()
+        stats.reconcile()
+        self.assertEqual(self.counters(), (2, 2, 1, 1))
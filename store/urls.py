@@ -2,10 +2,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import StoreProfileView, PublicStoreListView
+from delivery.views import StoreDeliverySLAView
 from products.views import (
     ProductViewSet, 
     UpdateStockView, 
+    BulkUpdateStockView,
     StockHistoryListView, 
+    StockHistoryDailyListView,
     CreateReviewView
 )
 
@@ -16,10 +19,13 @@ router.register(r'products', ProductViewSet, basename='product')
 urlpatterns = [
     # Store management
     path('profile/', StoreProfileView.as_view(), name='store-profile'),
+    path('delivery-sla/', StoreDeliverySLAView.as_view(), name='store-delivery-sla'),
     
     # Stock management  
     path('products/<int:pk>/update-stock/', UpdateStockView.as_view(), name='update-stock'),
+    path('products/bulk-update-stock/', BulkUpdateStockView.as_view(), name='store-bulk-update-stock'),
     path('stock-history/', StockHistoryListView.as_view(), name='stock-history'),
+    path('stock-history/daily/', StockHistoryDailyListView.as_view(), name='store-stock-history-daily'),
     path('products/<int:pk>/create-review/', CreateReviewView.as_view(), name='create-review'),
     
     # Public store views
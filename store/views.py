@@ -2,16 +2,18 @@ from rest_framework import permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView
-from rest_framework.filters import SearchFilter
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, SearchFilter
 from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
 import razorpay
 
+from delivery import geo, pincodes
+from keralasellers import compression
+
 from .models import StoreProfile
-from .serializers import StoreProfileSerializer
-from products.serializers import ProductSerializer
-from django.conf import settings
-from products.models import Product # Import Product from the products app
-from users.models import Seller
+from .serializers import NearbyStoreSerializer, StoreProfileSerializer
+from .storefront import get_storefront
 
 # ==============================================================================
 # PAGINATION
@@ -46,45 +48,91 @@ class StoreProfileView(APIView):
 # ==============================================================================
 # PUBLIC-FACING VIEWS
 # ==============================================================================
+class NearbyStores:
+    """
+    Stores matched by NearFilter, nearest first. Only the ids and distances
+    are held; the paginator's slice loads just that page's stores.
+    """
+    def __init__(self, queryset, matches):
+        self.queryset = queryset
+        self.matches = matches
+
+    def __len__(self):
+        return len(self.matches)
+
+    def __getitem__(self, index):
+        matches = self.matches[index] if isinstance(index, slice) else [self.matches[index]]
+        stores = self.queryset.in_bulk([pk for pk, _ in matches])
+        page = []
+        for pk, distance in matches:
+            store = stores[pk]
+            store.distance_km = round(distance, 2)
+            page.append(store)
+        return page if isinstance(index, slice) else page[0]
+
+
+class NearFilter(BaseFilterBackend):
+    """
+    `?near=<pincode|lat,lng>&radius=<km>` keeps stores within the radius,
+    sorted by distance. Candidates come from the grid cells around the
+    point (see delivery.geo), so distances are only computed for stores
+    that could be in range.
+    """
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get('near')
+        if not near:
+            return queryset
+        latitude, longitude = self.parse_point(near)
+        config = settings.STORE_SEARCH
+        try:
+            radius = float(request.query_params.get('radius', config['DEFAULT_RADIUS_KM']))
+        except ValueError:
+            raise ValidationError({'radius': 'Enter a distance in kilometres.'})
+        if not 0 < radius <= config['MAX_RADIUS_KM']:
+            raise ValidationError({'radius': f"Must be between 0 and {config['MAX_RADIUS_KM']} km."})
+        return NearbyStores(queryset, geo.nearby(queryset, latitude, longitude, radius))
+
+    @staticmethod
+    def parse_point(near):
+        if ',' in near:
+            try:
+                latitude, longitude = (float(part) for part in near.split(','))
+            except ValueError:
+                raise ValidationError({'near': 'Use a pincode or "latitude,longitude".'})
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValidationError({'near': 'Coordinates are out of range.'})
+            return latitude, longitude
+        place = pincodes.lookup(near)
+        if place is None:
+            raise ValidationError({'near': 'Unknown pincode.'})
+        return place.latitude, place.longitude
+
+
 class PublicStoreListView(ListAPIView):
     """
-    Provides a public, paginated list of all active store profiles.
+    Provides a public, paginated list of all active store profiles, or
+    with `?near=` the stores around a pincode or point, nearest first.
     """
     permission_classes = [permissions.AllowAny]
-    serializer_class = StoreProfileSerializer
     pagination_class = StorePagination
-    queryset = StoreProfile.objects.filter(seller__is_active=True).order_by('-created_at')
-    filter_backends = [SearchFilter]
+    queryset = StoreProfile.objects.filter(seller__is_active=True).select_related('seller').order_by('-created_at')
+    filter_backends = [SearchFilter, NearFilter]
     search_fields = ['name', 'tagline']
 
+    def get_serializer_class(self):
+        if self.request.query_params.get('near'):
+            return NearbyStoreSerializer
+        return StoreProfileSerializer
+
 class PublicStoreView(APIView):
     permission_classes = [permissions.AllowAny]
     
     def get(self, request, seller_phone=None):
         try:
-            seller = Seller.objects.get(phone=seller_phone)
-            store_profile = seller.store_profile
-            
-            products = Product.objects.filter(
-                store=store_profile, is_active=True, online_stock__gt=0,
-                sale_type__in=[Product.SaleType.ONLINE_AND_OFFLINE, Product.SaleType.ONLINE_ONLY]
-            ).order_by('-created_at')
-
-            # Ensure context is passed to both serializers
-            store_data = StoreProfileSerializer(store_profile, context={'request': request}).data
-            product_data = ProductSerializer(products, many=True, context={'request': request}).data
-            
-            print(f"🔍 Store serialized data: {store_data}")  # Debug
-            print(f"🔍 Products count: {len(product_data)}")  # Debug
-            if product_data:
-                print(f"🔍 First product main_image_url: {product_data[0].get('main_image_url')}")  # Debug
-
-            # Automatic SEO Generation
-            if not store_data.get('meta_title'):
-                store_data['meta_title'] = f"{store_profile.name} | Kerala Sellers"
-            if not store_data.get('meta_description'):
-                store_data['meta_description'] = f"Explore products from {store_profile.name} on Kerala Sellers."
-
-            return Response({'store': store_data, 'products': product_data})
-        except (Seller.DoesNotExist, StoreProfile.DoesNotExist):
+            key, page = get_storefront(request, seller_phone)
+        except StoreProfile.DoesNotExist:
             return Response({'error': 'Store not found.'}, status=status.HTTP_404_NOT_FOUND)
+        # The page is cached, so its compressed bodies can be too.
+        return compression.cache_variants(
+            Response(page), f"storefront:{key}", settings.CACHE_FRAMEWORK['STOREFRONT_TIMEOUT'],
+        )
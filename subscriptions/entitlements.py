@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from keralasellers.cache import Namespace
+from .models import Subscription
+
+# A cached, picklable view of what a seller's plan allows.
+Entitlement = namedtuple('Entitlement', ['plan_id', 'plan_name', 'product_limit', 'expires_at'])
+
+PUBLISH_SHOP = 'publish_shop'
+STOCK_MANAGEMENT = 'stock_management'
+ADD_PRODUCT = 'add_product'
+FEATURES = {PUBLISH_SHOP, STOCK_MANAGEMENT, ADD_PRODUCT}
+
+entitlements_cache = Namespace('entitlements')
+
+
+def _config(name):
+    return settings.SUBSCRIPTIONS[name]
+
+
+def _load(seller_id):
+    subscription = (
+        Subscription.objects.select_related('plan')
+        .filter(seller_id=seller_id)
+        .only('end_date', 'plan__name', 'plan__product_limit')
+        .first()
+    )
+    if subscription is None or subscription.plan is None:
+        return Entitlement(None, None, _config('FREE_PRODUCT_LIMIT'), None)
+    plan = subscription.plan
+    return Entitlement(plan.pk, plan.name, plan.product_limit, subscription.end_date)
+
+
+def _timeout(snapshot):
+    timeout = _config('CACHE_TIMEOUT')
+    if snapshot.expires_at is not None:
+        remaining = (snapshot.expires_at - timezone.now()).total_seconds()
+        if remaining > 0:
+            # Expire with the plan; a lapsed plan keeps the full timeout.
+            timeout = max(1, min(timeout, int(remaining)))
+    return timeout
+
+
+def get_entitlement(seller):
+    """
+    Return the seller's entitlement snapshot, loading it at most once per
+    cache timeout. The entry never outlives the subscription's end_date.
+    """
+    seller_id = getattr(seller, 'pk', seller)
+    return entitlements_cache.get_or_compute(seller_id, lambda: _load(seller_id), timeout=_timeout)
+
+
+def is_active(snapshot, now=None):
+    return snapshot.expires_at is not None and snapshot.expires_at > (now or timezone.now())
+
+
+def product_limit(snapshot, now=None):
+    """Products allowed right now: the plan's limit, or the free tier once it lapses."""
+    if is_active(snapshot, now):
+        return snapshot.product_limit
+    return _config('FREE_PRODUCT_LIMIT')
+
+
+def product_count(seller):
+    """Read the store's maintained product counter instead of counting rows."""
+    from store.models import StoreStats
+    from store.stats import get_stats
+    seller_id = getattr(seller, 'pk', seller)
+    total = StoreStats.objects.filter(store__seller_id=seller_id).values_list('total_products', flat=True).first()
+    if total is None:
+        store = getattr(seller, 'store_profile', None)
+        return get_stats(store.pk).total_products if store else 0
+    return total
+
+
+def check(seller, feature):
+    """Return True if `seller` may use `feature` under their current plan."""
+    if feature not in FEATURES:
+        raise ValueError(f"Unknown feature: {feature}")
+    snapshot = get_entitlement(seller)
+    if feature in (PUBLISH_SHOP, STOCK_MANAGEMENT):
+        return is_active(snapshot)
+    return product_count(seller) < product_limit(snapshot)
+
+
+def invalidate(seller_ids):
+    entitlements_cache.delete_many(seller_ids)
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Plan, Subscription
+from . import entitlements
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_seller_entitlement(sender, instance, **kwargs):
+    entitlements.invalidate([instance.seller_id])
+
+
+@receiver(post_save, sender=Plan)
+@receiver(post_delete, sender=Plan)
+def invalidate_plan_entitlements(sender, instance, **kwargs):
+    """A plan edit changes the snapshot of every seller on that plan."""
+    seller_ids = Subscription.objects.filter(plan=instance).values_list('seller_id', flat=True)
+    entitlements.invalidate(list(seller_ids))
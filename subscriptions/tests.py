@@ -1,3 +1,89 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import Product
+from users.models import Seller, SellerToken
+from . import entitlements
+from .models import Plan, Subscription
+
+SUBSCRIPTIONS = {'FREE_PRODUCT_LIMIT': 1, 'CACHE_TIMEOUT': 600}
+
+
+@override_settings(SUBSCRIPTIONS=SUBSCRIPTIONS)
+class EntitlementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = Seller.objects.create_user(phone='9000000040', password='pass', name='Seller')
+        self.plan = Plan.objects.create(name='Pro', price=499, product_limit=2, duration_days=30)
+
+    def subscribe(self, end_date):
+        return Subscription.objects.create(
+            seller=self.seller, plan=self.plan, start_date=timezone.now() - timedelta(days=30), end_date=end_date,
+        )
+
+    def add_product(self, name='Ghee'):
+        return Product.objects.create(store=self.seller.store_profile, name=name, price=10, total_stock=1, online_stock=1)
+
+    def test_free_tier(self):
+        self.assertFalse(entitlements.check(self.seller, entitlements.PUBLISH_SHOP))
+        self.assertTrue(entitlements.check(self.seller, entitlements.ADD_PRODUCT))
+        self.add_product()
+        self.assertFalse(entitlements.check(self.seller, entitlements.ADD_PRODUCT))
+
+    def test_active_plan_raises_the_limit(self):
+        self.subscribe(timezone.now() + timedelta(days=1))
+        self.add_product()
+        self.assertTrue(entitlements.check(self.seller, entitlements.PUBLISH_SHOP))
+        self.assertTrue(entitlements.check(self.seller, entitlements.ADD_PRODUCT))
+        self.add_product('Honey')
+        self.assertFalse(entitlements.check(self.seller, entitlements.ADD_PRODUCT))
+
+    def test_lapsed_plan_falls_back_to_free_tier(self):
+        self.subscribe(timezone.now() - timedelta(days=1))
+        self.add_product()
+        self.assertFalse(entitlements.check(self.seller, entitlements.PUBLISH_SHOP))
+        self.assertFalse(entitlements.check(self.seller, entitlements.ADD_PRODUCT))
+
+    def test_snapshot_expires_with_the_plan_only(self):
+        soon = entitlements.Entitlement(self.plan.pk, 'Pro', 2, timezone.now() + timedelta(seconds=30))
+        self.assertLessEqual(entitlements._timeout(soon), 30)
+        lapsed = entitlements.Entitlement(self.plan.pk, 'Pro', 2, timezone.now() - timedelta(days=1))
+        self.assertEqual(entitlements._timeout(lapsed), SUBSCRIPTIONS['CACHE_TIMEOUT'])
+
+    def test_lapsed_snapshot_is_served_from_cache(self):
+        self.subscribe(timezone.now() - timedelta(days=1))
+        entitlements.get_entitlement(self.seller)
+        with self.assertNumQueries(0):
+            entitlements.get_entitlement(self.seller)
+
+    def test_subscription_change_is_seen_immediately(self):
+        subscription = self.subscribe(timezone.now() - timedelta(days=1))
+        self.assertFalse(entitlements.check(self.seller, entitlements.PUBLISH_SHOP))
+        subscription.end_date = timezone.now() + timedelta(days=30)
+        subscription.save()
+        self.assertTrue(entitlements.check(self.seller, entitlements.PUBLISH_SHOP))
+
+
+@override_settings(SUBSCRIPTIONS=SUBSCRIPTIONS)
+class ProductLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = Seller.objects.create_user(phone='9000000041', password='pass', name='Seller')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {SellerToken.objects.create(user=self.seller).key}")
+
+    def create(self, name):
+        return self.client.post('/api/products/', {
+            'name': name, 'price': '10.00', 'total_stock': 1, 'online_stock': 1,
+        }, format='multipart')
+
+    def test_create_is_refused_past_the_plan_limit(self):
+        self.assertEqual(self.create('Ghee').status_code, 201)
+        response = self.create('Honey')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('Product limit', str(response.data))
+        self.assertEqual(Product.objects.filter(store__seller=self.seller).count(), 1)
@@ -1,12 +1,11 @@
-from .models import SellerSubscription
+from .models import Subscription
+from . import entitlements
 
 def get_seller_subscription(user):
-    return SellerSubscription.objects.filter(seller=user).first()
+    return Subscription.objects.filter(seller_id=user.pk).select_related('plan').first()
 
 def can_publish_shop(user):
-    subscription = get_seller_subscription(user)
-    return subscription and subscription.plan.code in ['basic', 'pro', 'unlimited'] and subscription.is_active()
+    return entitlements.check(user, entitlements.PUBLISH_SHOP)
 
 def has_stock_management(user):
-    subscription = get_seller_subscription(user)
-    return subscription and subscription.plan.code in ['stock', 'basic', 'pro', 'unlimited'] and subscription.is_active()
+    return entitlements.check(user, entitlements.STOCK_MANAGEMENT)
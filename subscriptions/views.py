@@ -1,18 +1,12 @@
-from django.conf import settings
 from django.utils import timezone
 import datetime
-import razorpay
 from rest_framework import status, permissions
 from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .models import Plan, Subscription
 from .serializers import PlanSerializer, SubscriptionSerializer
-
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(
-    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-)
+from payments.gateway import get_gateway, GatewayError, GatewayUnavailable, SignatureError
 
 class PlanListView(ListAPIView):
     queryset = Plan.objects.all().order_by('price')
@@ -32,11 +26,12 @@ class CreateSubscriptionOrderView(APIView):
         order_amount = int(plan.price * 100) # Amount in paise
         order_currency = 'INR'
         
-        order = razorpay_client.order.create({
-            'amount': order_amount,
-            'currency': order_currency,
-            'payment_capture': '1'
-        })
+        try:
+            order = get_gateway().create_order(order_amount, currency=order_currency, payment_capture=True)
+        except GatewayUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except GatewayError as e:
+            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
         
         return Response({'order_id': order['id'], 'amount': order['amount']}, status=status.HTTP_200_OK)
 
@@ -49,14 +44,8 @@ class VerifySubscriptionView(APIView):
         signature = request.data.get('razorpay_signature')
         plan_id = request.data.get('plan_id')
         
-        params_dict = {
-            'razorpay_order_id': order_id,
-            'razorpay_payment_id': payment_id,
-            'razorpay_signature': signature
-        }
-
         try:
-            razorpay_client.utility.verify_payment_signature(params_dict)
+            get_gateway().verify_payment_signature(order_id, payment_id, signature)
             plan = Plan.objects.get(id=plan_id)
             seller = request.user
             
@@ -74,7 +63,7 @@ class VerifySubscriptionView(APIView):
             
             return Response({'status': 'Payment successful, subscription activated.'}, status=status.HTTP_200_OK)
             
-        except razorpay.errors.SignatureVerificationError:
+        except SignatureError:
             return Response({'error': 'Payment verification failed'}, status=status.HTTP_400_BAD_REQUEST)
         except Plan.DoesNotExist:
             return Response({'error': 'Plan not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.otp import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired OTP codes and rate-limit buckets that have refilled."
+
+    def handle(self, *args, **options):
+        count = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired OTP row(s)."))
@@ -114,4 +114,30 @@ class SellerToken(models.Model):
         return binascii.hexlify(os.urandom(20)).decode()
 
     def __str__(self):
-        return self.key
\ No newline at end of file
+        return self.key
+
+class OTPCode(models.Model):
+    """
+    The live verification code of one (purpose, subject). Only a keyed hash
+    is stored. Guesses are counted with a conditional F() update, so
+    parallel guesses can never get past OTP['MAX_ATTEMPTS'].
+    """
+    key = models.CharField(max_length=150, unique=True)
+    digest = models.CharField(max_length=64)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class RateBucket(models.Model):
+    """
+    A token bucket kept as the time it will be full again (epoch seconds).
+    Taking a token is one conditional UPDATE, atomic across workers.
+    """
+    key = models.CharField(max_length=150, unique=True)
+    full_at = models.FloatField(db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,152 @@
+"""
+One-time codes for phone verification.
+
+Codes, guess counters and send rate limits live in the database rather
+than the cache: each check is a single conditional UPDATE with F(), which
+stays atomic across workers whatever cache backend is configured, and is
+never lost to cache eviction. `manage.py purge_otp_state` drops expired rows.
+"""
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from keralasellers import tasks
+from .models import OTPCode, RateBucket
+from .sms import get_sender
+
+# Purposes keep codes for different flows apart even for the same phone.
+SELLER_SIGNUP = 'seller_signup'
+BUYER_PHONE = 'buyer_phone'
+
+# verify() results.
+VALID = 'valid'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+LOCKED = 'locked'
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(f"Too many OTP requests. Try again in {self.retry_after} seconds.")
+
+
+def _config(name):
+    return settings.OTP[name]
+
+
+def _code_key(purpose, subject):
+    return f"code:{purpose}:{subject}"
+
+
+def _digest(purpose, subject, code):
+    # Only a keyed hash is stored, so a database dump does not leak live codes.
+    return salted_hmac('users.otp', f"{purpose}:{subject}:{code}").hexdigest()
+
+
+def client_ip(request):
+    """
+    The client's address. Behind OTP['TRUSTED_PROXIES'] reverse proxies, each
+    appending the address it saw to X-Forwarded-For, that is the entry that
+    many places from the right; anything further left came from the client
+    and may be forged.
+    """
+    proxies = _config('TRUSTED_PROXIES')
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        forwarded = [part for part in forwarded if part]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+# ==============================================================================
+# RATE LIMITING
+# ==============================================================================
+def take_token(key, capacity, refill, now=None):
+    """
+    Take one token from the bucket at `key`. The bucket holds `capacity`
+    tokens and regains one every `refill` seconds. Returns 0 when a token was
+    taken, otherwise the seconds until the next one is available.
+    """
+    now = time.time() if now is None else now
+    # A token is left while the bucket is at most capacity - 1 refills from full.
+    burst = (capacity - 1) * refill
+    RateBucket.objects.bulk_create([RateBucket(key=key, full_at=now)], ignore_conflicts=True)
+    bucket = RateBucket.objects.filter(key=key)
+    if bucket.filter(full_at__lte=now + burst).update(full_at=Greatest(F('full_at'), Value(now)) + refill):
+        return 0
+    return max(0, bucket.values_list('full_at', flat=True).get() - now - burst)
+
+
+def _throttle(phone, ip):
+    buckets = [(f"bucket:phone:{phone}", _config('PHONE_RATE'))]
+    if ip:
+        buckets.insert(0, (f"bucket:ip:{ip}", _config('IP_RATE')))
+    for key, rate in buckets:
+        wait = take_token(key, rate['CAPACITY'], rate['REFILL'])
+        if wait:
+            raise RateLimited(wait)
+
+
+# ==============================================================================
+# ISSUE & VERIFY
+# ==============================================================================
+def _deliver(phone, message):
+    get_sender().send(phone, message)
+
+
+def issue(purpose, subject, phone, ip=None):
+    """
+    Create a fresh code for (purpose, subject) and queue it for delivery to
+    `phone`. Raises RateLimited when the phone or IP has used up its sends.
+    The SMS goes out on the background pool, so this never waits on it.
+    """
+    _throttle(phone, ip)
+    length = _config('LENGTH')
+    code = str(secrets.randbelow(10 ** length)).zfill(length)
+    ttl = _config('TTL')
+    OTPCode.objects.update_or_create(key=_code_key(purpose, subject), defaults={
+        'digest': _digest(purpose, subject, code),
+        'attempts': 0,
+        'expires_at': timezone.now() + timedelta(seconds=ttl),
+    })
+    tasks.submit(_deliver, phone, f"Your Kerala Sellers verification code is {code}. It expires in {ttl // 60} minutes.")
+
+
+def verify(purpose, subject, code):
+    """
+    Check `code` and return VALID, INVALID, EXPIRED or LOCKED. A valid code
+    is consumed; after MAX_ATTEMPTS wrong guesses the code is discarded.
+    """
+    codes = OTPCode.objects.filter(key=_code_key(purpose, subject), expires_at__gt=timezone.now())
+    # The guess is counted before it is checked, so every parallel guess uses up an attempt.
+    if not codes.filter(attempts__lt=_config('MAX_ATTEMPTS')).update(attempts=F('attempts') + 1):
+        if codes.exists():
+            discard(purpose, subject)
+            return LOCKED
+        return EXPIRED
+    stored = codes.values_list('digest', flat=True).first()
+    if stored is None:
+        return EXPIRED
+    if not constant_time_compare(stored, _digest(purpose, subject, str(code))):
+        return INVALID
+    # Of several parallel correct guesses only the one that deletes the code wins.
+    deleted, _ = OTPCode.objects.filter(key=_code_key(purpose, subject), digest=stored).delete()
+    return VALID if deleted else EXPIRED
+
+
+def discard(purpose, subject):
+    OTPCode.objects.filter(key=_code_key(purpose, subject)).delete()
+
+
+def purge_expired(now=None):
+    """Delete expired codes and buckets that have refilled. Returns the number of rows deleted."""
+    codes, _ = OTPCode.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    buckets, _ = RateBucket.objects.filter(full_at__lte=time.time() if now is None else now.timestamp()).delete()
+    return codes + buckets
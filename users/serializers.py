@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from django.core.cache import cache
+from . import otp as otp_service
 from .models import Seller, Buyer
 import re
 
@@ -32,8 +32,10 @@ class RegisterSellerSerializer(serializers.ModelSerializer):
         if Seller.objects.filter(phone=phone).exists():
             raise serializers.ValidationError("A seller with this phone number already exists.")
 
-        stored_otp = cache.get(f"otp_{phone}")
-        if not stored_otp or str(stored_otp) != str(otp):
+        result = otp_service.verify(otp_service.SELLER_SIGNUP, phone, otp)
+        if result == otp_service.LOCKED:
+            raise serializers.ValidationError("Too many incorrect attempts. Please request a new OTP.")
+        if result != otp_service.VALID:
             raise serializers.ValidationError("The OTP provided is invalid or has expired.")
 
         return data
@@ -49,9 +51,6 @@ class RegisterSellerSerializer(serializers.ModelSerializer):
         # ✅ Use the create_user method which handles password hashing
         seller = Seller.objects.create_user(**validated_data)
         
-        # Clear the OTP from cache
-        cache.delete(f"otp_{seller.phone}")
-        
         return seller
 
 class BuyerSerializer(serializers.ModelSerializer):
@@ -0,0 +1,49 @@
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class BaseSMSSender:
+    """Delivers a text message to a phone number. Subclasses implement send()."""
+
+    def __init__(self, options=None):
+        self.options = options or {}
+
+    def send(self, phone, message):
+        raise NotImplementedError
+
+
+class ConsoleSender(BaseSMSSender):
+    """Prints messages to stdout; the development default."""
+
+    def send(self, phone, message):
+        print(f"SMS to {phone}: {message}")
+
+
+class FileSender(BaseSMSSender):
+    """Appends one line per message to OPTIONS['PATH'] so tests can read them back."""
+
+    _lock = threading.Lock()
+
+    def send(self, phone, message):
+        path = Path(self.options['PATH'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, path.open('a', encoding='utf-8') as f:
+            f.write(f"{timezone.now().isoformat()}\t{phone}\t{message}\n")
+
+
+class MemorySender(BaseSMSSender):
+    """Keeps sent messages in `outbox` (process-wide), like Django's locmem mail backend."""
+
+    outbox = []
+
+    def send(self, phone, message):
+        self.outbox.append((phone, message))
+
+
+def get_sender():
+    config = settings.SMS
+    return import_string(config['BACKEND'])(config.get('OPTIONS'))
@@ -1,3 +1,106 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import otp
+from .models import OTPCode, RateBucket, Seller
+from .sms import MemorySender
+
+OTP_TEST_SETTINGS = dict(
+    SMS={'BACKEND': 'users.sms.MemorySender'},
+    BACKGROUND_TASKS={'MAX_WORKERS': 1, 'ALWAYS_EAGER': True},
+)
+
+
+def last_code():
+    return MemorySender.outbox[-1][1].split(' is ')[1][:4]
+
+
+@override_settings(**OTP_TEST_SETTINGS)
+class OTPServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        MemorySender.outbox.clear()
+
+    def test_issued_code_is_delivered_and_consumed_once(self):
+        otp.issue(otp.SELLER_SIGNUP, '9000000001', '9000000001')
+        self.assertEqual(MemorySender.outbox[-1][0], '9000000001')
+        code = last_code()
+        self.assertEqual(otp.verify(otp.SELLER_SIGNUP, '9000000001', code), otp.VALID)
+        self.assertEqual(otp.verify(otp.SELLER_SIGNUP, '9000000001', code), otp.EXPIRED)
+
+    def test_purposes_do_not_share_codes(self):
+        otp.issue(otp.SELLER_SIGNUP, '9000000001', '9000000001')
+        self.assertEqual(otp.verify(otp.BUYER_PHONE, '9000000001', last_code()), otp.EXPIRED)
+
+    def test_code_is_discarded_after_max_attempts(self):
+        otp.issue(otp.SELLER_SIGNUP, '9000000001', '9000000001')
+        code = last_code()
+        wrong = '0000' if code != '0000' else '1111'
+        with self.settings(OTP={**settings.OTP, 'MAX_ATTEMPTS': 2}):
+            self.assertEqual(otp.verify(otp.SELLER_SIGNUP, '9000000001', wrong), otp.INVALID)
+            self.assertEqual(otp.verify(otp.SELLER_SIGNUP, '9000000001', wrong), otp.INVALID)
+            self.assertEqual(otp.verify(otp.SELLER_SIGNUP, '9000000001', code), otp.LOCKED)
+        self.assertEqual(otp.verify(otp.SELLER_SIGNUP, '9000000001', code), otp.EXPIRED)
+
+    def test_guesses_are_counted_on_the_stored_code(self):
+        otp.issue(otp.SELLER_SIGNUP, '9000000001', '9000000001')
+        wrong = '0000' if last_code() != '0000' else '1111'
+        otp.verify(otp.SELLER_SIGNUP, '9000000001', wrong)
+        otp.verify(otp.SELLER_SIGNUP, '9000000001', wrong)
+        self.assertEqual(OTPCode.objects.get().attempts, 2)
+        otp.issue(otp.SELLER_SIGNUP, '9000000001', '9000000001')
+        self.assertEqual(OTPCode.objects.get().attempts, 0)
+
+    def test_expired_rows_are_purged(self):
+        otp.issue(otp.SELLER_SIGNUP, '9000000001', '9000000001')
+        otp.take_token('bucket', 2, 60, now=1000)
+        self.assertEqual(otp.purge_expired(timezone.now()), 1)
+        self.assertFalse(RateBucket.objects.filter(key='bucket').exists())
+        # The code, and the phone's bucket that issue() used.
+        self.assertEqual(otp.purge_expired(timezone.now() + timedelta(seconds=settings.OTP['TTL'])), 2)
+        self.assertEqual(otp.verify(otp.SELLER_SIGNUP, '9000000001', last_code()), otp.EXPIRED)
+
+    def test_client_ip_from_trusted_proxies(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7')
+        self.assertEqual(otp.client_ip(request), '10.0.0.2')
+        with self.settings(OTP={**settings.OTP, 'TRUSTED_PROXIES': 1}):
+            self.assertEqual(otp.client_ip(request), '203.0.113.7')
+            self.assertEqual(otp.client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.2')), '10.0.0.2')
+
+    def test_token_bucket_refills_over_time(self):
+        self.assertEqual(otp.take_token('bucket', 2, 60, now=1000), 0)
+        self.assertEqual(otp.take_token('bucket', 2, 60, now=1000), 0)
+        self.assertAlmostEqual(otp.take_token('bucket', 2, 60, now=1000), 60)
+        self.assertAlmostEqual(otp.take_token('bucket', 2, 60, now=1030), 30)
+        self.assertEqual(otp.take_token('bucket', 2, 60, now=1060), 0)
+
+
+@override_settings(**OTP_TEST_SETTINGS)
+class SellerSignupOTPTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        MemorySender.outbox.clear()
+        self.client = APIClient()
+
+    def test_send_is_rate_limited_per_phone(self):
+        for _ in range(3):
+            response = self.client.post('/user/send-otp/', {'phone': '9000000001'}, format='json')
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post('/user/send-otp/', {'phone': '9000000001'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(len(MemorySender.outbox), 3)
+
+    def test_register_with_delivered_code(self):
+        self.client.post('/user/send-otp/', {'phone': '9000000001'}, format='json')
+        response = self.client.post('/user/register/', {
+            'phone': '9000000001', 'password': 'secret-pass-1', 'name': 'Seller',
+            'shop_name': 'Shop', 'otp': last_code(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Seller.objects.filter(phone='9000000001').exists())
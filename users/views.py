@@ -2,9 +2,8 @@
 # IMPORTS
 # ==============================================================================
 import re
-import random
+from django.conf import settings
 from django.db.models import Sum, Count
-from django.core.cache import cache
 from rest_framework import permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -13,10 +12,14 @@ from rest_framework.authtoken.models import Token
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 
+from . import otp
 from .models import Seller, Buyer, SellerToken
 from .serializers import RegisterSellerSerializer, SellerSerializer, BuyerSerializer
-from products.models import Product
 from orders.models import Order, OrderItem
+from store.stats import get_stats
+from keralasellers.cache import Namespace
+
+dashboard_cache = Namespace('dashboard')
 
 # ==============================================================================
 # CUSTOM PERMISSIONS WITH DEBUG LOGGING
@@ -55,6 +58,14 @@ class IsSeller(permissions.BasePermission):
         return isinstance(request.user, Seller)
 
 
+def rate_limited_response(error):
+    return Response(
+        {'error': str(error)},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(error.retry_after)},
+    )
+
+
 # ==============================================================================
 # SELLER VIEWS
 # ==============================================================================
@@ -69,9 +80,10 @@ class SendOTP(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        otp = random.randint(1000, 9999)
-        cache.set(f"otp_{phone}", otp, timeout=300)
-        print(f"OTP for {phone}: {otp}")
+        try:
+            otp.issue(otp.SELLER_SIGNUP, phone, phone, ip=otp.client_ip(request))
+        except otp.RateLimited as e:
+            return rate_limited_response(e)
         
         return Response(
             {"message": "OTP sent successfully"}, 
@@ -87,7 +99,6 @@ class RegisterSeller(APIView):
         if serializer.is_valid():
             seller = serializer.save()
             token, _ = SellerToken.objects.get_or_create(user=seller)
-            cache.delete(f"otp_{seller.phone}")
             
             return Response({
                 "message": "Seller registered successfully",
@@ -131,16 +142,11 @@ class LoginSeller(APIView):
         )
 
 
-@api_view(['GET'])
-@permission_classes([IsSeller])
-def seller_dashboard(request):
-    seller = request.user
-    store_profile = seller.store_profile
-    
+def _dashboard_analytics(store_profile):
     completed_orders = Order.objects.filter(store=store_profile, status='DELIVERED')
     total_revenue = completed_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
     total_orders = Order.objects.filter(store=store_profile).count()
-    total_products = Product.objects.filter(store=store_profile).count()
+    store_stats = get_stats(store_profile.pk)
     
     top_products_query = OrderItem.objects.filter(
         order__store=store_profile
@@ -148,12 +154,28 @@ def seller_dashboard(request):
         total_sold=Sum('quantity')
     ).order_by('-total_sold')[:5]
     
-    analytics_data = {
+    return {
         'total_revenue': total_revenue,
         'total_orders': total_orders,
-        'total_products': total_products,
+        'total_products': store_stats.total_products,
+        'active_products': store_stats.active_products,
+        'online_products': store_stats.online_products,
+        'low_stock_products': store_stats.low_stock_products,
         'top_selling_products': list(top_products_query)
     }
+
+
+@api_view(['GET'])
+@permission_classes([IsSeller])
+def seller_dashboard(request):
+    seller = request.user
+    store_profile = seller.store_profile
+    
+    analytics_data = dashboard_cache.get_or_compute(
+        store_profile.pk,
+        lambda: _dashboard_analytics(store_profile),
+        settings.CACHE_FRAMEWORK['DASHBOARD_TIMEOUT'],
+    )
     
     serializer = SellerSerializer(seller)
     
@@ -228,11 +250,10 @@ class SendBuyerOTP(APIView):
         request.user.phone_number = phone
         request.user.save()
         
-        # Generate and store OTP
-        otp = random.randint(1000, 9999)
-        cache.set(f"otp_buyer_{request.user.id}", otp, timeout=300)
-        
-        print(f"OTP for buyer {request.user.email}: {otp}")
+        try:
+            otp.issue(otp.BUYER_PHONE, request.user.id, phone, ip=otp.client_ip(request))
+        except otp.RateLimited as e:
+            return rate_limited_response(e)
         
         return Response({
             'message': 'OTP sent successfully.'
@@ -252,37 +273,37 @@ class VerifyBuyerOTP(APIView):
             )
             
         # Validate OTP format
-        if not re.match(r'^\d{4}$', str(otp_entered)):
+        length = settings.OTP['LENGTH']
+        if not re.fullmatch(rf'\d{{{length}}}', str(otp_entered)):
             return Response(
-                {'error': 'Please enter a valid 4-digit OTP.'}, 
+                {'error': f'Please enter a valid {length}-digit OTP.'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        # Check stored OTP
-        stored_otp = cache.get(f"otp_buyer_{request.user.id}")
-        
-        if not stored_otp:
+        result = otp.verify(otp.BUYER_PHONE, request.user.id, otp_entered)
+        if result == otp.EXPIRED:
             return Response(
                 {'error': 'OTP has expired. Please request a new one.'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        if str(otp_entered) == str(stored_otp):
-            # Mark phone as verified
-            request.user.phone_verified = True
-            request.user.save()
-            
-            # Clear the OTP from cache
-            cache.delete(f"otp_buyer_{request.user.id}")
-            
-            return Response({
-                'message': 'Phone number verified successfully.'
-            }, status=status.HTTP_200_OK)
-        else:
+        if result == otp.LOCKED:
+            return Response(
+                {'error': 'Too many incorrect attempts. Please request a new OTP.'}, 
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        if result != otp.VALID:
             return Response(
                 {'error': 'Invalid OTP. Please try again.'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+            
+        # Mark phone as verified
+        request.user.phone_verified = True
+        request.user.save()
+        
+        return Response({
+            'message': 'Phone number verified successfully.'
+        }, status=status.HTTP_200_OK)
 
 
 class BuyerProfileView(APIView):